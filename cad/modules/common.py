@@ -5,11 +5,47 @@ Coordinate system:
   X: Width (driver side negative, passenger side positive)
   Y: Height (floor to ceiling)
   Z: Length (front/cab to rear)
+
+The constants, zones and openings import without cadquery; ``cq`` is loaded
+on first use by the geometry helpers.
 """
 
+from __future__ import annotations
+
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Tuple
-import cadquery as cq
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    The real module then replaces the stand-in in this module's globals, so
+    only the first ``cq.<name>`` lookup goes through here.
+    """
+
+    def __init__(self, name: str, alias: str):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+
+if TYPE_CHECKING:
+    import cadquery as cq
+else:
+    cq = _LazyModule("cadquery", "cq")
 
 
 # =============================================================================
@@ -223,27 +259,103 @@ def make_cabinet(
     return wp
 
 
+@dataclass(frozen=True)
+class Hole:
+    """A blind hole: entry point, drilling direction and optional overrides."""
+    position: Tuple[float, float, float]
+    direction: Tuple[float, float, float] = (0, 0, -1)
+    diameter: Optional[float] = None
+    depth: Optional[float] = None
+
+
+def holes_on_face(
+    face: cq.Face,
+    points: list,
+    diameter: Optional[float] = None,
+    depth: Optional[float] = None,
+) -> list:
+    """Holes drilled into ``face`` at 2D points relative to its center.
+
+    The local axes are those of ``cq.Plane`` built from the face center and
+    normal, so holes on side or sloped faces need no workplane juggling.
+    """
+    normal = face.normalAt()
+    plane = cq.Plane(origin=face.Center(), normal=normal)
+    inward = (-normal).toTuple()
+    return [
+        Hole(plane.toWorldCoords(tuple(p[:2])).toTuple(), inward, diameter, depth)
+        for p in points
+    ]
+
+
+def make_hole_tools(
+    holes: list,
+    hole_diameter: float = 8,
+    hole_depth: float = 20,
+) -> cq.Compound:
+    """Build every hole cylinder at once as one compound of tool solids."""
+    tools = []
+    for hole in holes:
+        direction = cq.Vector(*hole.direction).normalized()
+        tools.append(
+            cq.Solid.makeCylinder(
+                (hole.diameter or hole_diameter) / 2,
+                hole.depth or hole_depth,
+                cq.Vector(*hole.position),
+                direction,
+            )
+        )
+    return cq.Compound.makeCompound(tools)
+
+
+def cut_holes(
+    workplane: cq.Workplane,
+    holes: list,
+    hole_diameter: float = 8,
+    hole_depth: float = 20,
+    clean: bool = True,
+) -> cq.Workplane:
+    """Subtract all ``holes`` from the workplane's solid in a single boolean."""
+    if not holes:
+        return workplane
+    tools = make_hole_tools(holes, hole_diameter, hole_depth)
+    result = workplane.findSolid().cut(tools)
+    if clean:
+        result = result.clean()
+    return workplane.newObject([result])
+
+
 def add_mounting_holes(
     workplane: cq.Workplane,
     hole_positions: list,
     hole_diameter: float = 8,
     hole_depth: float = 20,
+    direction: Optional[Tuple[float, float, float]] = None,
 ) -> cq.Workplane:
     """Add mounting holes to a workplane.
 
+    All holes are cut with one boolean (see ``cut_holes``).
+
     Args:
         workplane: The workplane to add holes to
-        hole_positions: List of (x, y, z) positions for holes
+        hole_positions: (x, y) points in workplane coordinates, (x, y, z)
+            points in global coordinates, or ``Hole`` objects
         hole_diameter: Diameter of the holes
         hole_depth: Depth of the holes
+        direction: Drilling direction; defaults to into the workplane
+            (its negative normal), as ``Workplane.hole()`` does
     """
+    plane = workplane.plane
+    default_dir = direction or (-plane.zDir).toTuple()
+    holes = []
     for pos in hole_positions:
-        workplane = (
-            workplane
-            .pushPoints([pos[:2]])  # x, y only for 2D positioning
-            .hole(hole_diameter, hole_depth)
-        )
-    return workplane
+        if isinstance(pos, Hole):
+            holes.append(pos)
+        elif len(pos) == 2:
+            holes.append(Hole(plane.toWorldCoords(tuple(pos)).toTuple(), default_dir))
+        else:
+            holes.append(Hole(tuple(pos), default_dir))
+    return cut_holes(workplane, holes, hole_diameter, hole_depth)
 
 
 def export_step(workplane: cq.Workplane, filepath: str) -> None:
@@ -251,11 +363,276 @@ def export_step(workplane: cq.Workplane, filepath: str) -> None:
     cq.exporters.export(workplane, filepath, exportType="STEP")
 
 
+def export_step_assembly(components, filepath: str, name: str = "assembly") -> None:
+    """Stream ``step_writer.Component``s to STEP as instances of shared parts.
+
+    Unlike ``export_step`` the document is never held in memory as a whole;
+    ``components`` may be a generator.
+    """
+    from cad.modules.step_writer import write_step_assembly  # noqa: PLC0415
+
+    write_step_assembly(filepath, components, name)
+
+
 def export_stl(workplane: cq.Workplane, filepath: str) -> None:
     """Export a workplane to STL format."""
     cq.exporters.export(workplane, filepath, exportType="STL")
 
 
+# =============================================================================
+# INSTANCES
+# =============================================================================
+
+Matrix = Tuple[Tuple[float, float, float, float], ...]  # 4x4, row-major
+
+
+def location_matrix(location: cq.Location) -> Matrix:
+    """4x4 homogeneous matrix of ``location`` (picklable, viewer-friendly)."""
+    trsf = location.wrapped.Transformation()
+    rows = tuple(tuple(trsf.Value(row, col) for col in range(1, 5)) for row in range(1, 4))
+    return rows + ((0.0, 0.0, 0.0, 1.0),)
+
+
+def matrix_location(matrix: Matrix) -> cq.Location:
+    """Inverse of ``location_matrix`` (rigid transforms only)."""
+    from OCP.gp import gp_Trsf  # noqa: PLC0415
+
+    trsf = gp_Trsf()
+    trsf.SetValues(*(float(v) for row in matrix[:3] for v in row))
+    return cq.Location(trsf)
+
+
+def _single_shape(shape) -> cq.Shape:
+    if isinstance(shape, cq.Workplane):
+        shapes = [v for v in shape.vals() if isinstance(v, cq.Shape)]
+        return shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+    return shape
+
+
+@dataclass(frozen=True)
+class Instances:
+    """One prototype shape placed at several locations.
+
+    Placements are OCCT located shapes sharing the prototype's topology, so
+    geometry, meshes (GLB instancing) and STEP products grow with unique
+    parts rather than with the number of copies.
+    """
+    name: str
+    prototype: cq.Shape  # a cq.Workplane is converted on construction
+    locations: Tuple[cq.Location, ...]
+    color: Optional[int] = None  # 0xRRGGBB
+
+    def __post_init__(self):
+        object.__setattr__(self, "prototype", _single_shape(self.prototype))
+        object.__setattr__(self, "locations", tuple(self.locations))
+
+    @classmethod
+    def grid(
+        cls,
+        name: str,
+        prototype,
+        counts: Tuple[int, int, int],
+        pitch: Tuple[float, float, float],
+        center: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        color: Optional[int] = None,
+    ) -> "Instances":
+        """``counts`` copies along X, Y, Z, ``pitch`` apart, centred on ``center``."""
+        offsets = [
+            [c + p * (i - (n - 1) / 2.0) for i in range(n)]
+            for n, p, c in zip(counts, pitch, center)
+        ]
+        locations = [cq.Location((x, y, z)) for z in offsets[2] for y in offsets[1] for x in offsets[0]]
+        return cls(name, prototype, locations, color)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def shapes(self) -> list:
+        """The placed copies; each shares the prototype's TShape."""
+        return [self.prototype.moved(location) for location in self.locations]
+
+    def compound(self) -> cq.Compound:
+        return cq.Compound.makeCompound(self.shapes())
+
+    def matrices(self) -> Tuple[Matrix, ...]:
+        return tuple(location_matrix(location) for location in self.locations)
+
+    def components(self) -> list:
+        """``step_writer.Component``s sharing one product named after the set."""
+        from cad.modules.step_writer import Component  # noqa: PLC0415
+
+        return [
+            Component(f"{self.name}_{i + 1}", self.prototype, location, self.color, part=self.name)
+            for i, location in enumerate(self.locations)
+        ]
+
+
+# =============================================================================
+# GEOMETRY MEMO
+# =============================================================================
+
+GEOMETRY_CACHE_ENV = "GIMLI2_GEOMETRY_CACHE"  # directory for the disk layer
+
+
+def workplane_to_brep(workplane: cq.Workplane) -> Tuple[bytes, bool]:
+    """BREP bytes of a workplane's shapes, and whether there was just one."""
+    shapes = [v for v in workplane.vals() if isinstance(v, cq.Shape)]
+    single = len(shapes) == 1
+    shape = shapes[0] if single else cq.Compound.makeCompound(shapes)
+    stream = io.BytesIO()
+    shape.exportBrep(stream)
+    return stream.getvalue(), single
+
+
+def workplane_from_brep(brep: bytes, single: bool) -> cq.Workplane:
+    """Inverse of ``workplane_to_brep``."""
+    shape = cq.Shape.importBrep(io.BytesIO(brep))
+    if single:
+        return cq.Workplane("XY").newObject([shape])
+    return cq.Workplane("XY").newObject(list(shape))
+
+
+def _source_digest(cls) -> str:
+    """Hash of a class's source, so editing generate() invalidates entries."""
+    try:
+        source = inspect.getsource(cls)
+    except (OSError, TypeError):
+        return ""
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+class GeometryMemo:
+    """Process-wide LRU of generated module geometry, stored as BREP bytes.
+
+    Keys combine the module class, ``GEOMETRY_VERSION``, a hash of the class
+    source and the canonical JSON of ``params``.  Entries are evicted least
+    recently used first once ``max_bytes`` is exceeded.  With ``disk_dir``
+    set, entries are also written there as ``<key>.brep`` (trimmed the same
+    way by file mtime) so later processes can reuse them.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, bool]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(module: "HabitatModule") -> str:
+        cls = type(module)
+        payload = json.dumps(
+            {
+                "class": f"{cls.__module__}.{cls.__qualname__}",
+                "version": cls.GEOMETRY_VERSION,
+                "source": _source_digest(cls),
+                "params": module.params,
+            },
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    # -- (de)serialization ---------------------------------------------------
+
+    @staticmethod
+    def _dump(workplane: cq.Workplane) -> Tuple[bytes, bool]:
+        return workplane_to_brep(workplane)
+
+    @staticmethod
+    def _load(brep: bytes, single: bool) -> cq.Workplane:
+        return workplane_from_brep(brep, single)
+
+    # -- layers ----------------------------------------------------------------
+
+    def _remember(self, key: str, entry: Tuple[bytes, bool]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = entry
+            self._size += len(entry[0])
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, (old, _) = self._entries.popitem(last=False)
+                self._size -= len(old)
+
+    def _disk_path(self, key: str, single: bool) -> Path:
+        return self.disk_dir / f"{key}.{'s' if single else 'm'}.brep"
+
+    def _disk_get(self, key: str) -> Optional[Tuple[bytes, bool]]:
+        if self.disk_dir is None:
+            return None
+        for single in (True, False):
+            path = self._disk_path(key, single)
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                continue
+            return data, single
+        return None
+
+    def _disk_put(self, key: str, entry: Tuple[bytes, bool]) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key, entry[1])
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(entry[0])
+            tmp.replace(path)
+            files = sorted(
+                ((p, p.stat()) for p in self.disk_dir.glob("*.brep")),
+                key=lambda item: item[1].st_mtime,
+            )
+            total = sum(st.st_size for _, st in files)
+            for old, st in files:
+                if total <= self.disk_max_bytes:
+                    break
+                old.unlink()
+                total -= st.st_size
+        except OSError:
+            pass
+
+    def geometry(self, module: "HabitatModule") -> cq.Workplane:
+        """Return ``module``'s geometry, generating it only on a miss."""
+        key = self.key(module)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is not None:
+            self.hits += 1
+            return self._load(*entry)
+
+        self.misses += 1
+        workplane = module.generate()
+        entry = self._dump(workplane)
+        self._remember(key, entry)
+        self._disk_put(key, entry)
+        return workplane
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+GEOMETRY_MEMO = GeometryMemo(disk_dir=os.environ.get(GEOMETRY_CACHE_ENV) or None)
+
+
 # =============================================================================
 # BASE MODULE CLASS
 # =============================================================================
@@ -267,6 +644,13 @@ class HabitatModule:
     MODULE_ID: str = "base"
     MODULE_NAME: str = "Base Module"
     ZONE: Zone = None
+    # Bump when generate() output changes for reasons outside the class body
+    # (shared helpers, data files); set MEMOIZE = False for nondeterministic
+    # modules.
+    GEOMETRY_VERSION: int = 1
+    MEMOIZE: bool = True
+    # Display colour (0xRRGGBB) in assemblies; None picks one from a palette.
+    COLOR: Optional[int] = None
 
     def __init__(self, params: dict = None):
         """Initialize the module with optional parameters."""
@@ -279,22 +663,61 @@ class HabitatModule:
 
     @property
     def geometry(self) -> cq.Workplane:
-        """Get the module geometry, generating if needed."""
+        """Get the module geometry, generating if needed.
+
+        Identical configurations share one generation through GEOMETRY_MEMO.
+        """
         if self._geometry is None:
-            self._geometry = self.generate()
+            if self.MEMOIZE:
+                self._geometry = GEOMETRY_MEMO.geometry(self)
+            else:
+                self._geometry = self.generate()
         return self._geometry
 
+    def instances(self) -> list:
+        """Repeated parts as ``Instances``, kept out of ``generate()``.
+
+        Override in subclasses that place one shape several times (battery
+        modules, identical cabinets); the default has none.
+        """
+        return []
+
     def export_step(self, filepath: str) -> None:
-        """Export the module to STEP format."""
-        export_step(self.geometry, filepath)
+        """Export the module to STEP format.
+
+        With ``instances()`` the file is an assembly whose repeated parts are
+        written once and placed as STEP instances.
+        """
+        instances = self.instances()
+        if not instances:
+            export_step(self.geometry, filepath)
+            return
+        components = [c for group in instances for c in group.components()]
+        if self.geometry.vals():
+            from cad.modules.step_writer import Component  # noqa: PLC0415
+
+            components.insert(0, Component(self.MODULE_ID, self.geometry, color=self.COLOR))
+        export_step_assembly(components, filepath, self.MODULE_ID)
+
+    def baked_geometry(self) -> cq.Workplane:
+        """``geometry`` plus every placed copy from ``instances()`` as one compound.
+
+        For outputs without instancing (STL, bounding boxes); the copies
+        still share their prototype's TShape.
+        """
+        instances = self.instances()
+        if not instances:
+            return self.geometry
+        shapes = list(self.geometry.vals()) + [group.compound() for group in instances]
+        return cq.Workplane("XY").newObject([cq.Compound.makeCompound(shapes)])
 
     def export_stl(self, filepath: str) -> None:
-        """Export the module to STL format."""
-        export_stl(self.geometry, filepath)
+        """Export the module, instances baked in, to STL format."""
+        export_stl(self.baked_geometry(), filepath)
 
     def get_bounding_box(self) -> dict:
-        """Get the bounding box of the module."""
-        bb = self.geometry.val().BoundingBox()
+        """Get the bounding box of the module, instances included."""
+        bb = self.baked_geometry().val().BoundingBox()
         return {
             "x_min": bb.xmin,
             "x_max": bb.xmax,
@@ -0,0 +1,403 @@
+"""Streaming STEP (AP214) writer for large assemblies.
+
+``export_step()`` hands one workplane to ``cq.exporters.export``, which
+builds the whole document in memory; ``cq.Assembly.export`` does the same
+for assemblies and copies every part.  ``StepStreamWriter`` instead writes
+the file as it goes:
+
+* each distinct part is translated on its own by OCCT, and its entities are
+  renumbered and appended to the open file, so only one part is in memory
+  at a time
+* repeated parts (same key, or the same geometry at a different location)
+  share one product definition and are written once
+* every placement is a NEXT_ASSEMBLY_USAGE_OCCURRENCE with an
+  ITEM_DEFINED_TRANSFORMATION, i.e. an instance instead of a copy
+
+The root product's SHAPE_REPRESENTATION, which lists every placement axis,
+is written on ``close()`` under an id reserved up front.
+
+Example::
+
+    with StepStreamWriter("interior.step", "gimli2_interior") as writer:
+        for i in range(6):
+            writer.add(Component(f"battery_{i}", battery, cq.Location((0, 0, 200 * i)), part="battery"))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import cadquery as cq
+
+FILE_SCHEMA = "AUTOMOTIVE_DESIGN { 1 0 10303 214 1 1 1 1 }"
+
+# Token pattern for renumbering: quoted strings are matched (and left alone)
+# so a '#' inside a name is never mistaken for an entity reference.
+_TOKEN = re.compile(r"'(?:[^']|'')*'|#(\d+)")
+_ENTITY = re.compile(r"#(\d+)\s*=\s*(.*)", re.DOTALL)
+_KEYWORD = re.compile(r"\s*([A-Z0-9_]+)")
+_PRODUCT = re.compile(r"PRODUCT\('(?:[^']|'')*',\s*'(?:[^']|'')*'")
+_REP_ITEMS = re.compile(r"^(\s*[A-Z0-9_]+\('(?:[^']|'')*',\s*\()")
+_SOLIDS = ("MANIFOLD_SOLID_BREP", "BREP_WITH_VOIDS", "SHELL_BASED_SURFACE_MODEL")
+
+
+@dataclass(frozen=True)
+class Component:
+    """One placed part.
+
+    ``part`` names the shared product; by default it is a digest of the
+    geometry, so equal shapes are stored once.  The shape's own location is
+    applied after ``location``.
+    """
+
+    name: str
+    shape: object  # cq.Shape or cq.Workplane
+    location: Optional["cq.Location"] = None
+    color: Optional[int] = None  # 0xRRGGBB, applied per part
+    part: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class StepPart:
+    """Entity ids of a part already written to the file."""
+
+    name: str
+    definition: int  # PRODUCT_DEFINITION
+    representation: int  # top-level shape representation
+    axis: int  # identity AXIS2_PLACEMENT_3D inside that representation
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _string(text: str) -> str:
+    """Quote ``text`` as a STEP string (ASCII only)."""
+    text = text.encode("ascii", "replace").decode("ascii")
+    return "'" + text.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def _real(value: float) -> str:
+    """STEP REAL: always has a decimal point, exponent in upper case."""
+    text = repr(float(value))
+    mantissa, _, exponent = text.partition("e")
+    if "." not in mantissa:
+        mantissa += "."
+    return mantissa + ("E" + exponent if exponent else "")
+
+
+def _as_shape(shape) -> "cq.Shape":
+    import cadquery as cq  # noqa: PLC0415
+
+    if isinstance(shape, cq.Workplane):
+        shapes = [v for v in shape.vals() if isinstance(v, cq.Shape)]
+        return shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+    return shape
+
+
+def shape_key(shape) -> str:
+    """Digest of the geometry, ignoring the shape's location and any mesh."""
+    import cadquery as cq  # noqa: PLC0415
+    from OCP.BRepTools import BRepTools  # noqa: PLC0415
+    from OCP.TopTools import TopTools_FormatVersion  # noqa: PLC0415
+
+    stream = io.BytesIO()
+    BRepTools.Write_s(
+        _as_shape(shape).located(cq.Location()).wrapped,
+        stream,
+        False,
+        False,
+        TopTools_FormatVersion.TopTools_FormatVersion_VERSION_1,
+    )
+    return hashlib.sha256(stream.getvalue()).hexdigest()
+
+
+def _entities(path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield ``(id, body)`` for each entity of a Part 21 file's DATA section.
+
+    Bodies keep their line breaks and the trailing ';'.
+    """
+    in_data = False
+    current: List[str] = []
+    with open(path, encoding="ascii", errors="replace") as handle:
+        for line in handle:
+            if not in_data:
+                in_data = line.strip() == "DATA;"
+                continue
+            if not current and line.strip() == "ENDSEC;":
+                return
+            current.append(line)
+            text = "".join(current)
+            if text.rstrip().endswith(";") and text.count("'") % 2 == 0:
+                current = []
+                match = _ENTITY.match(text.strip())
+                if match:
+                    yield int(match.group(1)), match.group(2)
+
+
+def _keyword(body: str) -> str:
+    match = _KEYWORD.match(body)
+    return match.group(1) if match else ""
+
+
+def _refs(body: str) -> List[int]:
+    return [int(m.group(1)) for m in _TOKEN.finditer(body) if m.group(1)]
+
+
+# =============================================================================
+# WRITER
+# =============================================================================
+
+class StepStreamWriter:
+    """Write an assembly of instanced parts to STEP one part at a time."""
+
+    def __init__(self, path: Union[str, Path], name: str = "assembly"):
+        self.path = Path(path)
+        self.name = name
+        self.parts: Dict[str, StepPart] = {}  # by key; aliases may share a part
+        self.parts_written = 0
+        self.instances = 0
+        self._placements: List[int] = []  # instance axes in the root representation
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="step_writer_")
+        self._handle = open(self.path, "w", encoding="ascii", newline="\n")
+        self._next_id = 1
+        self._write_header()
+
+    def __enter__(self) -> "StepStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, *_exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+
+    # -- low level ---------------------------------------------------------
+
+    def _reserve(self, count: int = 1) -> int:
+        first = self._next_id
+        self._next_id += count
+        return first
+
+    def _emit(self, entity_id: int, body: str) -> None:
+        self._handle.write(f"#{entity_id} = {body}\n")
+
+    def _add(self, body: str) -> int:
+        entity_id = self._reserve()
+        self._emit(entity_id, body)
+        return entity_id
+
+    def _axis(self, origin=(0.0, 0.0, 0.0), z=(0.0, 0.0, 1.0), x=(1.0, 0.0, 0.0)) -> int:
+        def triple(values) -> str:
+            return "(" + ",".join(_real(v) for v in values) + ")"
+
+        point = self._add(f"CARTESIAN_POINT('',{triple(origin)});")
+        z_dir = self._add(f"DIRECTION('',{triple(z)});")
+        x_dir = self._add(f"DIRECTION('',{triple(x)});")
+        return self._add(f"AXIS2_PLACEMENT_3D('',#{point},#{z_dir},#{x_dir});")
+
+    def _write_header(self) -> None:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._handle.write(
+            "ISO-10303-21;\nHEADER;\n"
+            "FILE_DESCRIPTION(('gimli2-habitat streamed assembly'),'2;1');\n"
+            f"FILE_NAME({_string(self.path.name)},'{stamp}',(''),(''),"
+            "'gimli2 step_writer','Open CASCADE','');\n"
+            f"FILE_SCHEMA(('{FILE_SCHEMA}'));\nENDSEC;\nDATA;\n"
+        )
+        name = _string(self.name)
+        self._protocol = self._reserve()
+        self._context = self._add("APPLICATION_CONTEXT("
+                                  "'core data for automotive mechanical design processes');")
+        self._emit(self._protocol, "APPLICATION_PROTOCOL_DEFINITION('international standard',"
+                                   f"'automotive_design',2000,#{self._context});")
+        sdr = self._reserve()
+        pds = self._reserve()
+        self._root_definition = self._reserve()
+        formation = self._reserve()
+        product = self._reserve()
+        product_context = self._add(f"PRODUCT_CONTEXT('',#{self._context},'mechanical');")
+        definition_context = self._add(f"PRODUCT_DEFINITION_CONTEXT('part definition',#{self._context},'design');")
+        self._emit(product, f"PRODUCT({name},{name},'',(#{product_context}));")
+        self._emit(formation, f"PRODUCT_DEFINITION_FORMATION('','',#{product});")
+        self._emit(self._root_definition,
+                   f"PRODUCT_DEFINITION('design','',#{formation},#{definition_context});")
+        self._emit(pds, f"PRODUCT_DEFINITION_SHAPE('','',#{self._root_definition});")
+        self._root_representation = self._reserve()  # written by close()
+        self._emit(sdr, f"SHAPE_DEFINITION_REPRESENTATION(#{pds},#{self._root_representation});")
+        self._root_axis = self._axis()
+        length = self._add("( LENGTH_UNIT() NAMED_UNIT(*) SI_UNIT(.MILLI.,.METRE.) );")
+        angle = self._add("( NAMED_UNIT(*) PLANE_ANGLE_UNIT() SI_UNIT($,.RADIAN.) );")
+        solid_angle = self._add("( NAMED_UNIT(*) SI_UNIT($,.STERADIAN.) SOLID_ANGLE_UNIT() );")
+        uncertainty = self._add(f"UNCERTAINTY_MEASURE_WITH_UNIT(LENGTH_MEASURE(1.E-07),#{length},"
+                                "'distance_accuracy_value','confusion accuracy');")
+        self._geometric_context = self._add(
+            "( GEOMETRIC_REPRESENTATION_CONTEXT(3) "
+            f"GLOBAL_UNCERTAINTY_ASSIGNED_CONTEXT((#{uncertainty})) "
+            f"GLOBAL_UNIT_ASSIGNED_CONTEXT((#{length},#{angle},#{solid_angle})) "
+            "REPRESENTATION_CONTEXT('Context #1','3D Context with UNIT and UNCERTAINTY') );"
+        )
+        self._add(f"PRODUCT_RELATED_PRODUCT_CATEGORY('part',$,(#{product}));")
+
+    # -- parts -------------------------------------------------------------
+
+    def add_part(self, key: str, shape, name: Optional[str] = None, color: Optional[int] = None) -> StepPart:
+        """Write ``shape`` (at its identity location) as product ``key``."""
+        if key in self.parts:
+            return self.parts[key]
+        import cadquery as cq  # noqa: PLC0415
+
+        name = name or key
+        source = Path(self._tmpdir.name) / "part.step"
+        _as_shape(shape).located(cq.Location()).exportStep(str(source))
+
+        # Pass 1: ids we need before rewriting (the file may reference forward).
+        drop: Dict[int, int] = {}
+        definition = sdr_rep = None
+        solids: List[int] = []
+        max_id = 0
+        for entity_id, body in _entities(source):
+            max_id = max(max_id, entity_id)
+            keyword = _keyword(body)
+            if keyword in ("APPLICATION_CONTEXT", "APPLICATION_PROTOCOL_DEFINITION"):
+                drop[entity_id] = self._context if keyword == "APPLICATION_CONTEXT" else self._protocol
+            elif keyword == "PRODUCT_DEFINITION" and definition is None:
+                definition = entity_id
+            elif keyword == "SHAPE_DEFINITION_REPRESENTATION" and sdr_rep is None:
+                sdr_rep = _refs(body)[1]
+            elif keyword in _SOLIDS:
+                solids.append(entity_id)
+        if definition is None or sdr_rep is None:
+            raise ValueError(f"OCCT wrote no product for part {name!r}")
+
+        # Pass 2: renumber into this file.
+        offset = self._next_id - 1
+        self._next_id += max_id
+        axis = self._next_id + 3  # identity axis written right after the part (point, dirs, axis)
+        products = 0
+        rep_context = None
+
+        def renumber(match: re.Match) -> str:
+            if match.group(1) is None:
+                return match.group(0)
+            old = int(match.group(1))
+            return f"#{drop.get(old, old + offset)}"
+
+        for entity_id, body in _entities(source):
+            if entity_id in drop:
+                continue
+            keyword = _keyword(body)
+            if keyword == "PRODUCT":
+                label = _string(name if products == 0 else f"{name}:{products}")
+                body = _PRODUCT.sub(f"PRODUCT({label},{label}", body, count=1)
+                products += 1
+            elif entity_id == sdr_rep:
+                rep_context = _refs(body)[-1] + offset
+                body = _REP_ITEMS.sub(lambda m: f"{m.group(1)}#{axis},", body, count=1)
+            self._emit(entity_id + offset, _TOKEN.sub(renumber, body).rstrip())
+        source.unlink()
+        if self._axis() != axis:
+            raise AssertionError("entity numbering out of step")
+
+        if color is not None and solids and rep_context is not None:
+            self._style(solids, offset, rep_context, color)
+        part = StepPart(name, definition + offset, sdr_rep + offset, axis)
+        self.parts[key] = part
+        self.parts_written += 1
+        return part
+
+    def _style(self, solids: List[int], offset: int, context: int, color: int) -> None:
+        red, green, blue = (((color >> shift) & 0xFF) / 255.0 for shift in (16, 8, 0))
+        rgb = self._add(f"COLOUR_RGB('',{_real(red)},{_real(green)},{_real(blue)});")
+        fill = self._add(f"FILL_AREA_STYLE_COLOUR('',#{rgb});")
+        area = self._add(f"FILL_AREA_STYLE('',(#{fill}));")
+        surface = self._add(f"SURFACE_STYLE_FILL_AREA(#{area});")
+        side = self._add(f"SURFACE_SIDE_STYLE('',(#{surface}));")
+        usage = self._add(f"SURFACE_STYLE_USAGE(.BOTH.,#{side});")
+        style = self._add(f"PRESENTATION_STYLE_ASSIGNMENT((#{usage}));")
+        styled = [self._add(f"STYLED_ITEM('color',(#{style}),#{solid + offset});") for solid in solids]
+        items = ",".join(f"#{s}" for s in styled)
+        self._add(f"MECHANICAL_DESIGN_GEOMETRIC_PRESENTATION_REPRESENTATION('',({items}),#{context});")
+
+    # -- instances ---------------------------------------------------------
+
+    def add_instance(self, key: str, location: Optional["cq.Location"] = None, name: Optional[str] = None) -> None:
+        """Place part ``key`` in the root assembly at ``location``."""
+        part = self.parts[key]
+        self.instances += 1
+        origin, z, x = (0.0, 0.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 0.0)
+        if location is not None:
+            trsf = location.wrapped.Transformation()
+            origin = tuple(trsf.Value(row, 4) for row in (1, 2, 3))
+            z = tuple(trsf.Value(row, 3) for row in (1, 2, 3))
+            x = tuple(trsf.Value(row, 1) for row in (1, 2, 3))
+        placement = self._axis(origin, z, x)
+        self._placements.append(placement)
+        label = _string(name or f"{part.name}_{self.instances}")
+        transform = self._add(f"ITEM_DEFINED_TRANSFORMATION('','',#{part.axis},#{placement});")
+        relation = self._add(
+            f"( REPRESENTATION_RELATIONSHIP('','',#{part.representation},#{self._root_representation}) "
+            f"REPRESENTATION_RELATIONSHIP_WITH_TRANSFORMATION(#{transform}) "
+            "SHAPE_REPRESENTATION_RELATIONSHIP() );"
+        )
+        usage = self._add(
+            f"NEXT_ASSEMBLY_USAGE_OCCURRENCE('{self.instances}',{label},'',"
+            f"#{self._root_definition},#{part.definition},$);"
+        )
+        shape = self._add(f"PRODUCT_DEFINITION_SHAPE('Placement','Placement of an item',#{usage});")
+        self._add(f"CONTEXT_DEPENDENT_SHAPE_REPRESENTATION(#{relation},#{shape});")
+
+    def add(self, component: Component) -> None:
+        """Write ``component``'s part if it is new, then place it."""
+        shape = _as_shape(component.shape)
+        location = shape.location()
+        if component.location is not None:
+            location = component.location * location
+        key = component.part or shape_key(shape)
+        if key not in self.parts:
+            part = self.add_part(key, shape, component.part or component.name, component.color)
+            if component.part is None:
+                # The STEP translation can add data to the shape (e.g. missing
+                # pcurves), which changes its digest for later instances.
+                self.parts.setdefault(shape_key(shape), part)
+        self.add_instance(key, location, component.name)
+
+    # -- finish ------------------------------------------------------------
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        items = ",".join(f"#{i}" for i in [self._root_axis, *self._placements])
+        self._emit(self._root_representation, f"SHAPE_REPRESENTATION('',({items}),#{self._geometric_context});")
+        self._handle.write("ENDSEC;\nEND-ISO-10303-21;\n")
+        self._handle.close()
+        self._tmpdir.cleanup()
+
+    def _abort(self) -> None:
+        self._handle.close()
+        self._tmpdir.cleanup()
+        if self.path.exists():
+            os.unlink(self.path)
+
+
+def write_step_assembly(
+    path: Union[str, Path], components: Iterable[Component], name: str = "assembly",
+) -> Tuple[int, int]:
+    """Stream ``components`` to ``path``; returns (parts written, instances).
+
+    ``components`` may be a generator, so callers can build one part at a
+    time.
+    """
+    with StepStreamWriter(path, name) as writer:
+        for component in components:
+            writer.add(component)
+        return writer.parts_written, writer.instances
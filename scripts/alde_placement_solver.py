@@ -1,6 +1,4 @@
 
-import cadquery as cq
-
 # Alde Specs
 UNIT_W = 500.0
 UNIT_D = 420.0
@@ -97,4 +95,5 @@ def check_alde_placement():
     
     return "\n".join(results)
 
-print(check_alde_placement())
+if __name__ == "__main__":
+    print(check_alde_placement())
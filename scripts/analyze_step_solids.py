@@ -1,30 +1,64 @@
 #!/usr/bin/env python3
-"""Analyze all solids in the STEP file to identify components (like wheels)."""
+"""Analyze all solids in the STEP file to identify components (like wheels).
+
+With ``--inventory PATH`` the mass properties of every solid are computed in
+a process pool and written as a columnar table (Parquet, CSV or JSON, chosen
+by file suffix).  ``load_inventory()`` reads it back without touching OCCT.
+
+Both modes ask a running geometry daemon (``geometry_daemon.py``) for the
+rows first and only load the shell when none answers (or with --no-daemon).
+"""
 
 from __future__ import annotations
+import argparse
+import csv
+import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_STEP = REPO_ROOT / "reference" / "Osterath_Habitat_1225 AF.step"
 
-def analyze_solids(step_path: Path):
+def solid_rows_via_daemon(step_path: Path):
+    """Inventory rows from a running geometry daemon; None if unavailable."""
+    from geometry_client import try_request  # noqa: PLC0415
+
+    reply = try_request("solids", {"step": str(step_path.resolve())}, timeout=120.0)
+    return None if reply is None else [tuple(row) for row in reply["rows"]]
+
+
+def print_solids(rows) -> None:
+    print(f"Found {len(rows)} solids.")
+
+    print(f"{'ID':<4} | {'Volume (mm3)':<15} | {'Center (X, Y, Z)':<30} | {'BBox Min':<30} | {'BBox Max':<30}")
+    print("-" * 120)
+
+    for i, xmin, ymin, zmin, xmax, ymax, zmax, cx, cy, cz, volume, _area in rows:
+        c_str = f"({cx:.2f}, {cy:.2f}, {cz:.2f})"
+        min_str = f"({xmin:.2f}, {ymin:.2f}, {zmin:.2f})"
+        max_str = f"({xmax:.2f}, {ymax:.2f}, {zmax:.2f})"
+
+        print(f"{i:<4} | {volume:<15.2f} | {c_str:<30} | {min_str:<30} | {max_str:<30}")
+
+
+def analyze_solids(step_path: Path, use_daemon: bool = True):
+    rows = solid_rows_via_daemon(step_path) if use_daemon else None
+    if rows is not None:
+        print(f"Solids of {step_path} from the geometry daemon")
+        print_solids(rows)
+        return
     try:
-        import cadquery as cq
-        from cadquery import importers
+        import cadquery  # noqa: F401 (availability check)
     except ImportError:
         print("Error: cadquery not found. Run this inside the docker container.")
         sys.exit(1)
+    from shell_cache import load_shell
 
     print(f"Loading STEP file: {step_path}")
-    model = importers.importStep(str(step_path))
-    
-    # Depending on structure, it might be a Compound, or list of solids.
-    # If it's a Workplane, val() gets the underlying object.
-    if isinstance(model, cq.Workplane):
-        obj = model.val()
-    else:
-        obj = model
+    # Compound of all shell solids (served from the BREP cache when fresh).
+    obj = load_shell(step_path)
 
     # Extract all solids
     # In CadQuery/OCCT, we can traverse looking for Solids.
@@ -49,21 +83,167 @@ def analyze_solids(step_path: Path):
                 solids.append(Shape(exp.Current()))
                 exp.Next()
     
-    print(f"Found {len(solids)} solids.")
-    
-    print(f"{'ID':<4} | {'Volume (mm3)':<15} | {'Center (X, Y, Z)':<30} | {'BBox Min':<30} | {'BBox Max':<30}")
-    print("-" * 120)
+    print_solids([solid_row(i, solid) for i, solid in enumerate(solids)])
+
+# =============================================================================
+# INVENTORY MODE
+# =============================================================================
+
+INVENTORY_COLUMNS = (
+    "solid_id",
+    "bbox_xmin", "bbox_ymin", "bbox_zmin",
+    "bbox_xmax", "bbox_ymax", "bbox_zmax",
+    "center_x", "center_y", "center_z",
+    "volume_mm3",
+    "area_mm2",
+)
+
+_WORKER_SOLIDS: list = []
+
+
+def _init_worker(step_path: str) -> None:
+    # Each worker reads the shell from the BREP cache once; OCCT shapes
+    # cannot be pickled across processes.
+    from shell_cache import load_shell
+
+    _WORKER_SOLIDS[:] = load_shell(Path(step_path)).Solids()
+
+
+def solid_row(i: int, solid) -> tuple:
+    """One inventory row (``INVENTORY_COLUMNS``) for shell solid ``i``."""
+    bbox = solid.BoundingBox()
+    center = solid.Center()
+    return (
+        i,
+        bbox.xmin, bbox.ymin, bbox.zmin,
+        bbox.xmax, bbox.ymax, bbox.zmax,
+        center.x, center.y, center.z,
+        solid.Volume(),
+        solid.Area(),
+    )
+
+
+def _solid_rows(indices: list) -> list:
+    return [solid_row(i, _WORKER_SOLIDS[i]) for i in indices]
+
+
+def build_inventory(step_path: Path, workers: int | None = None, use_daemon: bool = True) -> dict:
+    """Mass properties of every shell solid as a dict of NumPy columns."""
+    import numpy as np
+
+    rows = solid_rows_via_daemon(step_path) if use_daemon else None
+    if rows is None:
+        rows = _local_rows(step_path, workers)
+    rows.sort(key=lambda row: row[0])
+
+    table = {name: np.array([row[i] for row in rows], dtype=float)
+             for i, name in enumerate(INVENTORY_COLUMNS)}
+    table["solid_id"] = table["solid_id"].astype(np.int64)
+    return table
+
+
+def _local_rows(step_path: Path, workers: int | None) -> list:
+    from shell_cache import load_shell
+
+    # Warm the BREP cache in the parent so workers never parse the STEP.
+    count = len(load_shell(step_path).Solids())
+    workers = max(1, min(workers or os.cpu_count() or 1, count))
+    chunks = [list(range(start, count, workers)) for start in range(workers)]
+
+    if workers == 1:
+        _init_worker(str(step_path))
+        return _solid_rows(chunks[0])
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(step_path),),
+    ) as pool:
+        return [row for part in pool.map(_solid_rows, chunks) for row in part]
+
+
+def write_inventory(table: dict, path: Path) -> None:
+    """Write an inventory table; the format follows the file suffix."""
+    suffix = path.suffix.lower()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow. Install with: pip install pyarrow")
+        pq.write_table(pa.table({name: table[name] for name in INVENTORY_COLUMNS}), path)
+    elif suffix == ".csv":
+        with path.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(INVENTORY_COLUMNS)
+            writer.writerows(zip(*(table[name].tolist() for name in INVENTORY_COLUMNS)))
+    elif suffix == ".json":
+        columns = {name: table[name].tolist() for name in INVENTORY_COLUMNS}
+        path.write_text(json.dumps(columns), encoding="utf-8")
+    else:
+        raise SystemExit(f"Unsupported inventory format: {suffix} (use .parquet, .csv or .json)")
+
+
+def load_inventory(path: Path) -> dict:
+    """Read an inventory table written by ``write_inventory``."""
+    import numpy as np
+
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        data = pq.read_table(path)
+        table = {name: data.column(name).to_numpy() for name in INVENTORY_COLUMNS}
+    elif suffix == ".csv":
+        data = np.genfromtxt(path, delimiter=",", names=True)
+        table = {name: np.atleast_1d(data[name]) for name in INVENTORY_COLUMNS}
+    elif suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        table = {name: np.asarray(data[name], dtype=float) for name in INVENTORY_COLUMNS}
+    else:
+        raise ValueError(f"Unsupported inventory format: {suffix}")
+    table["solid_id"] = table["solid_id"].astype(np.int64)
+    return table
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="List the solids in the habitat STEP file.",
+    )
+    parser.add_argument(
+        "--step",
+        type=Path,
+        default=DEFAULT_STEP,
+        help="Path to the STEP file.",
+    )
+    parser.add_argument(
+        "--inventory",
+        type=Path,
+        help="Write a columnar inventory (.parquet, .csv or .json) instead of printing.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for inventory mode (default: CPU count).",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Always load the STEP locally, even if a geometry daemon is running.",
+    )
+    args = parser.parse_args()
+
+    if args.inventory is None:
+        analyze_solids(args.step, use_daemon=not args.no_daemon)
+        return 0
+
+    table = build_inventory(args.step, args.workers, use_daemon=not args.no_daemon)
+    write_inventory(table, args.inventory)
+    print(f"Wrote {len(table['solid_id'])} solids to {args.inventory}")
+    return 0
 
-    for i, solid in enumerate(solids):
-        bbox = solid.BoundingBox()
-        center = solid.Center()
-        volume = solid.Volume()
-        
-        c_str = f"({center.x:.2f}, {center.y:.2f}, {center.z:.2f})"
-        min_str = f"({bbox.xmin:.2f}, {bbox.ymin:.2f}, {bbox.zmin:.2f})"
-        max_str = f"({bbox.xmax:.2f}, {bbox.ymax:.2f}, {bbox.zmax:.2f})"
-        
-        print(f"{i:<4} | {volume:<15.2f} | {c_str:<30} | {min_str:<30} | {max_str:<30}")
 
 if __name__ == "__main__":
-    analyze_solids(DEFAULT_STEP)
+    sys.exit(main())
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""Search system-to-location assignments for lateral/longitudinal balance.
+
+Replaces the hand-compared scenarios in ``mass_balance_solver.py``: given a
+catalogue of movable masses (battery bank, water tanks, Alde, inverter) and
+candidate storage locations, find every assignment on the Pareto front of
+
+* lateral moment about the vehicle centreline (kg*m, + = passenger heavy)
+* longitudinal moment about the rear axle (kg*m, + = forward of the axle)
+
+with fixed masses (diesel, grey tank) included and every location's length
+budget respected.  Items assigned to a location are lined up along its long
+axis, each consuming its length plus a clearance gap on both ends, and must
+fit the location's cross-section upright (same clearance rule as
+``packing.py``).  Moments use
+the location centre.
+
+The search is a depth-first branch-and-bound: heaviest items first, partial
+moments bounded by the reachable range of the remaining items, nodes pruned
+when that bound is dominated by a front point, and identical items assigned
+in non-decreasing location order.  Objectives are compared on a
+``resolution`` grid (default 10 kg*m).  Larger catalogues (dozens of items)
+are solved as a sequence of MILPs instead (epsilon-constraint on the
+longitudinal moment, scipy/HiGHS), when scipy is installed.
+
+Positions use the solver frame: x from the rear wall interior, y lateral
+with the driver side negative.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Above this many movable items "auto" switches to the MILP sweep.
+EXACT_MAX_ITEMS = 8
+MILP_REL_GAP = 0.01
+MILP_TIME_LIMIT = 2.0  # seconds per front point
+
+
+@dataclass(frozen=True)
+class FixedMass:
+    """A mass that does not move (diesel, grey tank, ...)."""
+    name: str
+    mass: float  # kg
+    x: float  # mm from rear wall
+    y: float  # mm, driver side negative
+
+
+@dataclass(frozen=True)
+class MovableItem:
+    """A system that can go into any location it fits."""
+    name: str
+    mass: float  # kg
+    dims: Tuple[float, float, float]  # (length, width, height) mm
+    clearance: float = 0.0
+
+
+@dataclass(frozen=True)
+class Location:
+    """A candidate storage volume with its centre and usable size."""
+    name: str
+    x: float  # centre, mm from rear wall
+    y: float  # centre, mm lateral (driver negative)
+    length: float  # along the axis items are lined up on
+    width: float
+    height: float
+    axis: str = "x"  # "x" (along the vehicle) or "y" (across it)
+
+
+@dataclass
+class Catalogue:
+    fixed: List[FixedMass] = field(default_factory=list)
+    items: List[MovableItem] = field(default_factory=list)
+    locations: List[Location] = field(default_factory=list)
+    axle_x: float = field(default_factory=lambda: _model().habitat.rear_axle_x)
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """One Pareto-optimal solution."""
+    lateral_moment: float  # kg*m
+    longitudinal_moment: float  # kg*m about the axle
+    placement: Tuple[Tuple[str, str], ...]  # (item, location)
+
+    def by_location(self) -> Dict[str, List[str]]:
+        grouped: Dict[str, List[str]] = {}
+        for item, location in self.placement:
+            grouped.setdefault(location, []).append(item)
+        return grouped
+
+
+# =============================================================================
+# DEFAULT CATALOGUE (values from the existing solver scripts)
+# =============================================================================
+
+def _model():
+    from constraints import load_model  # noqa: PLC0415
+
+    return load_model()
+
+
+DEFAULT_LOCATIONS = (
+    "garage_driver_arm",
+    "garage_passenger_arm",
+    "garage_center",
+    "kitchen_base",
+    "driver_side_bench_base",
+)
+
+
+def cavity_locations(cavities, names: Sequence[str] = DEFAULT_LOCATIONS) -> List[Location]:
+    """Locations for the named constraint-model cavities (missing names skipped).
+
+    The garage centre opening's long axis runs across the vehicle.
+    """
+    by_name = {cavity.name: cavity for cavity in cavities}
+    locations = []
+    for name in names:
+        if name not in by_name:
+            continue
+        cavity = by_name[name]
+        length, width, height = cavity.dims
+        axis = "x"
+        if name == "garage_center":
+            length, width, axis = width, length, "y"
+        locations.append(Location(name, cavity.x, cavity.y, length, width, height, axis))
+    return locations
+
+
+def default_catalogue() -> Catalogue:
+    """Travel-mode catalogue from mass_balance_solver / detailed_fitment_model.
+
+    Location sizes and centres are the constraint model's cavities; the axle
+    position and the chassis tanks (at their travel fill) come from habitat.yml.  The passenger dinette bench is
+    left out: the kitchen occupies that wall section.  Water tank 2 is the
+    custom low-profile tank from detailed_fitment_model.py, which needs the
+    widened driver bench base.  Clearances are the solver scripts' own.
+    """
+    from battery_layout_solver import CLEARANCE as BATTERY_CLEARANCE  # noqa: PLC0415
+    from electrical_placement import INV_CLEARANCE  # noqa: PLC0415
+    from water_tank_solver import CLEARANCE as TANK_CLEARANCE  # noqa: PLC0415
+
+    model = _model()
+    axle = model.habitat.rear_axle_x
+    locations = cavity_locations(model.cavities)
+
+    return Catalogue(
+        fixed=[FixedMass(tank.name, tank.travel_mass, tank.x, tank.y) for tank in model.chassis_tanks],
+        items=[
+            MovableItem("battery_bank", 300.0, (540.0, 500.0, 660.0), BATTERY_CLEARANCE),
+            MovableItem("water_tank_1", 250.0, (900.0, 500.0, 560.0), TANK_CLEARANCE),
+            MovableItem("water_tank_2", 250.0, (1200.0, 550.0, 400.0)),
+            MovableItem("alde", 15.0, (500.0, 420.0, 300.0), 10.0),
+            MovableItem("inverter", 20.0, (400.0, 200.0, 500.0), INV_CLEARANCE),
+        ],
+        locations=locations,
+        axle_x=axle,
+    )
+
+
+def load_catalogue(path: Path) -> Catalogue:
+    """Read a catalogue YAML with ``fixed``, ``items`` and ``locations`` lists."""
+    import yaml  # noqa: PLC0415
+
+    with path.open("r", encoding="utf-8") as handle:
+        data = yaml.safe_load(handle) or {}
+    return Catalogue(
+        fixed=[FixedMass(**entry) for entry in data.get("fixed", [])],
+        items=[
+            MovableItem(
+                entry["name"], float(entry["mass"]), tuple(entry["dims"]),
+                float(entry.get("clearance", 0.0)),
+            )
+            for entry in data.get("items", [])
+        ],
+        locations=[Location(**entry) for entry in data.get("locations", [])],
+        axle_x=float(data["axle_x"]) if "axle_x" in data else _model().habitat.rear_axle_x,
+    )
+
+
+# =============================================================================
+# SEARCH
+# =============================================================================
+
+def item_length(item: MovableItem, location: Location) -> Optional[float]:
+    """Length ``item`` consumes in ``location`` (None if it cannot fit).
+
+    Upright orientations only.  Each item keeps its own clearance on every
+    side (``d + 2c``, as in packing.py), so items lined up along a location
+    are conservatively separated by both gaps.
+    """
+    c = item.clearance
+    best = None
+    l, w, h = item.dims
+    for along, across in ((l, w), (w, l)):
+        if across + 2 * c <= location.width and h + 2 * c <= location.height:
+            need = along + 2 * c
+            if need <= location.length and (best is None or need < best):
+                best = need
+    return best
+
+
+@dataclass
+class _Problem:
+    """Catalogue flattened into per-item options for the solvers."""
+    items: List[MovableItem]
+    locations: List[Location]
+    # Per item: (location index, length used, lateral kg*m, longitudinal kg*m)
+    options: List[List[Tuple[int, float, float, float]]]
+    budgets: List[float]  # usable length per location
+    base_lat: float
+    base_lon: float
+
+    def assignment(self, choice: Sequence[int]) -> Assignment:
+        lat = self.base_lat
+        lon = self.base_lon
+        placement = []
+        for k, i in enumerate(choice):
+            index, _, d_lat, d_lon = self.options[k][i]
+            lat += d_lat
+            lon += d_lon
+            placement.append((self.items[k].name, self.locations[index].name))
+        return Assignment(lat, lon, tuple(placement))
+
+
+def _prepare(catalogue: Catalogue) -> _Problem:
+    axle = catalogue.axle_x
+    items = sorted(catalogue.items, key=lambda it: (-it.mass, it.name))
+    locations = catalogue.locations
+    options: List[List[Tuple[int, float, float, float]]] = []
+    for item in items:
+        opts = []
+        for index, loc in enumerate(locations):
+            need = item_length(item, loc)
+            if need is not None:
+                opts.append((
+                    index, need,
+                    item.mass * loc.y / 1000.0,
+                    item.mass * (loc.x - axle) / 1000.0,
+                ))
+        if not opts:
+            raise ValueError(f"{item.name} fits no location")
+        options.append(opts)
+    return _Problem(
+        items,
+        locations,
+        options,
+        [loc.length for loc in locations],
+        sum(f.mass * f.y for f in catalogue.fixed) / 1000.0,
+        sum(f.mass * (f.x - axle) for f in catalogue.fixed) / 1000.0,
+    )
+
+
+def _branch_and_bound(problem: _Problem, resolution: float) -> List[Tuple[int, ...]]:
+    items = problem.items
+    options = problem.options
+    n = len(items)
+
+    # Reachable moment ranges of items[k:] (for the bound).
+    lat_lo = [0.0] * (n + 1)
+    lat_hi = [0.0] * (n + 1)
+    lon_lo = [0.0] * (n + 1)
+    lon_hi = [0.0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        lat_lo[k] = lat_lo[k + 1] + min(o[2] for o in options[k])
+        lat_hi[k] = lat_hi[k + 1] + max(o[2] for o in options[k])
+        lon_lo[k] = lon_lo[k + 1] + min(o[3] for o in options[k])
+        lon_hi[k] = lon_hi[k + 1] + max(o[3] for o in options[k])
+
+    def distance_to_zero(lo: float, hi: float) -> float:
+        if lo <= 0.0 <= hi:
+            return 0.0
+        return min(abs(lo), abs(hi))
+
+    def snap(value: float) -> float:
+        return round(value / resolution) * resolution
+
+    same_as_previous = [
+        k > 0 and (items[k].mass, items[k].dims, items[k].clearance)
+        == (items[k - 1].mass, items[k - 1].dims, items[k - 1].clearance)
+        for k in range(n)
+    ]
+
+    front: Dict[Tuple[float, float], Tuple[int, ...]] = {}
+
+    def dominated(lat: float, lon: float) -> bool:
+        return any(f_lat <= lat and f_lon <= lon for f_lat, f_lon in front)
+
+    def record(lat: float, lon: float, choice: Tuple[int, ...]) -> None:
+        key = (snap(abs(lat)), snap(abs(lon)))
+        if dominated(*key):
+            return
+        for other in [p for p in front if key[0] <= p[0] and key[1] <= p[1]]:
+            del front[other]
+        front[key] = choice
+
+    remaining = list(problem.budgets)
+    chosen: List[int] = []
+    choice_loc: List[int] = []
+
+    def search(k: int, lat: float, lon: float) -> None:
+        bound = (
+            snap(distance_to_zero(lat + lat_lo[k], lat + lat_hi[k])),
+            snap(distance_to_zero(lon + lon_lo[k], lon + lon_hi[k])),
+        )
+        if dominated(*bound) and (k < n or bound in front):
+            return
+        if k == n:
+            record(lat, lon, tuple(chosen))
+            return
+        opts = options[k]
+        # Try the option that pulls the moments towards zero first.
+        order = sorted(range(len(opts)), key=lambda i: abs(lat + opts[i][2]) + abs(lon + opts[i][3]))
+        for i in order:
+            index, need, d_lat, d_lon = opts[i]
+            if same_as_previous[k] and index < choice_loc[-1]:
+                continue
+            if remaining[index] - need < -1e-9:
+                continue
+            remaining[index] -= need
+            chosen.append(i)
+            choice_loc.append(index)
+            search(k + 1, lat + d_lat, lon + d_lon)
+            choice_loc.pop()
+            chosen.pop()
+            remaining[index] += need
+
+    search(0, problem.base_lat, problem.base_lon)
+    return list(front.values())
+
+
+def _epsilon_milp(problem: _Problem, resolution: float, time_limit: float) -> List[Tuple[int, ...]]:
+    """Epsilon-constraint sweep: min |lateral| s.t. |longitudinal| <= eps.
+
+    Each solve is one MILP (binary x per item/location option plus two
+    absolute-value auxiliaries); eps then tightens below the point just found
+    until the problem turns infeasible, which walks the whole front.
+    Balancing is subset-sum-like, so proving optimality can take long; each
+    solve stops at MILP_REL_GAP or ``time_limit`` seconds with its incumbent.
+    """
+    import numpy as np  # noqa: PLC0415
+    from scipy.optimize import Bounds, LinearConstraint, milp  # noqa: PLC0415
+
+    flat = [(k, i, opt) for k, opts in enumerate(problem.options) for i, opt in enumerate(opts)]
+    nx = len(flat)
+    t_lat, t_lon = nx, nx + 1
+    size = nx + 2
+
+    rows, lower, upper = [], [], []
+
+    def add(row, lo, hi):
+        rows.append(row)
+        lower.append(lo)
+        upper.append(hi)
+
+    for k in range(len(problem.items)):
+        row = np.zeros(size)
+        row[[j for j, (kk, _, _) in enumerate(flat) if kk == k]] = 1.0
+        add(row, 1.0, 1.0)
+    for index, budget in enumerate(problem.budgets):
+        row = np.zeros(size)
+        for j, (_, _, opt) in enumerate(flat):
+            if opt[0] == index:
+                row[j] = opt[1]
+        if row.any():
+            add(row, -np.inf, budget)
+    lat_row = np.array([opt[2] for _, _, opt in flat] + [0.0, 0.0])
+    lon_row = np.array([opt[3] for _, _, opt in flat] + [0.0, 0.0])
+    # |base + a.x| <= t  <=>  a.x - t <= -base  and  -a.x - t <= base
+    for coeffs, base, aux in ((lat_row, problem.base_lat, t_lat), (lon_row, problem.base_lon, t_lon)):
+        row = coeffs.copy()
+        row[aux] = -1.0
+        add(row, -np.inf, -base)
+        row = -coeffs
+        row[aux] = -1.0
+        add(row, -np.inf, base)
+
+    matrix = np.vstack(rows)
+    integrality = np.r_[np.ones(nx), 0.0, 0.0]
+    # Lexicographic: lateral first, longitudinal breaks ties.
+    cost = np.zeros(size)
+    cost[t_lat] = 1.0
+    cost[t_lon] = 1e-6
+
+    choices: List[Tuple[int, ...]] = []
+    eps = np.inf
+    while True:
+        bounds = Bounds(np.zeros(size), np.r_[np.ones(nx), np.inf, eps])
+        result = milp(cost, constraints=LinearConstraint(matrix, lower, upper),
+                      integrality=integrality, bounds=bounds,
+                      options={"mip_rel_gap": MILP_REL_GAP, "time_limit": time_limit})
+        if result.x is None:
+            break
+        picked = [None] * len(problem.items)
+        for j, (k, i, _) in enumerate(flat):
+            if result.x[j] > 0.5:
+                picked[k] = i
+        choices.append(tuple(picked))
+        lon = abs(problem.assignment(picked).longitudinal_moment)
+        eps = lon - resolution
+        if eps < 0:
+            break
+    return choices
+
+
+def optimize(
+    catalogue: Catalogue,
+    resolution: float = 10.0,
+    method: str = "auto",
+    time_limit: float = MILP_TIME_LIMIT,
+) -> List[Assignment]:
+    """Pareto front of (|lateral|, |longitudinal|) moments over all assignments.
+
+    ``method`` is ``"bnb"`` (exact, pure Python), ``"milp"`` (scipy's HiGHS,
+    scales to dozens of items) or ``"auto"`` (MILP when scipy is available
+    and the catalogue has more than EXACT_MAX_ITEMS items).
+    """
+    problem = _prepare(catalogue)
+    if method == "auto":
+        method = "bnb"
+        if len(problem.items) > EXACT_MAX_ITEMS:
+            try:
+                import scipy.optimize  # noqa: F401, PLC0415
+                method = "milp"
+            except ImportError:
+                pass
+    if method == "milp":
+        choices = _epsilon_milp(problem, resolution, time_limit)
+    else:
+        choices = _branch_and_bound(problem, resolution)
+    if not choices:
+        raise ValueError("no assignment satisfies the location length budgets")
+
+    front: List[Assignment] = []
+    for assignment in sorted(
+        (problem.assignment(choice) for choice in choices),
+        key=lambda a: (abs(a.lateral_moment), abs(a.longitudinal_moment)),
+    ):
+        # Keep the front clean of points dominated within the resolution.
+        if front and abs(assignment.longitudinal_moment) > abs(front[-1].longitudinal_moment) - resolution:
+            continue
+        front.append(assignment)
+    return front
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def format_assignment(assignment: Assignment) -> str:
+    lines = [
+        f"lateral {assignment.lateral_moment:+8.1f} kg*m  "
+        f"longitudinal {assignment.longitudinal_moment:+8.1f} kg*m"
+    ]
+    for location, names in sorted(assignment.by_location().items()):
+        lines.append(f"    {location}: {', '.join(names)}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Find Pareto-optimal placements of movable masses.",
+    )
+    parser.add_argument("--catalogue", type=Path,
+                        help="Catalogue YAML (fixed/items/locations); default uses the solver constants.")
+    parser.add_argument("--resolution", type=float, default=10.0,
+                        help="Objective resolution in kg*m for dominance checks.")
+    parser.add_argument("--method", choices=("auto", "bnb", "milp"), default="auto",
+                        help="Exact branch-and-bound, MILP sweep (needs scipy) or auto.")
+    parser.add_argument("--time-limit", type=float, default=MILP_TIME_LIMIT,
+                        help="MILP seconds per front point.")
+    args = parser.parse_args()
+
+    catalogue = load_catalogue(args.catalogue) if args.catalogue else default_catalogue()
+    print(f"{len(catalogue.items)} movable items, {len(catalogue.locations)} locations, "
+          f"axle at x={catalogue.axle_x:g} mm")
+    start = time.perf_counter()
+    try:
+        front = optimize(catalogue, args.resolution, args.method, args.time_limit)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 1
+    elapsed = (time.perf_counter() - start) * 1000.0
+    print(f"Pareto front: {len(front)} assignment(s) in {elapsed:.1f} ms\n")
+    for number, assignment in enumerate(front, 1):
+        print(f"[{number}] {format_assignment(assignment)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Balance envelope over every diesel / fresh / grey fill state.
+
+The hand checks in ``mass_balance_solver.py`` look at one or two states
+(full diesel with empty grey, 50% diesel).  This sweeps a dense grid of the
+three fill levels at once with NumPy broadcasting and reports, for one
+placement of the movable systems:
+
+* lateral moment about the centreline (kg*m, + = passenger heavy)
+* side delta, passenger minus driver mass (kg) -- the hand-calc metric
+* longitudinal moment about the rear axle (kg*m, + = forward)
+* with ``--wheelbase``, the load moved onto the front axle (kg)
+
+The worst-case envelope is printed with the fill state that produces each
+extreme, and a heatmap of the lateral moment over diesel x grey (worst
+fresh level per cell) is written as SVG.
+
+Positions use the solver frame of ``balance_optimizer.py``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_HEATMAP = REPO_ROOT / "renders" / "balance_heatmap.svg"
+
+AXES = ("diesel", "fresh", "grey")
+
+
+@dataclass(frozen=True)
+class Tank:
+    """A tank whose contents follow one fill axis."""
+    name: str
+    axis: str  # one of AXES
+    capacity_l: float
+    density: float  # kg/L
+    tare: float  # kg, empty tank
+    x: float  # mm from rear wall
+    y: float  # mm lateral, driver negative
+
+
+@dataclass(frozen=True)
+class PointMass:
+    name: str
+    mass: float
+    x: float
+    y: float
+
+
+@dataclass
+class SweepResult:
+    fills: Tuple[np.ndarray, np.ndarray, np.ndarray]  # 1-D fill fractions per axis
+    lateral: np.ndarray  # kg*m, shape (n_diesel, n_fresh, n_grey)
+    side_delta: np.ndarray  # kg
+    longitudinal: np.ndarray  # kg*m about the axle
+    front_axle: Optional[np.ndarray]  # kg moved to the front axle
+    elapsed_s: float
+
+    @property
+    def states(self) -> int:
+        return self.lateral.size
+
+    def extremes(self) -> Dict[str, Tuple[float, Tuple[float, float, float], float, Tuple[float, float, float]]]:
+        """Per metric: (min, fills at min, max, fills at max)."""
+        metrics = {
+            "lateral_kgm": self.lateral,
+            "side_delta_kg": self.side_delta,
+            "longitudinal_kgm": self.longitudinal,
+        }
+        if self.front_axle is not None:
+            metrics["front_axle_kg"] = self.front_axle
+        out = {}
+        for name, values in metrics.items():
+            lo = np.unravel_index(np.argmin(values), values.shape)
+            hi = np.unravel_index(np.argmax(values), values.shape)
+            out[name] = (
+                float(values[lo]), tuple(float(self.fills[a][lo[a]]) for a in range(3)),
+                float(values[hi]), tuple(float(self.fills[a][hi[a]]) for a in range(3)),
+            )
+        return out
+
+
+def default_placement() -> Tuple[List[Tank], List[PointMass], float]:
+    """Tanks and fixed systems for the best balance_optimizer assignment.
+
+    Diesel and grey are the constraint model's chassis tanks (habitat.yml).
+    The two 250 L fresh tanks drain together and sit wherever the optimizer's
+    lowest-lateral-moment assignment put water_tank_1 / water_tank_2.
+    """
+    from balance_optimizer import default_catalogue, optimize  # noqa: PLC0415
+    from constraints import load_model  # noqa: PLC0415
+
+    catalogue = default_catalogue()
+    best = optimize(catalogue)[0]
+    locations = {loc.name: loc for loc in catalogue.locations}
+    masses = {item.name: item.mass for item in catalogue.items}
+    axle = catalogue.axle_x
+
+    tanks = [
+        Tank(tank.name, tank.name, tank.capacity_l, tank.density, tank.tare, tank.x, tank.y)
+        for tank in load_model().chassis_tanks
+    ]
+    fixed = []
+    for item, location in best.placement:
+        loc = locations[location]
+        if item.startswith("water_tank"):
+            tanks.append(Tank(item, "fresh", masses[item], 1.0, 0.0, loc.x, loc.y))
+        else:
+            fixed.append(PointMass(item, masses[item], loc.x, loc.y))
+    return tanks, fixed, axle
+
+
+def sweep(
+    tanks: List[Tank],
+    fixed: List[PointMass],
+    axle_x: float,
+    steps: int = 101,
+    wheelbase: Optional[float] = None,
+) -> SweepResult:
+    """Evaluate every combination of ``steps`` fill levels per axis."""
+    start = time.perf_counter()
+    fills = tuple(np.linspace(0.0, 1.0, steps) for _ in AXES)
+
+    # Every metric is a sum of mass * lever; collapse tanks per axis into
+    # (mass per unit fill, lever sums) so the grid is just three outer sums.
+    base_mass_y = sum(p.mass * p.y for p in fixed) / 1000.0
+    base_side = sum(p.mass * np.sign(p.y) for p in fixed)
+    base_lon = sum(p.mass * (p.x - axle_x) for p in fixed) / 1000.0
+    per_axis = {axis: np.zeros(3) for axis in AXES}  # (lat, side, lon) per unit fill
+    for tank in tanks:
+        full = tank.capacity_l * tank.density
+        levers = np.array([tank.y / 1000.0, np.sign(tank.y), (tank.x - axle_x) / 1000.0])
+        per_axis[tank.axis] += full * levers
+        base_mass_y += tank.tare * levers[0]
+        base_side += tank.tare * levers[1]
+        base_lon += tank.tare * levers[2]
+
+    def grid(component: int, base: float) -> np.ndarray:
+        d = fills[0] * per_axis["diesel"][component]
+        f = fills[1] * per_axis["fresh"][component]
+        g = fills[2] * per_axis["grey"][component]
+        return base + d[:, None, None] + f[None, :, None] + g[None, None, :]
+
+    lateral = grid(0, base_mass_y)
+    side_delta = grid(1, base_side)
+    longitudinal = grid(2, base_lon)
+    front_axle = None
+    if wheelbase:
+        front_axle = longitudinal * 1000.0 / wheelbase
+    return SweepResult(fills, lateral, side_delta, longitudinal, front_axle,
+                       time.perf_counter() - start)
+
+
+# =============================================================================
+# HEATMAP
+# =============================================================================
+
+def _color(value: float, limit: float) -> str:
+    # Diverging blue (driver heavy) - white - red (passenger heavy).
+    t = max(-1.0, min(1.0, value / limit)) if limit else 0.0
+    if t < 0:
+        r = g = int(255 * (1 + t))
+        return f"rgb({r},{g},255)"
+    g = b = int(255 * (1 - t))
+    return f"rgb(255,{g},{b})"
+
+
+def heatmap_svg(result: SweepResult, cells: int = 50) -> str:
+    """Lateral moment over diesel (x) x grey (y), worst fresh level per cell."""
+    lateral = result.lateral
+    worst_idx = np.abs(lateral).argmax(axis=1)
+    worst = np.take_along_axis(lateral, worst_idx[:, None, :], axis=1)[:, 0, :]
+    pick_d = np.linspace(0, worst.shape[0] - 1, min(cells, worst.shape[0])).round().astype(int)
+    pick_g = np.linspace(0, worst.shape[1] - 1, min(cells, worst.shape[1])).round().astype(int)
+    grid = worst[np.ix_(pick_d, pick_g)]
+    limit = float(np.abs(grid).max()) or 1.0
+
+    size = 8
+    left, top = 60, 30
+    width = left + size * len(pick_d) + 20
+    height = top + size * len(pick_g) + 60
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="sans-serif" font-size="11">',
+        f'<text x="{left}" y="18">Lateral moment, kg*m (worst fresh level); '
+        f'blue = driver heavy, red = passenger heavy, |max| = {limit:.0f}</text>',
+    ]
+    for i in range(len(pick_d)):
+        for j in range(len(pick_g)):
+            value = grid[i, j]
+            x = left + i * size
+            y = top + (len(pick_g) - 1 - j) * size
+            parts.append(
+                f'<rect x="{x}" y="{y}" width="{size}" height="{size}" fill="{_color(value, limit)}">'
+                f'<title>diesel {result.fills[0][pick_d[i]]:.0%}, grey {result.fills[2][pick_g[j]]:.0%}: '
+                f'{value:+.0f} kg*m</title></rect>'
+            )
+    bottom = top + size * len(pick_g)
+    parts += [
+        f'<text x="{left}" y="{bottom + 16}">diesel 0%</text>',
+        f'<text x="{left + size * len(pick_d) - 60}" y="{bottom + 16}">diesel 100%</text>',
+        f'<text x="4" y="{bottom}">grey 0%</text>',
+        f'<text x="4" y="{top + 10}">grey 100%</text>',
+        "</svg>",
+    ]
+    return "\n".join(parts)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Sweep diesel/fresh/grey fill levels and report the balance envelope.",
+    )
+    parser.add_argument("--steps", type=int, default=101, help="Fill levels per axis (0-100%%).")
+    parser.add_argument("--axle-x", type=float, default=None,
+                        help="Rear axle, mm from rear wall (default: habitat.yml).")
+    parser.add_argument("--wheelbase", type=float, default=None,
+                        help="Wheelbase in mm, to report load moved onto the front axle.")
+    parser.add_argument("--claim-kg", type=float, default=100.0,
+                        help="Side-delta band to check (mass_balance_solver says +/-100 kg).")
+    parser.add_argument("--heatmap", type=Path, default=DEFAULT_HEATMAP, help="SVG heatmap output.")
+    parser.add_argument("--no-heatmap", action="store_true", help="Skip writing the heatmap.")
+    args = parser.parse_args()
+
+    tanks, fixed, axle_x = default_placement()
+    if args.axle_x is not None:
+        axle_x = args.axle_x
+    print("Placement:")
+    for tank in tanks:
+        print(f"  {tank.name:14s} {tank.axis:6s} tank  x={tank.x:6.0f} y={tank.y:+6.0f}")
+    for mass in fixed:
+        print(f"  {mass.name:14s} {mass.mass:6.0f} kg   x={mass.x:6.0f} y={mass.y:+6.0f}")
+
+    result = sweep(tanks, fixed, axle_x, args.steps, args.wheelbase)
+    rate = result.states / result.elapsed_s / 1e6 if result.elapsed_s else float("inf")
+    print(f"\n{result.states:,} states in {result.elapsed_s * 1000:.1f} ms ({rate:.1f} M states/s)")
+    print("\nEnvelope (fills as diesel/fresh/grey):")
+    for name, (lo, lo_at, hi, hi_at) in result.extremes().items():
+        lo_s = "/".join(f"{f:.0%}" for f in lo_at)
+        hi_s = "/".join(f"{f:.0%}" for f in hi_at)
+        print(f"  {name:17s} min {lo:+8.1f} at {lo_s:13s} max {hi:+8.1f} at {hi_s}")
+
+    inside = float(np.mean(np.abs(result.side_delta) <= args.claim_kg))
+    print(f"\nSide delta within +/-{args.claim_kg:.0f} kg in {inside:.1%} of states")
+
+    if not args.no_heatmap:
+        args.heatmap.parent.mkdir(parents=True, exist_ok=True)
+        args.heatmap.write_text(heatmap_svg(result), encoding="utf-8")
+        print(f"\nHeatmap: {args.heatmap}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,4 @@
 
-import cadquery as cq
-
 # --- Parameters ---
 BATTERY_L = 540.0
 BATTERY_W = 250.0
@@ -22,6 +20,8 @@ MOD_FULL_H = BATTERY_H + 2 * CLEARANCE
 
 def create_battery_module():
     """Create a single battery module solid."""
+    import cadquery as cq  # noqa: PLC0415
+
     return cq.Workplane("XY").box(BATTERY_L, BATTERY_W, BATTERY_H)
 
 def create_layout_single_row():
@@ -39,18 +39,37 @@ def create_layout_single_row():
     return None
 
 def solve_layout():
-    results = []
-
-    # Attempt 1: 3x2 Stack (3 on floor, 3 on top)
-    # Fits in driver arm?
-    # Driver Arm Volume: Width=473mm internal.
-    # Battery Width=250mm + 50mm clearance = 300mm. Fits!
-    # Battery Length=540mm + 50mm clearance = 590mm.
-    # Arm Depth is 509mm. 590mm > 509mm. FAILS DEPTH.
-    
-    # Check orientation rotated 90 degrees?
-    # Length=540mm along Width (473mm available). FAILS.
-    
-    return "FAIL: Modules (540mm) do not fit in current Garage Shell Arm depth (509mm)."
+    """Pack MODULE_COUNT modules into every zone cavity with the packing engine."""
+    from packing import Item, grid_arrangements, load_containers, pack
+
+    item = Item("battery", (BATTERY_L, BATTERY_W, BATTERY_H), CLEARANCE, "upright")
+    results = [
+        f"{MODULE_COUNT}x {BATTERY_L:g}x{BATTERY_W:g}x{BATTERY_H:g} modules, "
+        f"{CLEARANCE:g}mm clearance, stack <= {MAX_STACK_HEIGHT:g}mm"
+    ]
+    for container in load_containers().values():
+        result = pack(item, container, MODULE_COUNT)
+        # Stack height counts the modules only; extents also hold the
+        # (layers + 1) clearance gaps.
+        grids = [
+            g for g in grid_arrangements(item, container, MODULE_COUNT)
+            if g.counts[2] * g.orientation[2] <= MAX_STACK_HEIGHT
+        ]
+        if not result.fits:
+            results.append(
+                f"FAIL: {container.name} holds {len(result.placements)} of {MODULE_COUNT} modules."
+            )
+            continue
+        if not grids:
+            results.append(f"FAIL: {container.name} only fits with a stack above {MAX_STACK_HEIGHT:g}mm.")
+            continue
+        best = grids[0]
+        results.append(
+            f"FITS: {container.name} as {best.counts[0]}x{best.counts[1]}x{best.counts[2]} "
+            f"block, {best.extents[0]:g}x{best.extents[1]:g}x{best.extents[2]:g}mm "
+            f"({len(grids)} arrangements)."
+        )
+    return "\n".join(results)
 
-print(solve_layout())
+if __name__ == "__main__":
+    print(solve_layout())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""Build the whole interior from the ``cad.modules`` registry.
+
+Every registered module is generated in a process pool.  Workers send their
+geometry back as BREP bytes, together with the part's mesh, so tessellation
+also runs in parallel.  The parent names and colours the parts and writes
+three files in one pass:
+
+    assembly.step   -- the assembly with part names and colours, streamed by
+                       cad/modules/step_writer.py (identical modules stored
+                       once); ``--step-mode xcaf`` writes it from the
+                       cq.Assembly instead
+    assembly.glb    -- one node per part, built from the worker meshes;
+                       ``HabitatModule.instances()`` become GPU instances
+    assembly.stl    -- every part mesh concatenated, instances baked
+
+Modules whose source file is missing from ``cad/modules/`` are reported
+and skipped.  A generation that fails does not stop the others.  Worker
+geometry goes through ``GEOMETRY_MEMO``, so with ``--geometry-cache`` set
+an unchanged module is read back from disk instead of being rebuilt.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_OUTPUT_DIR = REPO_ROOT / "renders" / "assembly"
+DEFAULT_GEOMETRY_CACHE = REPO_ROOT / "tmp" / "geometry_cache"
+ASSEMBLY_NAME = "gimli2_interior"
+
+# Used for modules that do not set HabitatModule.COLOR.
+PALETTE = (
+    0x4E79A7, 0xF28E2B, 0xE15759, 0x76B7B2, 0x59A14F, 0xEDC948, 0xB07AA1,
+    0xFF9DA7, 0x9C755F, 0xBAB0AC, 0x86BCB6, 0xD37295, 0xA0CBE8, 0xFFBE7D,
+    0x8CD17D,
+)
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+@dataclass(frozen=True)
+class Part:
+    """One shape of a module: its own geometry or an ``Instances`` prototype.
+
+    ``matrices`` holds the 4x4 placements of an instanced part; empty means
+    a single copy where it stands.
+    """
+
+    name: str
+    brep: bytes
+    single: bool
+    vertices: np.ndarray
+    triangles: np.ndarray
+    color: Optional[int] = None
+    matrices: tuple = ()
+
+    @property
+    def copies(self) -> int:
+        return len(self.matrices) or 1
+
+
+@dataclass(frozen=True)
+class ModuleResult:
+    """One generated module as sent back by a worker."""
+
+    name: str
+    parts: Tuple[Part, ...] = ()
+    color: Optional[int] = None
+    seconds: float = 0.0
+    error: str = ""
+
+
+# =============================================================================
+# GENERATION
+# =============================================================================
+
+def resolve_modules(names: Optional[Sequence[str]] = None) -> Tuple[List[str], List[str]]:
+    """Split registry names into (available, missing source file)."""
+    from cad.modules import MODULE_DIR, MODULES  # noqa: PLC0415
+
+    names = list(names) if names else list(MODULES)
+    unknown = [name for name in names if name not in MODULES]
+    if unknown:
+        raise ValueError(f"Unknown module(s): {', '.join(unknown)}")
+    available, missing = [], []
+    for name in names:
+        module_path = MODULES[name].rsplit(".", 1)[0]
+        source = MODULE_DIR / (module_path.replace(".", "/") + ".py")
+        (available if source.exists() else missing).append(name)
+    return available, missing
+
+
+def _generate(name: str, params: Optional[dict] = None) -> ModuleResult:
+    """Worker: generate, serialize and tessellate one module.
+
+    Each ``Instances`` prototype is serialized and meshed once, whatever its
+    number of copies.  ``seconds`` excludes the worker's first cadquery import.
+    """
+    start = time.perf_counter()
+    try:
+        import cadquery as cq  # noqa: PLC0415
+        from cad.modules import get_module  # noqa: PLC0415
+        from cad.modules.common import workplane_to_brep  # noqa: PLC0415
+        from mesh_cache import cached_tessellate  # noqa: PLC0415
+
+        start = time.perf_counter()
+        module = get_module(name)(params or {})
+        parts = []
+        if module.geometry.vals():
+            mesh = cached_tessellate(module.geometry)
+            parts.append(Part(name, *workplane_to_brep(module.geometry), mesh.vertices, mesh.triangles))
+        for group in module.instances():
+            mesh = cached_tessellate(group.prototype)
+            brep, single = workplane_to_brep(cq.Workplane("XY").newObject([group.prototype]))
+            parts.append(Part(
+                f"{name}/{group.name}", brep, single, mesh.vertices, mesh.triangles, group.color, group.matrices(),
+            ))
+    except Exception as exc:  # noqa: BLE001 - reported per module
+        return ModuleResult(name, seconds=time.perf_counter() - start, error=f"{type(exc).__name__}: {exc}")
+    return ModuleResult(name, tuple(parts), module.COLOR, time.perf_counter() - start)
+
+
+def generate_modules(
+    names: Sequence[str],
+    params: Optional[Dict[str, dict]] = None,
+    workers: Optional[int] = None,
+) -> List[ModuleResult]:
+    """Generate ``names`` concurrently; results come back in registry order.
+
+    ``workers`` defaults to the CPU count.  With one worker (or one module)
+    everything runs in this process, which avoids the pool start-up cost.
+    """
+    params = params or {}
+    workers = min(workers or os.cpu_count() or 1, len(names)) or 1
+    if workers == 1:
+        return [_generate(name, params.get(name)) for name in names]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_generate, name, params.get(name)) for name in names]
+        return [future.result() for future in futures]
+
+
+# =============================================================================
+# ASSEMBLY AND EXPORT
+# =============================================================================
+
+def _rgb(color: int) -> Tuple[float, float, float]:
+    return ((color >> 16) & 0xFF) / 255.0, ((color >> 8) & 0xFF) / 255.0, (color & 0xFF) / 255.0
+
+
+def part_colors(results: Sequence[ModuleResult]) -> Dict[str, int]:
+    """Colour of every part: its own, its module's, or a palette entry picked
+    by the module's registry position."""
+    from cad.modules import MODULES  # noqa: PLC0415
+
+    order = list(MODULES)
+    colors = {}
+    for r in results:
+        module_color = r.color if r.color is not None else PALETTE[order.index(r.name) % len(PALETTE)]
+        for part in r.parts:
+            colors[part.name] = part.color if part.color is not None else module_color
+    return colors
+
+
+def _parts(results: Sequence[ModuleResult]) -> List[Part]:
+    return [part for r in results for part in r.parts]
+
+
+def build_assembly(results: Sequence[ModuleResult], colors: Dict[str, int]):
+    """Combine generated modules into one named, coloured ``cq.Assembly``.
+
+    Copies of an instanced part are added with the same workplane object,
+    so the STEP export shares one product between them.
+    """
+    import cadquery as cq  # noqa: PLC0415
+
+    from cad.modules.common import matrix_location, workplane_from_brep  # noqa: PLC0415
+
+    assembly = cq.Assembly(name=ASSEMBLY_NAME)
+    for part in _parts(results):
+        shape = workplane_from_brep(part.brep, part.single)
+        color = cq.Color(*_rgb(colors[part.name]))
+        if not part.matrices:
+            assembly.add(shape, name=part.name, color=color)
+        for i, matrix in enumerate(part.matrices):
+            assembly.add(shape, name=f"{part.name}_{i + 1}", loc=matrix_location(matrix), color=color)
+    return assembly
+
+
+def combined_mesh(results: Sequence[ModuleResult]):
+    """Concatenate the worker meshes, instanced parts baked, into one ``MeshBuffers``."""
+    from mesh_export import MeshBuffers, bake_instances  # noqa: PLC0415
+
+    vertices, triangles, offset = [], [], 0
+    for part in _parts(results):
+        mesh = bake_instances(MeshBuffers(part.vertices, part.triangles), part.matrices)
+        vertices.append(mesh.vertices)
+        triangles.append(mesh.triangles + np.uint32(offset))
+        offset += len(mesh.vertices)
+    if not vertices:
+        return MeshBuffers(np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.uint32))
+    return MeshBuffers(np.concatenate(vertices), np.concatenate(triangles))
+
+
+def stream_step(results: Sequence[ModuleResult], colors: Dict[str, int], path: Path) -> None:
+    """Write the STEP through ``StepStreamWriter``, one part in memory at a time.
+
+    An instanced part is written once and placed as a STEP instance per copy.
+    """
+    from cad.modules.common import export_step_assembly, matrix_location, workplane_from_brep  # noqa: PLC0415
+    from cad.modules.step_writer import Component  # noqa: PLC0415
+
+    def components():
+        for part in _parts(results):
+            shape = workplane_from_brep(part.brep, part.single)
+            if not part.matrices:
+                yield Component(part.name, shape, color=colors[part.name])
+            for i, matrix in enumerate(part.matrices):
+                yield Component(
+                    f"{part.name}_{i + 1}", shape, matrix_location(matrix), colors[part.name], part=part.name,
+                )
+
+    export_step_assembly(components(), str(path), ASSEMBLY_NAME)
+
+
+def export_all(results: Sequence[ModuleResult], output_dir: Path, step_mode: str = "stream") -> Dict[str, Path]:
+    """Write STEP, GLB and STL for the successful ``results``."""
+    from mesh_export import GlbNode, MeshBuffers, build_glb  # noqa: PLC0415
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    colors = part_colors(results)
+    paths = {fmt: output_dir / f"assembly.{fmt}" for fmt in ("step", "glb", "stl")}
+
+    if step_mode == "stream":
+        stream_step(results, colors, paths["step"])
+    else:
+        build_assembly(results, colors).export(str(paths["step"]), exportType="STEP")
+    nodes = [
+        GlbNode(part.name, MeshBuffers(part.vertices, part.triangles), colors[part.name], instances=part.matrices)
+        for part in _parts(results)
+    ]
+    paths["glb"].write_bytes(build_glb(nodes))
+    combined_mesh(results).write_stl(paths["stl"])
+    return paths
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate every registered module and export the assembly.")
+    parser.add_argument("--modules", nargs="+", default=None, help="Registry names (default: all).")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT_DIR, help="Output directory.")
+    parser.add_argument(
+        "--geometry-cache", default=str(DEFAULT_GEOMETRY_CACHE),
+        help="Disk layer for GEOMETRY_MEMO shared by the workers ('' disables).",
+    )
+    parser.add_argument(
+        "--step-mode", choices=("stream", "xcaf"), default="stream",
+        help="stream: incremental writer with shared parts; xcaf: cq.Assembly.export.",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        available, missing = resolve_modules(args.modules)
+    except ValueError as exc:
+        parser.error(str(exc))
+    for name in missing:
+        print(f"  skip  {name:20s} source file missing")
+    if not available:
+        print("No module sources to build.")
+        return 1
+
+    # Read by cad.modules.common at import time, i.e. inside each worker.
+    if args.geometry_cache:
+        os.environ.setdefault("GIMLI2_GEOMETRY_CACHE", args.geometry_cache)
+
+    start = time.perf_counter()
+    results = generate_modules(available, workers=args.workers)
+    generated = time.perf_counter() - start
+    ok = [r for r in results if not r.error]
+    for r in results:
+        if r.error:
+            print(f"  FAIL  {r.name:20s} {r.error}")
+        else:
+            unique = sum(len(part.triangles) for part in r.parts)
+            copies = sum(part.copies for part in r.parts)
+            print(f"  ok    {r.name:20s} {r.seconds:7.2f}s  {unique:8d} unique triangles, {copies} placed parts")
+    print(f"Generated {len(ok)}/{len(results)} modules in {generated:.2f}s")
+    if not ok:
+        return 1
+
+    start = time.perf_counter()
+    paths = export_all(ok, args.output, args.step_mode)
+    print(f"Exported in {time.perf_counter() - start:.2f}s:")
+    for path in paths.values():
+        print(f"  {path}")
+    return 1 if len(ok) < len(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
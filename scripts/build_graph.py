@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Incremental build of the derived CAD artifacts.
+
+Every artifact that is derived from the STEP file, the YAMLs and the scripts
+is a node: the shell BREP cache, the planar face table, the opening match
+(``tmp/step_openings.yaml`` and ``openings_analysis.txt``), the solid
+listing (``solids_analysis.txt``), the shell tessellations, both viewers and
+the geometry of every registered module whose source exists.
+
+A node's key hashes its command, the contents of its input files (the script
+plus every local module it imports, found by walking the imports) and the
+outputs of the nodes it depends on.  The keys and output hashes of the last
+successful run are kept in ``tmp/build_graph.json``; a node is rebuilt only
+when its key changed or its outputs were removed or edited.  Because
+dependents hash their dependencies' outputs rather than keys, a rebuild that
+reproduces the same output stops there.  Ready nodes run as parallel
+subprocesses (``--jobs``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+DEFAULT_STEP = REPO_ROOT / "reference" / "Osterath_Habitat_1225 AF.step"
+DEFAULT_HABITAT = REPO_ROOT / "habitat.yml"
+DEFAULT_STATE = REPO_ROOT / "tmp" / "build_graph.json"
+FACE_TABLE = REPO_ROOT / "tmp" / "face_table.npz"
+GEOMETRY_CACHE = REPO_ROOT / "tmp" / "geometry_cache"
+OPENING_TOLERANCE = 3.0  # mm, as run_step_openings.sh
+
+# Bump when the key recipe changes.
+STATE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    command: Tuple[str, ...]  # arguments after the Python interpreter
+    inputs: Tuple[Path, ...] = ()  # data files and scripts; local imports of scripts are added
+    deps: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()  # paths or globs relative to REPO_ROOT
+    stdout: Tuple[str, ...] = ()  # files that receive the command's standard output
+    env: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass
+class BuildResult:
+    built: List[str] = field(default_factory=list)
+    fresh: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)  # a dependency failed
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+
+# =============================================================================
+# GRAPH
+# =============================================================================
+
+def _rel(path: Path) -> str:
+    return str(Path(path).resolve().relative_to(REPO_ROOT))
+
+
+def module_sources() -> Dict[str, Path]:
+    """Registered cad.modules entries whose source file exists."""
+    from cad.modules import MODULE_DIR, MODULES  # noqa: PLC0415
+
+    sources = {}
+    for name, target in MODULES.items():
+        path = MODULE_DIR / f"{target.rsplit('.', 1)[0]}.py"
+        if path.exists():
+            sources[name] = path
+    return sources
+
+
+def default_graph(step: Path = DEFAULT_STEP, habitat: Path = DEFAULT_HABITAT) -> Dict[str, Node]:
+    step, habitat = _rel(step), _rel(habitat)
+    face_table = _rel(FACE_TABLE)
+    script = lambda name: REPO_ROOT / "scripts" / f"{name}.py"  # noqa: E731
+    nodes = [
+        Node("shell_cache", ("scripts/shell_cache.py", "--step", step),
+             (REPO_ROOT / step, script("shell_cache")),
+             outputs=(str(Path(step).with_name(f"{Path(step).stem}.*.brep")),)),
+        Node("face_table", ("scripts/extract_step_openings.py", "--step", step, "--write-face-table", face_table),
+             (REPO_ROOT / step, script("extract_step_openings")), ("shell_cache",), (face_table,)),
+        Node("step_openings",
+             ("scripts/extract_step_openings.py", "--habitat", habitat,
+              "--tolerance", str(OPENING_TOLERANCE), "--face-table", face_table,
+              "--output", "tmp/step_openings.yaml"),
+             (REPO_ROOT / habitat, script("extract_step_openings")), ("face_table",),
+             ("tmp/step_openings.yaml",), stdout=("openings_analysis.txt",)),
+        Node("solids_analysis", ("scripts/analyze_step_solids.py", "--step", step),
+             (REPO_ROOT / step, script("analyze_step_solids")), ("shell_cache",),
+             stdout=("solids_analysis.txt",)),
+        Node("shell_meshes", ("scripts/mesh_cache.py", "--warm", step),
+             (REPO_ROOT / step, script("mesh_cache")), ("shell_cache",)),
+        Node("habitat_viewer", ("scripts/visualize_habitat.py", "--step", step, "--habitat", habitat),
+             (REPO_ROOT / step, REPO_ROOT / habitat, script("visualize_habitat")), ("shell_meshes",),
+             ("renders/habitat_viewer.html",)),
+        Node("systems_viewer", ("scripts/generate_systems_cad.py",),
+             (REPO_ROOT / step, script("generate_systems_cad")), ("shell_meshes",),
+             ("renders/systems_viewer.html",)),
+    ]
+    cache_env = (("GIMLI2_GEOMETRY_CACHE", str(GEOMETRY_CACHE)),)
+    for name, source in module_sources().items():
+        nodes.append(Node(f"module:{name}", ("scripts/build_graph.py", "--generate-module", name),
+                          (source, REPO_ROOT / "cad" / "modules" / "common.py"), env=cache_env))
+    return {node.name: node for node in nodes}
+
+
+def _import_targets(path: Path) -> Set[Path]:
+    """Repo files imported anywhere in ``path`` (including lazy imports)."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    found = set()
+    for name in names:
+        for candidate in (SCRIPTS_DIR / f"{name}.py", REPO_ROOT / Path(*name.split(".")).with_suffix(".py")):
+            if candidate.exists():
+                found.add(candidate.resolve())
+    return found
+
+
+def code_closure(paths: Iterable[Path]) -> List[Path]:
+    """``paths`` plus every repo module they import, transitively."""
+    seen: Set[Path] = set()
+    stack = [Path(p).resolve() for p in paths]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if path.suffix == ".py":
+            stack.extend(_import_targets(path) - seen)
+    return sorted(seen)
+
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_digest(node: Node) -> Optional[str]:
+    """Hash of every output of ``node``; None if one is missing."""
+    paths = []
+    for pattern in node.outputs + node.stdout:
+        matched = sorted(REPO_ROOT.glob(pattern)) if any(c in pattern for c in "*?[") else [REPO_ROOT / pattern]
+        if not matched or not all(p.exists() for p in matched):
+            return None
+        paths.extend(matched)
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f"{_rel(path)}={file_digest(path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def node_key(node: Node, dep_outputs: Dict[str, str]) -> str:
+    inputs = {_rel(path): file_digest(path) for path in code_closure(node.inputs) if path.exists()}
+    payload = {
+        "version": STATE_VERSION,
+        "command": node.command,
+        "env": node.env,
+        "stdout": node.stdout,
+        "inputs": inputs,
+        "deps": {dep: dep_outputs[dep] for dep in node.deps},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def _closure(graph: Dict[str, Node], targets: Sequence[str]) -> List[str]:
+    """``targets`` and their dependencies, dependencies first."""
+    order: List[str] = []
+
+    def visit(name: str, trail: Tuple[str, ...]) -> None:
+        if name in order:
+            return
+        if name in trail:
+            raise ValueError(f"Dependency cycle: {' -> '.join(trail + (name,))}")
+        if name not in graph:
+            raise KeyError(name)
+        for dep in graph[name].deps:
+            visit(dep, trail + (name,))
+        order.append(name)
+
+    for target in targets:
+        visit(target, ())
+    return order
+
+
+def _run(node: Node) -> Tuple[float, str]:
+    """Run ``node``'s command; returns (seconds, error message or "")."""
+    start = time.perf_counter()
+    env = dict(os.environ, **dict(node.env))
+    proc = subprocess.run(
+        [sys.executable, *node.command], cwd=REPO_ROOT, env=env,
+        stdout=subprocess.PIPE if node.stdout else subprocess.DEVNULL,
+        stderr=subprocess.PIPE, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        lines = (proc.stderr or "").strip().splitlines()
+        return elapsed, lines[-1] if lines else f"exit status {proc.returncode}"
+    for target in node.stdout:
+        path = REPO_ROOT / target
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(proc.stdout, encoding="utf-8")
+        tmp.replace(path)
+    return elapsed, ""
+
+
+def load_state(path: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data.get("nodes", {}) if data.get("version") == STATE_VERSION else {}
+
+
+def save_state(path: Path, nodes: Dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": STATE_VERSION, "nodes": nodes}, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+
+def build(
+    graph: Dict[str, Node],
+    targets: Optional[Sequence[str]] = None,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    state_path: Path = DEFAULT_STATE,
+    dry_run: bool = False,
+    log=print,
+) -> BuildResult:
+    """Bring ``targets`` (default: every node) up to date."""
+    order = _closure(graph, targets or list(graph))
+    state = load_state(state_path)
+    result = BuildResult()
+    outputs: Dict[str, str] = {}  # node -> output digest (or key when it has no outputs)
+    pending = set(order)
+    running = {}
+    jobs = max(1, jobs or os.cpu_count() or 1)
+
+    def ready(name: str) -> bool:
+        return all(dep in outputs for dep in graph[name].deps)
+
+    def blocked(name: str) -> bool:
+        return any(dep in result.failed or dep in result.skipped for dep in graph[name].deps)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in [n for n in order if n in pending]:
+                if blocked(name):
+                    pending.discard(name)
+                    result.skipped.append(name)
+                    log(f"  skip   {name} (dependency failed)")
+                    continue
+                if not ready(name) or len(running) >= jobs:
+                    continue
+                node = graph[name]
+                key = node_key(node, outputs)
+                current = output_digest(node) if node.outputs or node.stdout else key
+                recorded = state.get(name, {})
+                pending.discard(name)
+                if not force and current is not None and recorded.get("key") == key \
+                        and recorded.get("outputs") == current:
+                    outputs[name] = current
+                    result.fresh.append(name)
+                    continue
+                if dry_run:
+                    log(f"  stale  {name}")
+                    result.built.append(name)
+                    outputs[name] = f"stale:{key}"
+                    continue
+                log(f"  build  {name}")
+                running[pool.submit(_run, node)] = (name, key)
+            if not running:
+                if pending and not any(ready(n) or blocked(n) for n in pending):
+                    raise RuntimeError(f"Unschedulable nodes: {sorted(pending)}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                node = graph[name]
+                elapsed, error = future.result()
+                result.seconds[name] = elapsed
+                current = output_digest(node) if node.outputs or node.stdout else key
+                if not error and current is None:
+                    error = "command succeeded but an output is missing"
+                if error:
+                    result.failed[name] = error
+                    state.pop(name, None)
+                    log(f"  FAIL   {name} after {elapsed:.1f}s: {error}")
+                    continue
+                outputs[name] = current
+                state[name] = {"key": key, "outputs": current}
+                result.built.append(name)
+                log(f"  done   {name} in {elapsed:.1f}s")
+                if not dry_run:
+                    save_state(state_path, state)
+    return result
+
+
+def generate_module(name: str) -> int:
+    """Generate one registered module through GEOMETRY_MEMO (disk layer)."""
+    from cad.modules import get_module  # noqa: PLC0415
+
+    geometry = get_module(name)().geometry
+    print(f"{name}: {len(geometry.vals())} shapes")
+    return 0
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild stale CAD artifacts, in parallel.")
+    parser.add_argument("targets", nargs="*", help="Nodes to bring up to date (default: all).")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Parallel nodes (default: CPU count).")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if up to date.")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Only list the stale nodes.")
+    parser.add_argument("--list", action="store_true", help="Show the graph and exit.")
+    parser.add_argument("--generate-module", metavar="NAME", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate_module:
+        return generate_module(args.generate_module)
+
+    graph = default_graph()
+    if args.list:
+        for node in graph.values():
+            deps = f" <- {', '.join(node.deps)}" if node.deps else ""
+            print(f"{node.name}{deps}")
+            for path in node.outputs + node.stdout:
+                print(f"    {path}")
+        return 0
+
+    try:
+        result = build(graph, args.targets, args.jobs, args.force, dry_run=args.dry_run)
+    except KeyError as exc:
+        print(f"Error: unknown node {exc} (see --list)")
+        return 1
+    verb = "stale" if args.dry_run else "built"
+    print(f"{len(result.built)} {verb}, {len(result.fresh)} up to date, "
+          f"{len(result.failed)} failed, {len(result.skipped)} skipped")
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""Signed-distance clearance field of the habitat interior.
+
+Clearance rules (``wall_clearance_min``, 25 mm around batteries, 100 mm
+inverter airflow) are otherwise checked by hand or with one OCCT distance
+call per candidate.  This voxelises the interior once:
+
+1. the shell is tessellated (through ``mesh_cache``) and every voxel its
+   triangles pass through is blocked
+2. free space is the connected region around the cabin centre, clipped to
+   the habitat.yml interior box so window and door cut-outs do not leak
+   outside
+3. a Euclidean distance transform gives every free voxel its distance to the
+   nearest blocked one (or box face), and every other voxel its depth as a
+   negative value
+
+The float32 grid is stored as ``.npy`` with a JSON sidecar under
+``tmp/clearance_field/``, keyed by the STEP content hash, voxel size and
+interior dimensions, and memory-mapped on load.  Points are then answered by
+trilinear lookup and boxes by a minimum over the voxels around them, read
+from window minima built on the first box query (eight float32 copies of
+the grid); both are exact for walls on the voxel lattice and within about a
+voxel otherwise.  Set ``GIMLI2_CLEARANCE_FIELD`` to relocate the
+cache directory.
+
+Everything is in the solver frame: x from the rear wall, y lateral (driver
+negative), z up from the floor.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = REPO_ROOT / "tmp" / "clearance_field"
+CACHE_ENV = "GIMLI2_CLEARANCE_FIELD"
+DEFAULT_VOXEL = 20.0  # mm
+
+# Solver frame <-> STEP frame (cad/modules/common.py HABITAT).
+STEP_FLOOR_Y = 288.0
+STEP_REAR_Z = 5680.0
+
+# Window of the pooled minima behind box queries, voxels per axis.
+POOL = 8
+
+# Bump when the build or the stored layout changes.
+FORMAT_VERSION = 1
+
+
+@dataclass
+class ClearanceField:
+    values: np.ndarray  # (nx, ny, nz) float32 signed distance at voxel centres, mm
+    origin: np.ndarray  # solver-frame centre of voxel (0, 0, 0): the interior corner, mm
+    voxel: float  # mm
+    interior: np.ndarray  # (length, width, height) of the interior box, mm
+    path: Optional[Path] = None
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def _box_distance(self, points: np.ndarray) -> np.ndarray:
+        """Signed distance to the interior box faces (negative outside)."""
+        length, width, height = self.interior
+        lo = np.array([0.0, -width / 2, 0.0])
+        hi = np.array([length, width / 2, height])
+        return np.minimum(points - lo, hi - points).min(axis=-1)
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        """Signed clearance of (..., 3) solver-frame points, trilinear."""
+        points = np.asarray(points, dtype=float)
+        grid = (points - self.origin) / self.voxel
+        upper = np.array(self.values.shape) - 1
+        grid = np.clip(grid, 0.0, upper)
+        base = np.minimum(np.floor(grid).astype(np.intp), np.maximum(upper - 1, 0))
+        frac = grid - base
+        i, j, k = base[..., 0], base[..., 1], base[..., 2]
+        fx, fy, fz = frac[..., 0], frac[..., 1], frac[..., 2]
+        v = self.values
+        c00 = v[i, j, k] * (1 - fx) + v[i + 1, j, k] * fx
+        c10 = v[i, j + 1, k] * (1 - fx) + v[i + 1, j + 1, k] * fx
+        c01 = v[i, j, k + 1] * (1 - fx) + v[i + 1, j, k + 1] * fx
+        c11 = v[i, j + 1, k + 1] * (1 - fx) + v[i + 1, j + 1, k + 1] * fx
+        value = (c00 * (1 - fy) + c10 * fy) * (1 - fz) + (c01 * (1 - fy) + c11 * fy) * fz
+        return np.minimum(value, self._box_distance(points))
+
+    @cached_property
+    def _pooled(self) -> np.ndarray:
+        """(nx, ny, nz, 8) window minima of ``values``.
+
+        ``_pooled[i, j, k, 4 * bx + 2 * by + bz]`` is the minimum over
+        ``POOL`` voxels from (i, j, k) along each axis whose bit is set, and
+        over that one voxel along the others.  The eight tables sit side by
+        side so that one box query touches few cache lines.
+        """
+        pooled = np.empty(self.values.shape + (8,), dtype=np.float32)
+        pooled[..., 0] = self.values
+        for code in range(1, 8):
+            low = code & -code
+            pooled[..., code] = _window_min(pooled[..., code ^ low], 3 - low.bit_length(), POOL)
+        return pooled
+
+    def box_clearance(self, centres: np.ndarray, dims: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        """Smallest signed clearance of each of n boxes (centre, L x W x H).
+
+        Every voxel centre within one voxel of a box contributes its value
+        plus its distance to the box, which is exact for walls parallel to
+        the box faces and within about a voxel otherwise.
+
+        Along each axis those voxels are the one below the box, the ones
+        inside it and the one above; the inside run is covered by windows
+        of ``_pooled``, so each box is one fixed-size gather.  Boxes are
+        gathered in groups of one stencil size, so small boxes are not
+        padded to the largest.
+        """
+        centres = np.atleast_2d(np.asarray(centres, dtype=float))
+        dims = np.broadcast_to(np.asarray(dims, dtype=float), centres.shape)
+        lo_pt, hi_pt = centres - dims / 2, centres + dims / 2
+        upper = np.array(self.values.shape)
+        lo = np.clip(np.ceil((lo_pt - self.origin) / self.voxel).astype(np.intp) - 1, 0, upper - 1)
+        hi = np.clip(np.floor((hi_pt - self.origin) / self.voxel).astype(np.intp) + 2, lo + 1, upper)
+        # Any part of a box outside the interior is a violation by its depth.
+        out = np.minimum(self._box_distance(lo_pt), self._box_distance(hi_pt))
+        # Windows across the inside of each box, rounded up to a power of two.
+        inner = np.maximum(hi - lo - 2, 0)
+        windows = np.where(inner >= POOL, -(-inner // POOL), np.maximum(inner, 1))
+        levels = np.ceil(np.log2(windows)).astype(np.intp)
+        keys, group = np.unique(levels @ (1 << 16, 1 << 8, 1), return_inverse=True)
+        for g, key in enumerate(keys):
+            stencil = (key >> 16, (key >> 8) & 0xFF, key & 0xFF)
+            members = np.flatnonzero(group.reshape(-1) == g)
+            for first in range(0, len(members), chunk):
+                part = members[first:first + chunk]
+                block = self._block_minimum(lo_pt[part], hi_pt[part], lo[part], hi[part], stencil)
+                out[part] = np.minimum(out[part], block)
+        return out
+
+    def _block_minimum(
+        self, lo_pt: np.ndarray, hi_pt: np.ndarray, lo: np.ndarray, hi: np.ndarray, levels: Sequence[int],
+    ) -> np.ndarray:
+        """min(value + distance to box) over voxels [lo, hi) of each box,
+        with ``2 ** levels[axis]`` windows across the inside of the boxes."""
+        shape = np.array(self.values.shape)
+        strides = np.array([shape[1] * shape[2], shape[2], 1]) * 8
+        flat, gaps = 0, 0.0
+        for a in range(3):
+            # Voxel below, windows inside, voxel above.
+            inner = np.maximum(hi[:, a] - lo[:, a] - 2, 0)[:, None]
+            pooled = inner >= POOL
+            step = np.where(pooled, POOL, 1)
+            k = np.arange(1 << int(levels[a]))
+            inside = lo[:, a, None] + 1 + np.minimum(k * step, np.maximum(inner - step, 0))
+            index = np.concatenate([lo[:, a, None], np.minimum(inside, shape[a] - 1), hi[:, a, None] - 1], axis=1)
+            at = self.origin[a] + index * self.voxel
+            gap = np.maximum(np.maximum(lo_pt[:, a, None] - at, at - hi_pt[:, a, None]), 0.0) ** 2
+            gap[:, 1:-1] = np.where(inner > 0, 0.0, np.inf)
+            bit = np.zeros(index.shape, dtype=np.intp)
+            bit[:, 1:-1] = pooled * (4 >> a)
+            term = index * strides[a] + bit
+            view = [slice(None), None, None, None]
+            view[1 + a] = slice(None)
+            flat = flat + term[tuple(view)]
+            gaps = gaps + gap[tuple(view)]
+        values = self._pooled.reshape(-1)[flat]
+        return (values + np.sqrt(gaps)).min(axis=(1, 2, 3))
+
+
+def _window_min(values: np.ndarray, axis: int, size: int) -> np.ndarray:
+    """Minimum over ``size`` (a power of two) entries from each index along
+    ``axis``; windows running off the end are cut short."""
+    out = np.array(values)
+    step = 1
+    while step < size:
+        head = [slice(None)] * out.ndim
+        tail = list(head)
+        head[axis], tail[axis] = slice(0, -step), slice(step, None)
+        out[tuple(head)] = np.minimum(out[tuple(head)], out[tuple(tail)])
+        step *= 2
+    return out
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+def _mark_surface(blocked: np.ndarray, origin: np.ndarray, voxel: float,
+                  vertices: np.ndarray, triangles: np.ndarray, chunk: int = 8192) -> None:
+    """Set every voxel of ``blocked`` that a triangle passes through.
+
+    Voxel (i, j, k) is the cube of side ``voxel`` centred on ``origin +
+    (i, j, k) * voxel``.  Triangles are bisected on their longest edge until
+    no edge is longer than half a voxel; their corners and centroids then hit
+    every voxel the original triangle crosses (face-connected, which is what
+    the flood fill uses).
+    """
+    counts = np.array(blocked.shape)
+    flat = blocked.reshape(-1)
+    for first in range(0, len(triangles), chunk):
+        tris = vertices[triangles[first:first + chunk]]  # (m, 3 corners, 3)
+        while len(tris):
+            edges = np.linalg.norm(tris - np.roll(tris, -1, axis=1), axis=2)
+            longest = edges.argmax(axis=1)
+            short = edges[np.arange(len(tris)), longest] <= voxel / 2
+            done = tris[short]
+            points = np.concatenate([done.reshape(-1, 3), done.mean(axis=1)])
+            cell = np.rint((points - origin) / voxel).astype(np.intp)
+            cell = cell[np.all((cell >= 0) & (cell < counts), axis=1)]
+            flat[np.ravel_multi_index(cell.T, counts)] = True
+            tris, longest = tris[~short], longest[~short]
+            # Rotate so the longest edge runs corner 0 -> 1, then split it.
+            tris = tris[np.arange(len(tris))[:, None], (longest[:, None] + np.arange(3)) % 3]
+            mid = (tris[:, 0] + tris[:, 1]) / 2
+            tris = np.concatenate([
+                np.stack([tris[:, 0], mid, tris[:, 2]], axis=1),
+                np.stack([mid, tris[:, 1], tris[:, 2]], axis=1),
+            ])
+
+
+def to_solver(points: np.ndarray) -> np.ndarray:
+    """STEP-frame points (X width, Y up, Z length) to the solver frame."""
+    points = np.asarray(points, dtype=float)
+    return np.stack([STEP_REAR_Z - points[:, 2], points[:, 0], points[:, 1] - STEP_FLOOR_Y], axis=1)
+
+
+def build(shell, interior: Sequence[float], voxel: float = DEFAULT_VOXEL) -> ClearanceField:
+    """Voxelise ``shell`` (a cq.Shape in the STEP frame) over the interior box."""
+    from mesh_cache import cached_tessellate  # noqa: PLC0415
+    from scipy import ndimage  # noqa: PLC0415
+
+    interior = np.asarray(interior, dtype=float)
+    # Voxel centres start on the interior box faces, so walls that coincide
+    # with them are represented exactly.
+    origin = np.array([0.0, -interior[1] / 2, 0.0])
+    counts = tuple(np.ceil(interior / voxel).astype(int) + 1)
+
+    mesh = cached_tessellate(shell, tolerance=voxel / 4)
+    vertices = to_solver(mesh.vertices)
+    tri = mesh.triangles.astype(np.intp)
+    corners = vertices[tri]
+    margin = voxel / 2
+    near = np.all((corners.max(axis=1) >= origin - margin)
+                  & (corners.min(axis=1) <= origin + interior + margin), axis=1)
+    blocked = np.zeros(counts, dtype=bool)
+    _mark_surface(blocked, origin, voxel, vertices, tri[near])
+
+    labels, _ = ndimage.label(~blocked)
+    seed = labels[tuple(np.array(counts) // 2)]
+    if seed == 0:
+        raise ValueError("Cabin centre voxel is blocked; check the shell frame or voxel size")
+    free = labels == seed
+
+    # Surface voxels are zero: free space counts up from them, the rest down.
+    inside = ndimage.distance_transform_edt(free) * voxel
+    depth = (ndimage.distance_transform_edt(~free) - 1.0) * voxel
+    axes = np.meshgrid(*[np.arange(n) * voxel for n in counts], indexing="ij")
+    faces = np.minimum.reduce([np.minimum(axis, size - axis) for axis, size in zip(axes, interior)])
+    values = np.where(free, np.minimum(inside, faces), -depth).astype(np.float32)
+    return ClearanceField(values, origin, float(voxel), interior)
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def cache_dir() -> Path:
+    setting = os.environ.get(CACHE_ENV, "")
+    return Path(setting) if setting else DEFAULT_CACHE_DIR
+
+
+def field_key(step_path: Path, interior: Sequence[float], voxel: float) -> str:
+    from shell_cache import file_digest  # noqa: PLC0415
+
+    # The STEP hash alone (not shell_cache.cache_key) so that opening a cached
+    # field does not have to import OCP for its version string.
+    dims = "x".join(f"{d:g}" for d in interior)
+    params = f"{file_digest(step_path)}|{dims}|{voxel!r}|v{FORMAT_VERSION}"
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()[:32]
+
+
+def save(field: ClearanceField, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as handle:
+        np.save(handle, field.values)
+    tmp.replace(path)
+    meta = {"origin": field.origin.tolist(), "voxel": field.voxel, "interior": field.interior.tolist()}
+    path.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+    field.path = path
+
+
+def open_field(path: Path) -> ClearanceField:
+    """Memory-map a stored field."""
+    meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    values = np.load(path, mmap_mode="r")
+    return ClearanceField(values, np.array(meta["origin"]), float(meta["voxel"]),
+                          np.array(meta["interior"]), path)
+
+
+def load_field(
+    step_path: Optional[Path] = None,
+    voxel: float = DEFAULT_VOXEL,
+    rebuild: bool = False,
+) -> ClearanceField:
+    """The interior field for ``step_path``, built on first use."""
+    from constraints import load_model  # noqa: PLC0415
+    from shell_cache import DEFAULT_STEP, load_shell  # noqa: PLC0415
+
+    step_path = Path(step_path or DEFAULT_STEP)
+    habitat = load_model().habitat
+    interior = (habitat.length, habitat.width, habitat.height)
+    path = cache_dir() / f"{field_key(step_path, interior, voxel)}.npy"
+    if not rebuild and path.exists() and path.with_suffix(".json").exists():
+        try:
+            return open_field(path)
+        except (OSError, ValueError, KeyError):
+            pass
+    field = build(load_shell(step_path), interior, voxel)
+    try:
+        save(field, path)
+    except OSError:
+        return field
+    return open_field(path)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build or query the interior clearance field.")
+    parser.add_argument("--voxel", type=float, default=DEFAULT_VOXEL, help="Voxel size in mm.")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore a cached field.")
+    parser.add_argument("--benchmark", type=int, default=100_000, metavar="N",
+                        help="Time N random box and point queries (0 to skip).")
+    args = parser.parse_args()
+
+    from constraints import load_model  # noqa: PLC0415
+    from interference import layout_boxes  # noqa: PLC0415
+
+    start = time.perf_counter()
+    field = load_field(voxel=args.voxel, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    free = float((np.asarray(field.values) > 0).mean())
+    print(f"Field {'x'.join(map(str, field.shape))} at {field.voxel:g} mm ({field.values.nbytes / 1e6:.1f} MB), "
+          f"{free:.0%} free, ready in {elapsed * 1000:.0f} ms")
+    if field.path:
+        print(f"  {field.path}")
+
+    wall = load_model().habitat.wall_clearance
+    boxes = layout_boxes()
+    gaps = field.box_clearance(np.array([b[3] for b in boxes]), np.array([b[2] for b in boxes]))
+    print(f"\n{'system':40s} {'gap':>7s} {'need':>6s}")
+    failed = 0
+    for (name, item, _, _), gap in zip(boxes, gaps):
+        need = max(item.clearance, wall)
+        ok = gap >= need - field.voxel
+        failed += not ok
+        print(f"{name:40s} {gap:7.0f} {need:6.0f}  {'ok' if ok else 'TOO CLOSE'}")
+
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        n = args.benchmark
+        centres = rng.uniform([0, -field.interior[1] / 2, 0], field.interior, (n, 3))
+        dims = rng.uniform(150.0, 600.0, (n, 3))
+        start = time.perf_counter()
+        field.box_clearance(centres, dims)
+        box_us = (time.perf_counter() - start) / n * 1e6
+        start = time.perf_counter()
+        field.distance(centres)
+        point_us = (time.perf_counter() - start) / n * 1e6
+        print(f"\n{n:,} boxes at {box_us:.1f} us each, {n:,} points at {point_us:.2f} us each")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
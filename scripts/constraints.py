@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""Compiled constraint model shared by the placement and balance solvers.
+
+Parses ``habitat.yml``, ``zones/zones-index.yml`` and every ``ZONE-*.yml``
+once into frozen, slotted objects: interior dimensions and the rear axle,
+openings, zone boxes, storage cavities with their centres, and zone payload
+entries, and the chassis tanks outside the habitat.  The compiled model is pickled to ``tmp/constraints.pickle`` keyed
+by the source files' paths, mtimes and sizes, so a solver normally pays a
+few ``stat()`` calls and one unpickle; repeated ``load_model()`` calls in a
+process return the same object.
+
+Zone files are authoritative for bounds.  Where ``zones-index.yml``
+summarises a footprint that disagrees with the zone file, the difference is
+listed in ``ConstraintModel.conflicts`` instead of being silently picked.
+
+Positions use the solver frame: x from the rear wall interior toward the
+front, y lateral with the driver side negative, z up from the floor.
+
+Set ``GIMLI2_CONSTRAINTS_CACHE`` to a file path to relocate the cache, or to
+``off`` to always parse the YAML.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pickle
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_PATH = REPO_ROOT / "tmp" / "constraints.pickle"
+CACHE_ENV = "GIMLI2_CONSTRAINTS_CACHE"
+
+# Bump when the compiled classes or the parsing rules change.
+MODEL_VERSION = 4
+
+PAYLOAD_MODES = ("travel", "camp")
+PAYLOAD_DISTRIBUTIONS = ("fixed", "uniform", "triangular", "normal")
+
+Dims = Tuple[float, float, float]
+
+
+@dataclass(frozen=True, slots=True)
+class Opening:
+    """A window, door or hatch cutout from habitat.yml."""
+    id: str
+    kind: str  # window | door | hatch
+    model: str
+    wall: str
+    cutout_width: float
+    cutout_height: float
+
+
+@dataclass(frozen=True, slots=True)
+class Habitat:
+    length: float  # interior, mm
+    width: float
+    height: float
+    rear_axle_x: float  # mm from the interior rear wall
+    axle_tolerance: float  # heavy systems centred within rear_axle_x +/- this
+    floor_clearance: float
+    ceiling_clearance: float
+    wall_clearance: float
+    openings: Tuple[Opening, ...] = ()
+
+    @property
+    def half_width(self) -> float:
+        return self.width / 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class Box:
+    """Axis-aligned box in the solver frame."""
+    x_min: float
+    x_max: float
+    y_min: float
+    y_max: float
+    z_min: float
+    z_max: float
+
+    @property
+    def centre(self) -> Dims:
+        return ((self.x_min + self.x_max) / 2, (self.y_min + self.y_max) / 2, (self.z_min + self.z_max) / 2)
+
+    @property
+    def dims(self) -> Dims:
+        return (self.x_max - self.x_min, self.y_max - self.y_min, self.z_max - self.z_min)
+
+
+@dataclass(frozen=True, slots=True)
+class Zone:
+    id: str
+    name: str
+    type: str
+    path: str  # relative to the repo root
+    status: str
+    box: Optional[Box]  # None where the file has no box-like bounds
+
+
+@dataclass(frozen=True, slots=True)
+class Cavity:
+    """A storage volume systems can go into, with its usable size and centre."""
+    name: str
+    zone: str
+    dims: Dims  # (length along the vehicle, width across it, height) mm
+    x: float  # centre, mm from rear wall
+    y: float  # centre, mm lateral
+    source: str
+
+
+@dataclass(frozen=True, slots=True)
+class PayloadSource:
+    """One uncertain load declared under a zone's ``payload:`` list."""
+    name: str
+    zone: str
+    distribution: str
+    params: Tuple[Tuple[str, float], ...]
+    x: Tuple[float, float]
+    y: Tuple[float, float]
+    probability: float = 1.0
+    modes: Tuple[str, ...] = PAYLOAD_MODES
+
+    def param(self, key: str, default: Optional[float] = None) -> Optional[float]:
+        return dict(self.params).get(key, default)
+
+
+@dataclass(frozen=True, slots=True)
+class ChassisTank:
+    """A tank mounted on the chassis outside the habitat (diesel, grey)."""
+    name: str
+    capacity_l: float
+    density: float  # kg/L
+    tare: float  # kg, empty tank
+    travel_fill: float  # fill fraction of the travel design condition
+    x: float  # mm from rear wall
+    y: float  # mm lateral
+
+    def mass(self, fill: float) -> float:
+        return self.tare + self.capacity_l * self.density * fill
+
+    @property
+    def travel_mass(self) -> float:
+        return self.mass(self.travel_fill)
+
+
+@dataclass(frozen=True, slots=True)
+class ConstraintModel:
+    habitat: Habitat
+    zones: Tuple[Zone, ...]
+    cavities: Tuple[Cavity, ...]
+    payload: Tuple[PayloadSource, ...]
+    garage_shell_depth: float
+    garage_wall_thickness: float
+    conflicts: Tuple[str, ...]
+    chassis_tanks: Tuple[ChassisTank, ...] = ()
+
+    def zone(self, zone_id: str) -> Zone:
+        for zone in self.zones:
+            if zone.id == zone_id:
+                return zone
+        raise KeyError(zone_id)
+
+    def cavity(self, name: str) -> Cavity:
+        for cavity in self.cavities:
+            if cavity.name == name:
+                return cavity
+        raise KeyError(name)
+
+    def chassis_tank(self, name: str) -> ChassisTank:
+        for tank in self.chassis_tanks:
+            if tank.name == name:
+                return tank
+        raise KeyError(name)
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def _load_yaml(path: Path) -> dict:
+    import yaml  # noqa: PLC0415
+
+    with path.open("r", encoding="utf-8") as handle:
+        return yaml.safe_load(handle) or {}
+
+
+def source_files(root: Path = REPO_ROOT) -> List[Path]:
+    """Every file the model is compiled from."""
+    files = [root / "habitat.yml", root / "zones" / "zones-index.yml"]
+    files += sorted((root / "zones").rglob("ZONE-*.yml"))
+    return [path for path in files if path.exists()]
+
+
+def _parse_habitat(data: dict) -> Habitat:
+    dims = data.get("dimensions", {})
+    points = data.get("coordinate_system", {}).get("reference_points", {})
+    clearances = data.get("constraints", {}).get("clearances", {})
+    axle_zone = data.get("constraints", {}).get("axle_zone", {})
+    openings = []
+    features = data.get("features", {})
+    for kind, key in (("window", "windows"), ("door", "doors"), ("hatch", "hatches")):
+        for entry in features.get(key) or []:
+            openings.append(Opening(
+                entry["id"], kind, str(entry.get("model", "")), str(entry.get("wall", "")),
+                float(entry.get("cutout_width", 0.0)), float(entry.get("cutout_height", 0.0)),
+            ))
+    return Habitat(
+        length=float(dims["interior_length"]),
+        width=float(dims["interior_width"]),
+        height=float(dims["interior_height"]),
+        rear_axle_x=float(points["rear_axle_position_from_interior_rear_wall"]),
+        axle_tolerance=float(axle_zone.get("tolerance", 0.0)),
+        floor_clearance=float(clearances.get("floor_clearance_min", 0.0)),
+        ceiling_clearance=float(clearances.get("ceiling_clearance_min", 0.0)),
+        wall_clearance=float(clearances.get("wall_clearance_min", 0.0)),
+        openings=tuple(openings),
+    )
+
+
+def _parse_chassis_tanks(data: dict, habitat: Habitat) -> List[ChassisTank]:
+    return [
+        ChassisTank(
+            entry["name"], float(entry["capacity_l"]), float(entry.get("density", 1.0)),
+            float(entry.get("tare", 0.0)), float(entry.get("travel_fill", 0.0)),
+            habitat.rear_axle_x + float(entry.get("x_from_rear_axle", 0.0)), float(entry["y"]),
+        )
+        for entry in data.get("chassis_tanks") or []
+    ]
+
+
+def _zone_box(bounds: dict, habitat: Habitat) -> Optional[Box]:
+    """Box for the bounds layouts the zone files use (box and u_shell)."""
+    half = habitat.half_width
+    if bounds.get("type") == "u_shell":
+        return Box(0.0, float(bounds["shell_depth"]), -half, half, 0.0, float(bounds["shell_height"]))
+
+    width = bounds.get("width", bounds.get("bed_width"))
+    depth = bounds.get("depth", bounds.get("bed_length"))
+    if width is None or depth is None:
+        return None
+    width, depth = float(width), float(depth)
+    position = bounds.get("position") or {}
+
+    if "from_front" in position:
+        x_max = habitat.length - float(position["from_front"])
+        x_min = x_max - depth
+    else:
+        x_min = float(position.get("from_rear_wall", 0.0))
+        x_max = x_min + depth
+
+    side = position.get("from_wall")
+    if side == "passenger-side":
+        y_min, y_max = half - width, half
+    elif side == "driver-side":
+        y_min, y_max = -half, -half + width
+    elif "from_driver_wall" in position:
+        y_min = -half + float(position["from_driver_wall"])
+        y_max = y_min + width
+    elif "from_passenger_wall" in position:
+        y_max = half - float(position["from_passenger_wall"])
+        y_min = y_max - width
+    else:
+        y_min, y_max = -width / 2, width / 2
+
+    height = float(bounds.get("height", habitat.height))
+    return Box(x_min, x_max, y_min, y_max, 0.0, height)
+
+
+def _parse_payload(entry: dict, zone_id: str, path: Path) -> PayloadSource:
+    mass = dict(entry["mass"])
+    distribution = mass.pop("distribution", "fixed")
+    if distribution not in PAYLOAD_DISTRIBUTIONS:
+        raise ValueError(f"{path.name}: {entry['name']}: unknown distribution {distribution!r}")
+    return PayloadSource(
+        name=entry["name"],
+        zone=zone_id,
+        distribution=distribution,
+        params=tuple(sorted((k, float(v)) for k, v in mass.items())),
+        x=tuple(float(v) for v in entry["x"]),
+        y=tuple(float(v) for v in entry["y"]),
+        probability=float(entry.get("probability", 1.0)),
+        modes=tuple(entry.get("modes", PAYLOAD_MODES)),
+    )
+
+
+def _garage_cavities(data: dict, name: str, habitat: Habitat) -> List[Cavity]:
+    bounds = data.get("bounds", {})
+    cavities = []
+    for arm, sign in (("driver_arm", -1.0), ("passenger_arm", 1.0)):
+        spec = bounds.get(arm, {})
+        inner = spec.get("internal_volume")
+        if inner:
+            cavities.append(Cavity(
+                f"garage_{arm}", data["id"],
+                (float(inner["depth"]), float(inner["width"]), float(inner["height"])),
+                float(spec["depth"]) / 2,
+                sign * (habitat.half_width - float(spec["width"]) / 2),
+                f"{name}: bounds.{arm}.internal_volume",
+            ))
+    center = bounds.get("center_opening")
+    if center:
+        cavities.append(Cavity(
+            "garage_center", data["id"],
+            (float(center["depth"]), float(center["width"]), float(center["height"])),
+            float(center["depth"]) / 2, 0.0,
+            f"{name}: bounds.center_opening",
+        ))
+    return cavities
+
+
+def _bench_cavities(data: dict, name: str, habitat: Habitat, shell_depth: float) -> List[Cavity]:
+    # Side benches run forward from the garage shell along their wall.  A
+    # bench with a ``base_width`` also gets a ``<bench>_base`` cavity: the
+    # widened base stays against the wall and grows inboard.
+    seating = data.get("u_shaped_seating", {})
+    cavities = []
+    for bench, sign in (("driver_side_bench", -1.0), ("passenger_side_bench", 1.0)):
+        spec = seating.get(bench)
+        if not spec:
+            continue
+        length, height = float(spec["length"]), float(spec["seat_height"])
+        widths = [(bench, float(spec["width"]), "")]
+        if "base_width" in spec:
+            widths.append((f"{bench}_base", float(spec["base_width"]), ".base_width"))
+        for cavity_name, width, note in widths:
+            cavities.append(Cavity(
+                cavity_name, data["id"],
+                (length, width, height),
+                shell_depth + length / 2,
+                sign * (habitat.half_width - width / 2),
+                f"{name}: u_shaped_seating.{bench}{note}",
+            ))
+    return cavities
+
+
+_FOOTPRINT = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*mm")
+
+
+def _index_conflicts(index: dict, zones: Dict[str, Zone], bounds: Dict[str, dict]) -> List[str]:
+    """Footprints summarised in zones-index.yml that disagree with the zone file."""
+    conflicts = []
+    for group in (index.get("zones") or {}).values():
+        for entry in group or []:
+            zone_id = entry.get("id")
+            match = _FOOTPRINT.match(str(entry.get("footprint", "")))
+            if zone_id not in zones or not match:
+                continue
+            spec = bounds[zone_id]
+            width, depth = spec.get("width"), spec.get("depth")
+            if spec.get("type") == "u_shell":
+                width, depth = None, spec.get("shell_depth")
+            index_dims = (float(match.group(1)), float(match.group(2)))
+            if width is not None and float(width) not in index_dims:
+                conflicts.append(f"{zone_id}: index footprint {match.group(0).strip()}, zone file width {width}")
+            if depth is not None and float(depth) not in index_dims:
+                conflicts.append(f"{zone_id}: index footprint {match.group(0).strip()}, zone file depth {depth}")
+    return conflicts
+
+
+def compile_model(root: Path = REPO_ROOT) -> ConstraintModel:
+    """Parse the YAML sources into a ConstraintModel (no caching)."""
+    habitat_data = _load_yaml(root / "habitat.yml")
+    habitat = _parse_habitat(habitat_data)
+
+    zones: Dict[str, Zone] = {}
+    bounds: Dict[str, dict] = {}
+    cavities: List[Cavity] = []
+    payload: List[PayloadSource] = []
+    shell_depth, wall = 0.0, 0.0
+    zone_files = sorted((root / "zones").rglob("ZONE-*.yml"))
+    documents = [(path, _load_yaml(path)) for path in zone_files]
+
+    for path, data in documents:
+        zone_id = data.get("id", path.stem)
+        spec = data.get("bounds") or {}
+        bounds[zone_id] = spec
+        zones[zone_id] = Zone(
+            zone_id, str(data.get("name", "")), str(data.get("type", "")),
+            path.relative_to(root).as_posix(), str(data.get("status", "")),
+            _zone_box(spec, habitat),
+        )
+        payload += [_parse_payload(entry, zone_id, path) for entry in data.get("payload") or []]
+        if spec.get("type") == "u_shell":
+            shell_depth = float(spec["shell_depth"])
+            wall = float(spec.get("wall_thickness", 0.0))
+            cavities += _garage_cavities(data, path.name, habitat)
+
+    for path, data in documents:
+        zone = zones[data.get("id", path.stem)]
+        if "u_shaped_seating" in data:
+            cavities += _bench_cavities(data, path.name, habitat, shell_depth)
+        base = data.get("base_cabinets")
+        if base and zone.box is not None:
+            # Base cabinets: the zone footprint up to the under-counter height.
+            length, width, _ = zone.box.dims
+            x, y, _ = zone.box.centre
+            cavities.append(Cavity(
+                base["cavity"], zone.id, (length, width, float(base["clear_height"])), x, y,
+                f"{path.name}: bounds, base_cabinets.clear_height",
+            ))
+
+    index_path = root / "zones" / "zones-index.yml"
+    conflicts = _index_conflicts(_load_yaml(index_path), zones, bounds) if index_path.exists() else []
+    return ConstraintModel(
+        habitat=habitat,
+        zones=tuple(zones.values()),
+        cavities=tuple(cavities),
+        payload=tuple(payload),
+        garage_shell_depth=shell_depth,
+        garage_wall_thickness=wall,
+        conflicts=tuple(conflicts),
+        chassis_tanks=tuple(_parse_chassis_tanks(habitat_data, habitat)),
+    )
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def _watched_paths(root: Path) -> Tuple[str, ...]:
+    """Source files plus the zone directories (whose mtimes change on add/remove)."""
+    dirs = [str(root), str(root / "zones")]
+    dirs += [entry.path for entry in os.scandir(root / "zones") if entry.is_dir()]
+    return tuple(dirs) + tuple(str(path) for path in source_files(root))
+
+
+def _stat_key(paths: Tuple[str, ...]) -> Tuple[Any, ...]:
+    stats = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            stats.append((path, None, None))
+            continue
+        stats.append((path, st.st_mtime_ns, st.st_size))
+    return (MODEL_VERSION, tuple(stats))
+
+
+def _cache_path() -> Optional[Path]:
+    setting = os.environ.get(CACHE_ENV, "")
+    if setting.lower() in ("off", "0", "false", "no"):
+        return None
+    return Path(setting) if setting else DEFAULT_CACHE_PATH
+
+
+_memo: Dict[str, Tuple[Tuple[str, ...], Tuple[Any, ...], ConstraintModel]] = {}
+
+
+def load_model(root: Path = REPO_ROOT, rebuild: bool = False) -> ConstraintModel:
+    """The compiled model, from memory, the pickle cache or the YAML files."""
+    memo = _memo.get(str(root))
+    if memo is not None and not rebuild:
+        # Re-stat the known paths only; a new or deleted zone file changes
+        # its directory's mtime and falls through to a full key.
+        paths, key, model = memo
+        if _stat_key(paths) == key:
+            return model
+
+    paths = _watched_paths(root)
+    key = _stat_key(paths)
+    cache = _cache_path()
+    model = None
+    if cache is not None and not rebuild:
+        try:
+            with cache.open("rb") as handle:
+                # The key is pickled first so a stale model is never unpickled.
+                if pickle.load(handle) == key:
+                    model = pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError):
+            model = None
+
+    if model is None:
+        model = compile_model(root)
+        if cache is not None:
+            try:
+                cache.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache.with_name(cache.name + ".tmp")
+                with tmp.open("wb") as handle:
+                    pickle.dump(key, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(model, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                tmp.replace(cache)
+            except OSError:
+                pass
+
+    _memo[str(root)] = (paths, key, model)
+    return model
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _time_us(func, repeat: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compile and inspect the shared constraint model.")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cache and re-parse the YAML.")
+    parser.add_argument("--benchmark", action="store_true", help="Time parse, disk-cache and memory loads.")
+    args = parser.parse_args()
+
+    model = load_model(rebuild=args.rebuild)
+    h = model.habitat
+    print(f"Habitat: {h.length:g} x {h.width:g} x {h.height:g} mm, rear axle x={h.rear_axle_x:g} +/- {h.axle_tolerance:g} mm, "
+          f"{len(h.openings)} openings")
+    print(f"Garage shell: depth {model.garage_shell_depth:g} mm, walls {model.garage_wall_thickness:g} mm")
+    print("\nZones:")
+    for zone in model.zones:
+        if zone.box is None:
+            print(f"  {zone.id}  {zone.name:30s} (no box bounds)")
+            continue
+        b = zone.box
+        print(f"  {zone.id}  {zone.name:30s} x {b.x_min:6.0f}..{b.x_max:<6.0f} "
+              f"y {b.y_min:+6.0f}..{b.y_max:<+6.0f} z 0..{b.z_max:g}")
+    print("\nCavities:")
+    for cavity in model.cavities:
+        l, w, ht = cavity.dims
+        print(f"  {cavity.name:22s} {l:6.0f} x {w:4.0f} x {ht:4.0f} at x={cavity.x:6.0f} y={cavity.y:+5.0f}")
+    print(f"\nPayload entries: {len(model.payload)}")
+    print("\nChassis tanks:")
+    for tank in model.chassis_tanks:
+        print(f"  {tank.name:22s} {tank.capacity_l:4.0f} L, {tank.travel_mass:g} kg in travel "
+              f"at x={tank.x:6.0f} y={tank.y:+5.0f}")
+    if model.conflicts:
+        print("\nConflicts (zone file wins):")
+        for conflict in model.conflicts:
+            print(f"  {conflict}")
+
+    if args.benchmark:
+        parse = _time_us(compile_model, 5)
+        _memo.clear()
+        load_model()
+        disk = _time_us(lambda: (_memo.clear(), load_model()))
+        memory = _time_us(load_model)
+        print(f"\nParse YAML {parse / 1000:.1f} ms, pickle cache {disk:.0f} us, in-process {memory:.0f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
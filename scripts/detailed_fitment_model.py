@@ -1,10 +1,9 @@
 
-import cadquery as cq
+from constraints import load_model
 
 # --- Parameters ---
 # Cabinet Space (Kitchen Base)
-CABINET_DEPTH = 600.0   # mm
-CABINET_HEIGHT_CLEAR = 860.0 # mm (Under counter 900 - top thickness)
+_, CABINET_DEPTH, CABINET_HEIGHT_CLEAR = load_model().cavity("kitchen_base").dims  # mm (under-counter clear)
 # Kitchen starts at X_offset (behind bathroom). Length available?
 # Bathroom (800) + Kitchen (2300)? Or Kitchen is the remaining space?
 # Let's verify Kitchen Length available.
@@ -37,6 +36,8 @@ BAT_CLEARANCE = 25.0
 # Let's test fit.
 
 def model_kitchen_base(show_result=True):
+    import cadquery as cq  # noqa: PLC0415
+
     # --- 1. KITCHEN BASE LAYOUT (Passenger Side) ---
     # Constraint: Depth 600mm.
     
@@ -1,9 +1,12 @@
 
-import cadquery as cq
+from constraints import load_model
+
+MODEL = load_model()
 
 # --- Parameters ---
-AXLE_X = 2380.0
-AXLE_TOLERANCE_ZONE = [2000.0, 3000.0]
+AXLE_X = MODEL.habitat.rear_axle_x
+AXLE_TOLERANCE = MODEL.habitat.axle_tolerance
+AXLE_TOLERANCE_ZONE = [AXLE_X - AXLE_TOLERANCE, AXLE_X + AXLE_TOLERANCE]
 
 # Victron MultiPlus-II 3000VA
 INV_L = 218.0
@@ -50,6 +53,7 @@ INV_CLEARANCE = 100.0 # Airflow
 def check_electrical_placement():
     results = []
     results.append("ELECTRICAL COMPONENT PLACEMENT CHECK")
+    results.append(f"Axle zone: X = {AXLE_TOLERANCE_ZONE[0]:g} to {AXLE_TOLERANCE_ZONE[1]:g} (axle {AXLE_X:g} +/- {AXLE_TOLERANCE:g}).")
     
     # Inverter Height Constraint
     results.append(f"Inverter Height: {INV_H} mm (Vertical mount preferred).")
@@ -103,4 +107,5 @@ def check_electrical_placement():
     
     return "\n".join(results)
 
-print(check_electrical_placement())
+if __name__ == "__main__":
+    print(check_electrical_placement())
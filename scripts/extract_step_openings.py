@@ -4,6 +4,11 @@
 This script uses cadquery to load the STEP file, scans planar faces for
 rectangular openings that match expected cutout sizes from habitat.yml,
 then reports center coordinates and sill/threshold heights in model units.
+
+Planar faces are measured once into a NumPy face table.  Openings are then
+matched to faces as one assignment, ranked on the wall side and front/rear
+position named in their habitat.yml ``location`` before size error, so
+same-size windows resolve to distinct cutouts in the right places.
 """
 
 from __future__ import annotations
@@ -12,9 +17,9 @@ import argparse
 import importlib.util
 import math
 import sys
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -104,37 +109,315 @@ def size_error(candidate: Tuple[float, float], target: Tuple[float, float]) -> f
     return abs(candidate[0] - target[0]) + abs(candidate[1] - target[1])
 
 
-def match_face(
-    faces: Iterable,
-    opening: OpeningSpec,
-    tolerance: float,
-) -> Optional[FaceMatch]:
-    target = (opening.width, opening.height)
-    best: Optional[FaceMatch] = None
-    for face in faces:
+# Wall side -> (axis, sign) of the face center relative to the shell middle,
+# and the axis its normal should lie along.  Frame as in cad/modules/common.py:
+# X width (driver negative), Y up, Z length (front at low Z).
+WALL_SIDES = {
+    "driver": (0, -1.0),
+    "passenger": (0, 1.0),
+    "roof": (1, 1.0),
+    "floor": (1, -1.0),
+    "front": (2, -1.0),
+    "rear": (2, 1.0),
+}
+
+
+@dataclass(frozen=True)
+class FaceTable:
+    """Per-face geometry of every planar shell face, as NumPy arrays.
+
+    Row ``i`` describes ``faces[index[i]]`` of the face list the table was
+    built from.  ``offset`` is the plane offset ``dot(normal, center)``.
+    """
+
+    index: "np.ndarray"  # (n,) int
+    normal: "np.ndarray"  # (n, 3)
+    center: "np.ndarray"  # (n, 3)
+    bbox_min: "np.ndarray"  # (n, 3)
+    bbox_max: "np.ndarray"  # (n, 3)
+    size_2d: "np.ndarray"  # (n, 2)
+    offset: "np.ndarray"  # (n,)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def middle(self) -> "np.ndarray":
+        """Center of the bounding box of all planar faces."""
+        return (self.bbox_min.min(axis=0) + self.bbox_max.max(axis=0)) / 2
+
+
+def build_face_table(faces: Iterable) -> FaceTable:
+    """Query OCCT once per planar face and pack the results into arrays."""
+    ensure_dependency("numpy", "pip install numpy")
+    import numpy as np  # noqa: PLC0415 (import after check)
+
+    rows = []
+    for idx, face in enumerate(faces):
         if face.geomType() != "PLANE":
             continue
         normal = face_normal(face)
-        size = face_size_2d(face, normal)
-        candidates = [size, (size[1], size[0])]
-        error = min(size_error(c, target) for c in candidates)
-        if error > tolerance:
-            continue
-        if best is None or error < best.size_error:
-            center = face_center(face)
-            bbox_min, bbox_max = face_bbox(face)
-            best = FaceMatch(
-                feature_id=opening.feature_id,
-                kind=opening.kind,
-                location=opening.location,
-                normal=normal,
-                center=center,
-                bbox_min=bbox_min,
-                bbox_max=bbox_max,
-                size_2d=size,
-                size_error=error,
-            )
-    return best
+        bbox_min, bbox_max = face_bbox(face)
+        rows.append(
+            (idx, normal, face_center(face), bbox_min, bbox_max, face_size_2d(face, normal))
+        )
+
+    def column(i: int, dtype=float) -> "np.ndarray":
+        return np.array([row[i] for row in rows], dtype=dtype)
+
+    if not rows:
+        empty3 = np.empty((0, 3))
+        return FaceTable(
+            np.empty(0, dtype=int), empty3, empty3, empty3, empty3,
+            np.empty((0, 2)), np.empty(0),
+        )
+    normal = column(1)
+    center = column(2)
+    return FaceTable(
+        index=column(0, int),
+        normal=normal,
+        center=center,
+        bbox_min=column(3),
+        bbox_max=column(4),
+        size_2d=column(5),
+        offset=np.einsum("ij,ij->i", normal, center),
+    )
+
+
+def save_face_table(table: FaceTable, path: Path) -> None:
+    """Write ``table`` as an ``.npz`` of its columns."""
+    import numpy as np  # noqa: PLC0415
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as handle:
+        np.savez(handle, **asdict(table))
+    tmp.replace(path)
+
+
+def load_face_table(path: Path) -> FaceTable:
+    import numpy as np  # noqa: PLC0415
+
+    with np.load(path) as data:
+        return FaceTable(**{name: data[name] for name in data.files})
+
+
+# mm of size error one unit of hint reach is worth; keeps it a tie-break.
+REACH_WEIGHT = 1e-3
+
+# Location tokens that name the wall a face lies on; "front"/"rear" are only a
+# position along the length when one of these is also given.
+SIDE_WALLS = ("driver", "passenger", "roof", "floor")
+
+
+def location_hints(location: Optional[str]) -> List[Tuple[str, bool]]:
+    """Sides named in a habitat.yml location string as ``(side, on_wall)``.
+
+    ``on_wall`` is True for the wall the face lies on (its normal must follow
+    that side's axis) and False for a position hint: in "rear-passenger-side"
+    the window sits on the passenger wall, in the rear half.
+    """
+    if not location:
+        return []
+    tokens = location.lower().replace("_", "-").split("-")
+    named = [side for side in WALL_SIDES if side in tokens]
+    wall = next((side for side in named if side in SIDE_WALLS), named[0] if named else None)
+    return [(side, side == wall) for side in named]
+
+
+def location_side(location: Optional[str]) -> Optional[str]:
+    """Wall side named in a habitat.yml location string, if any."""
+    return next((side for side, on_wall in location_hints(location) if on_wall), None)
+
+
+def hint_scores(
+    table: FaceTable, hints: Sequence[Tuple[str, bool]], normal_tolerance_deg: float = 5.0,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Score every face against ``location_hints``.
+
+    Returns ``(misses, reach)``: the number of hints each face violates, and
+    how far it sits towards the named position hints (0 at the shell middle,
+    1 at its outer face, summed over hints).  ``reach`` separates e.g. the
+    rear window from a same-size side window that is only slightly rearward.
+    """
+    import numpy as np  # noqa: PLC0415
+
+    misses = np.zeros(len(table), dtype=int)
+    reach = np.zeros(len(table))
+    min_cos = math.cos(math.radians(normal_tolerance_deg))
+    half = np.maximum((table.bbox_max.max(axis=0) - table.bbox_min.min(axis=0)) / 2, 1e-9)
+    for side, on_wall in hints:
+        axis, sign = WALL_SIDES[side]
+        offset = (table.center[:, axis] - table.middle[axis]) * sign
+        ok = offset > 0
+        if on_wall:
+            ok &= np.abs(table.normal[:, axis]) >= min_cos
+        else:
+            reach += offset / half[axis]
+        misses += ~ok
+    return misses, reach
+
+
+def size_errors(table: FaceTable, opening: OpeningSpec) -> "np.ndarray":
+    """Summed width/height error of every face against ``opening``, either way round."""
+    import numpy as np  # noqa: PLC0415
+
+    w, h = opening.width, opening.height
+    sx, sy = table.size_2d[:, 0], table.size_2d[:, 1]
+    return np.minimum(np.abs(sx - w) + np.abs(sy - h), np.abs(sy - w) + np.abs(sx - h))
+
+
+def face_match(table: FaceTable, row: int, opening: OpeningSpec, error: float) -> FaceMatch:
+    return FaceMatch(
+        feature_id=opening.feature_id,
+        kind=opening.kind,
+        location=opening.location,
+        normal=tuple(float(v) for v in table.normal[row]),
+        center=tuple(float(v) for v in table.center[row]),
+        bbox_min=tuple(float(v) for v in table.bbox_min[row]),
+        bbox_max=tuple(float(v) for v in table.bbox_max[row]),
+        size_2d=tuple(float(v) for v in table.size_2d[row]),
+        size_error=float(error),
+    )
+
+
+def match_face(
+    table: FaceTable,
+    opening: OpeningSpec,
+    tolerance: float,
+    exclude: Optional["np.ndarray"] = None,
+    side: Optional[str] = None,
+    normal: Optional[Tuple[float, float, float]] = None,
+    normal_tolerance_deg: float = 5.0,
+) -> Optional[Tuple[int, FaceMatch]]:
+    """Best-fitting face for ``opening`` as ``(table_row, match)``.
+
+    Args:
+        table: Face table from ``build_face_table``.
+        opening: Expected cutout size.
+        tolerance: Maximum summed size error in mm.
+        exclude: Optional boolean mask of rows that may not be used
+            (e.g. faces already claimed by another opening).
+        side: Optional wall side (key of ``WALL_SIDES``); the face center must
+            lie on that side of the shell middle with its normal along the
+            side's axis.
+        normal: Optional direction the face normal must be parallel to
+            (either orientation).
+        normal_tolerance_deg: Angular tolerance for the normal filters.
+    """
+    import numpy as np  # noqa: PLC0415
+
+    if len(table) == 0:
+        return None
+    error = size_errors(table, opening)
+
+    mask = error <= tolerance
+    if exclude is not None:
+        mask &= ~exclude
+    min_cos = math.cos(math.radians(normal_tolerance_deg))
+    if side is not None:
+        axis, sign = WALL_SIDES[side]
+        mask &= (table.center[:, axis] - table.middle[axis]) * sign > 0
+        mask &= np.abs(table.normal[:, axis]) >= min_cos
+    if normal is not None:
+        mask &= np.abs(table.normal @ np.asarray(normalize(normal))) >= min_cos
+    if not mask.any():
+        return None
+
+    candidates = np.flatnonzero(mask)
+    row = int(candidates[np.argmin(error[candidates])])
+    return row, face_match(table, row, opening, error[row])
+
+
+def match_openings(
+    faces,
+    openings: Iterable[OpeningSpec],
+    tolerance: float,
+    claim_faces: bool = True,
+    filter_side: bool = False,
+) -> Tuple[List[FaceMatch], List[OpeningSpec]]:
+    """Match every opening against one face table.
+
+    ``faces`` is a face list or a prebuilt ``FaceTable``.  Faces within
+    ``tolerance`` are ranked first by how many ``location_hints`` they
+    violate (wall side and front/rear half), then by size error, then by
+    how far they lie towards the named position, so same-size windows
+    resolve by where habitat.yml says they are.  With
+    ``claim_faces`` every face serves at most one opening and the pairing is
+    solved as one assignment over all openings (not first come, first
+    served).  ``filter_side`` turns the hints into hard filters.
+    """
+    ensure_dependency("scipy", "pip install scipy")
+    import numpy as np  # noqa: PLC0415
+    from scipy.optimize import linear_sum_assignment  # noqa: PLC0415
+
+    table = faces if isinstance(faces, FaceTable) else build_face_table(faces)
+    openings = list(openings)
+    if not openings or len(table) == 0:
+        return [], openings
+
+    errors = np.array([size_errors(table, opening) for opening in openings])
+    scores = [hint_scores(table, location_hints(o.location)) for o in openings]
+    misses = np.array([m for m, _ in scores])
+    reach = np.array([r for _, r in scores])
+    feasible = errors <= tolerance
+    if filter_side:
+        feasible &= misses == 0
+    # One hint outweighs any total size error, so hints decide first; reach
+    # (at most a few units) only breaks ties between equally sized faces.
+    penalty = (tolerance + 1.0) * len(openings)
+    cost = np.where(feasible, misses * penalty + errors - REACH_WEIGHT * reach, np.inf)
+
+    columns = np.flatnonzero(feasible.any(axis=0))
+    if claim_faces:
+        sub = cost[:, columns]
+        finite = np.where(np.isfinite(sub), sub, penalty * (len(WALL_SIDES) + 1) * len(openings))
+        rows, picks = linear_sum_assignment(finite)
+        chosen = {int(r): int(columns[c]) for r, c in zip(rows, picks) if np.isfinite(sub[r, c])}
+    else:
+        chosen = {
+            i: int(columns[np.argmin(cost[i, columns])])
+            for i in range(len(openings)) if len(columns) and feasible[i, columns].any()
+        }
+
+    matches: List[FaceMatch] = []
+    unmatched: List[OpeningSpec] = []
+    for i, opening in enumerate(openings):
+        if i in chosen:
+            matches.append(face_match(table, chosen[i], opening, errors[i, chosen[i]]))
+        else:
+            unmatched.append(opening)
+    return matches, unmatched
+
+
+def match_openings_via_daemon(
+    step_path: Path,
+    openings: List[OpeningSpec],
+    tolerance: float,
+    claim_faces: bool = True,
+    filter_side: bool = False,
+) -> Optional[Tuple[List[FaceMatch], List[OpeningSpec]]]:
+    """Ask a running geometry daemon to do the matching; None if unavailable."""
+    from geometry_client import try_request  # noqa: PLC0415
+
+    reply = try_request(
+        "openings",
+        {
+            "step": str(step_path.resolve()),
+            "tolerance": tolerance,
+            "claim_faces": claim_faces,
+            "filter_side": filter_side,
+            "openings": [asdict(opening) for opening in openings],
+        },
+    )
+    if reply is None:
+        return None
+    matches = [
+        FaceMatch(**{k: tuple(v) if isinstance(v, list) else v for k, v in m.items()})
+        for m in reply["matches"]
+    ]
+    unmatched = [OpeningSpec(**o) for o in reply["unmatched"]]
+    return matches, unmatched
 
 
 def load_openings(habitat: dict) -> List[OpeningSpec]:
@@ -168,13 +451,9 @@ def load_openings(habitat: dict) -> List[OpeningSpec]:
 
 def load_faces(step_path: Path):
     ensure_dependency("cadquery", "pip install cadquery")
-    import cadquery as cq  # noqa: PLC0415 (import after check)
-    from cadquery import importers  # noqa: PLC0415
+    from shell_cache import load_shell  # noqa: PLC0415 (import after check)
 
-    shape = importers.importStep(str(step_path))
-    if isinstance(shape, cq.Workplane):
-        shape = shape.val()
-    return shape.Faces()
+    return load_shell(step_path).Faces()
 
 
 def format_match(match: FaceMatch) -> str:
@@ -218,33 +497,80 @@ def main() -> int:
         default=3.0,
         help="Tolerance in mm for size matching.",
     )
+    parser.add_argument(
+        "--allow-shared-faces",
+        action="store_true",
+        help="Let several openings match the same face (claimed faces are skipped by default).",
+    )
+    parser.add_argument(
+        "--filter-side",
+        action="store_true",
+        help="Only match faces on the wall side named in each opening's location.",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Always load the STEP locally, even if a geometry daemon is running.",
+    )
+    parser.add_argument(
+        "--face-table",
+        type=Path,
+        help="Match against a face table saved with --write-face-table instead of the STEP.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Also write the matches YAML to this file; stdout then lists unmatched openings too.",
+    )
+    parser.add_argument(
+        "--write-face-table",
+        type=Path,
+        help="Build the face table of --step, save it as .npz and exit.",
+    )
     args = parser.parse_args()
 
+    if args.write_face_table:
+        table = build_face_table(load_faces(args.step))
+        save_face_table(table, args.write_face_table)
+        print(f"Wrote {len(table)} planar faces to {args.write_face_table}")
+        return 0
+
     habitat = load_yaml(args.habitat)
     openings = load_openings(habitat)
     if not openings:
         print("No openings found in habitat.yml.")
         return 1
 
-    faces = load_faces(args.step)
-    matches: List[FaceMatch] = []
-    for opening in openings:
-        match = match_face(faces, opening, args.tolerance)
-        if match is None:
-            print(
-                f"No match found for {opening.feature_id} ({opening.kind}) "
-                f"size {opening.width}x{opening.height} mm",
-            )
-            continue
-        matches.append(match)
+    options = {
+        "claim_faces": not args.allow_shared_faces,
+        "filter_side": args.filter_side,
+    }
+    result = None
+    if args.face_table:
+        result = match_openings(load_face_table(args.face_table), openings, args.tolerance, **options)
+    elif not args.no_daemon:
+        result = match_openings_via_daemon(args.step, openings, args.tolerance, **options)
+    if result is None:
+        result = match_openings(load_faces(args.step), openings, args.tolerance, **options)
+    matches, unmatched = result
+    # Without --output, stdout is the YAML document and diagnostics go to stderr.
+    report = sys.stdout if args.output else sys.stderr
+    for opening in unmatched:
+        print(
+            f"No match found for {opening.feature_id} ({opening.kind}) "
+            f"size {opening.width}x{opening.height} mm",
+            file=report,
+        )
 
     if not matches:
-        print("No opening matches found.")
+        print("No opening matches found.", file=sys.stderr)
         return 1
 
-    print("matches:")
-    for match in matches:
-        print(format_match(match), end="")
+    document = "matches:\n" + "".join(format_match(match) for match in matches)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(document, encoding="utf-8")
+    print(document, end="")
 
     return 0
 
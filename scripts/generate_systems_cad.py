@@ -10,17 +10,24 @@ import argparse
 import base64
 import json
 import sys
-import tempfile
 from pathlib import Path
 
 try:
     import cadquery as cq
-    from cadquery import importers
 except ImportError:
     print("Error: cadquery not installed. Please install it (`pip install cadquery`)")
     sys.exit(1)
 
+import battery_layout_solver as bls
+from mesh_cache import cached_tessellate
+from mesh_export import DEFAULT_LODS, THREE_LOD_JS, GlbNode, bake_instances, build_glb, tessellate_lods
+from shell_cache import load_shell
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from cad.modules.common import Instances  # noqa: E402
 DEFAULT_STEP = REPO_ROOT / "reference" / "Osterath_Habitat_1225 AF.step"
 DEFAULT_OUTPUT = REPO_ROOT / "renders" / "systems_viewer.html"
 
@@ -71,19 +78,13 @@ def create_box(width, depth, height, x, y, z):
     box = cq.Workplane("XY").box(width, depth, height)
     return box.translate((x, y, z))
 
-def generate_systems_geometry() -> dict:
-    """Generate STL data for all systems."""
-    components = {}
+def mesh_lods(shape, levels=DEFAULT_LODS) -> list:
+    """Cached ``[(distance, mesh), ...]`` levels for one shape, finest first."""
+    return tessellate_lods(shape, levels, mesher=cached_tessellate)
 
-    # Helper to export STL
-    def export_stl(shape):
-        with tempfile.NamedTemporaryFile(suffix=".stl", delete=False) as f:
-            path = f.name
-        cq.exporters.export(shape, path, exportType="STL")
-        with open(path, "rb") as f:
-            data = f.read()
-        Path(path).unlink()
-        return data
+def generate_systems_geometry(lod_levels=DEFAULT_LODS) -> dict:
+    """Generate in-memory meshes (LOD ladders) for all systems."""
+    components = {}
 
     # 1. ALDE HEATER
     # Driver Side Rear Garage Arm.
@@ -91,7 +92,7 @@ def generate_systems_geometry() -> dict:
     # Pos: Driver (-840), Rear (-2090), Floor (150 center)
     alde = create_box(420, 500, 300, -840, -2090, 150)
     components['alde'] = {
-        'data': export_stl(alde),
+        'lods': mesh_lods(alde, lod_levels),
         'color': COLOR_ALDE,
         'name': 'Alde Heater'
     }
@@ -102,7 +103,7 @@ def generate_systems_geometry() -> dict:
     # Pos: Pass (+840), Rear (-2090), Floor/Wall (400 center -> 800 top)
     elec = create_box(200, 400, 500, 840, -2090, 400)
     components['electrical'] = {
-        'data': export_stl(elec),
+        'lods': mesh_lods(elec, lod_levels),
         'color': COLOR_ELEC,
         'name': 'Electrical Core'
     }
@@ -113,7 +114,7 @@ def generate_systems_geometry() -> dict:
     # Pos: Pass (+840), Mid-Rear (-1000?), Floor (250 center)
     tank1 = create_box(500, 1000, 500, 840, -1000, 250)
     components['tank1'] = {
-        'data': export_stl(tank1),
+        'lods': mesh_lods(tank1, lod_levels),
         'color': COLOR_WATER,
         'name': 'Water Tank 1 (Standard)'
     }
@@ -124,21 +125,32 @@ def generate_systems_geometry() -> dict:
     # Pos: Driver (-840), Mid-Rear (-1000?), Floor (200 center)
     tank2 = create_box(500, 1250, 400, -840, -1000, 200)
     components['tank2'] = {
-        'data': export_stl(tank2),
+        'lods': mesh_lods(tank2, lod_levels),
         'color': COLOR_WATER,
         'name': 'Water Tank 2 (Low Profile)'
     }
 
     # 5. BATTERIES (300kg)
-    # Passenger Side Kitchen Base (Forward of tank?) or Stacked?
-    # Let's put them forward of the tank in the kitchen line.
-    # Size: 400(W) x 600(L) x 400(H)
-    # Pos: Pass (+840), Mid-Front (-100?), Floor (200 center)
-    batteries = create_box(400, 600, 400, 840, 0, 200)
+    # Passenger Side Kitchen Base, forward of the tank in the kitchen line.
+    # MODULE_COUNT x 50kg modules from battery_layout_solver, long side across
+    # the truck, 3 along the length x 2 high at the solver's clearance pitch.
+    # Pos: Pass (+840), Mid-Front (0), standing on the floor.
+    # One prototype + transforms: meshed once, drawn as a THREE.InstancedMesh.
+    pitch = (bls.MOD_FULL_L, bls.MOD_FULL_W, bls.MOD_FULL_H)
+    counts = (1, 3, bls.MODULE_COUNT // 3)
+    bank = Instances.grid(
+        "battery_module",
+        bls.create_battery_module(),
+        counts,
+        pitch,
+        (840, 0, counts[2] * pitch[2] / 2),
+        COLOR_BATTERY,
+    )
     components['batteries'] = {
-        'data': export_stl(batteries),
+        'lods': mesh_lods(bank.prototype, lod_levels[:1]),
+        'instances': bank.matrices(),
         'color': COLOR_BATTERY,
-        'name': 'Battery Bank (300kg)'
+        'name': f'Battery Bank ({len(bank)}x {bls.MASS_PER_MODULE:g}kg)'
     }
 
     # 6. EXTERNAL DIESEL (Reference)
@@ -148,7 +160,7 @@ def generate_systems_geometry() -> dict:
     # Just for balance ref.
     diesel = create_box(500, 1500, 600, -1140, -500, -300)
     components['diesel'] = {
-        'data': export_stl(diesel),
+        'lods': mesh_lods(diesel, lod_levels),
         'color': 0x555555,
         'name': 'Diesel Tank (Ref)'
     }
@@ -160,7 +172,7 @@ def generate_systems_geometry() -> dict:
     # Pos: 0, -2090, 1080 (center height)
     garage_zone = create_box(2280, 600, 2160, 0, -2090, 1080)
     components['zone_garage'] = {
-        'data': export_stl(garage_zone),
+        'lods': mesh_lods(garage_zone, lod_levels),
         'color': COLOR_ZONE,
         'name': 'Zone: Garage'
     }
@@ -174,7 +186,7 @@ def generate_systems_geometry() -> dict:
     # Center Z = (+1190 - 1110) / 2 = +40.
     kitchen_zone = create_box(600, 2300, 2160, 840, 40, 1080)
     components['zone_kitchen'] = {
-        'data': export_stl(kitchen_zone),
+        'lods': mesh_lods(kitchen_zone, lod_levels),
         'color': COLOR_ZONE,
         'name': 'Zone: Kitchen'
     }
@@ -188,7 +200,7 @@ def generate_systems_geometry() -> dict:
     # Z = 2390 - 600 = 1790.
     bathroom_zone = create_box(900, 1200, 2160, -690, 1790, 1080)
     components['zone_bathroom'] = {
-        'data': export_stl(bathroom_zone),
+        'lods': mesh_lods(bathroom_zone, lod_levels),
         'color': COLOR_ZONE,
         'name': 'Zone: Bathroom'
     }
@@ -204,7 +216,7 @@ def generate_systems_geometry() -> dict:
     # Width: ~1000mm? (Bench + Table + Bench).
     dinette_zone = create_box(1000, 2300, 2160, -640, 40, 1080)
     components['zone_dinette'] = {
-        'data': export_stl(dinette_zone),
+        'lods': mesh_lods(dinette_zone, lod_levels),
         'color': COLOR_ZONE,
         'name': 'Zone: Dinette'
     }
@@ -227,7 +239,9 @@ def create_multi_model_html(shell_stl: bytes, components: dict) -> str:
             'name': data['name'],
             'color': data['color'],
             'opacity': opacity,
-            'data': base64.b64encode(data['data']).decode("utf-8")
+            'data': base64.b64encode(
+                bake_instances(data['lods'][0][1], data.get('instances', ())).to_stl_bytes()
+            ).decode("utf-8")
         })
 
     html = f'''<!DOCTYPE html>
@@ -344,34 +358,170 @@ def create_multi_model_html(shell_stl: bytes, components: dict) -> str:
 </html>'''
     return html
 
+def build_systems_glb(shell_lods: list, components: dict) -> bytes:
+    """Pack the shell and every component into one GLB, one node (LOD group) each."""
+    nodes = [GlbNode.from_lods("Habitat Shell", shell_lods, COLOR_SHELL, 0.3, {"label": "Habitat Shell"})]
+    for key, data in components.items():
+        opacity = 0.1 if 'Zone:' in data['name'] else 1.0
+        nodes.append(GlbNode.from_lods(
+            key, data['lods'], data['color'], opacity, {"label": data['name']},
+            instances=data.get('instances', ()),
+        ))
+    return build_glb(nodes)
+
+def create_glb_html(model_url: str) -> str:
+    """Create HTML that loads the scene from a GLB (sidecar path or data: URL)."""
+
+    html = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Gimli2 Habitat Systems</title>
+    <style>
+        body {{ margin: 0; overflow: hidden; background: #1a1a2e; color: white; font-family: sans-serif; }}
+        #info {{ position: absolute; top: 10px; left: 10px; background: rgba(0,0,0,0.8); padding: 15px; border-radius: 8px; }}
+        .legend-item {{ display: flex; align-items: center; margin: 5px 0; }}
+        .color-box {{ width: 20px; height: 20px; margin-right: 10px; border-radius: 4px; }}
+    </style>
+    <script type="importmap">
+    {{
+        "imports": {{
+            "three": "https://unpkg.com/three@0.160.0/build/three.module.js",
+            "three/addons/": "https://unpkg.com/three@0.160.0/examples/jsm/"
+        }}
+    }}
+    </script>
+</head>
+<body>
+    <div id="info">
+        <h3>System Layout</h3>
+        <div id="legend"></div>
+        <p><small>Left-Click: Rotate | Right-Click: Pan | Scroll: Zoom</small></p>
+    </div>
+    <script type="module">
+        import * as THREE from 'three';
+        import {{ OrbitControls }} from 'three/addons/controls/OrbitControls.js';
+        import {{ GLTFLoader }} from 'three/addons/loaders/GLTFLoader.js';
+
+        const scene = new THREE.Scene();
+        scene.background = new THREE.Color(0x1a1a2e);
+
+        const camera = new THREE.PerspectiveCamera(50, window.innerWidth / window.innerHeight, 1, 100000);
+        camera.up.set(0, 0, 1); // Z is UP
+        camera.position.set(5000, -5000, 4000); // Isometric-ish view
+
+        const renderer = new THREE.WebGLRenderer({{ antialias: true }});
+        renderer.setSize(window.innerWidth, window.innerHeight);
+        document.body.appendChild(renderer.domElement);
+
+        const controls = new OrbitControls(camera, renderer.domElement);
+        controls.enableDamping = true;
+        controls.target.set(0, 0, 1000);
+
+        // Lights
+        scene.add(new THREE.AmbientLight(0xffffff, 0.4));
+        const sun = new THREE.DirectionalLight(0xffffff, 1);
+        sun.position.set(2000, -2000, 5000);
+        scene.add(sun);
+        const fill = new THREE.DirectionalLight(0xffffff, 0.5);
+        fill.position.set(-2000, 2000, 1000);
+        scene.add(fill);
+
+        // One binary fetch (native base64 decode for data: URLs), no STL parsing
+        const buffer = await (await fetch("{model_url}")).arrayBuffer();
+        {THREE_LOD_JS}
+        new GLTFLoader().parse(buffer, '', (gltf) => {{
+            buildLods(gltf.scene);
+            scene.add(gltf.scene);
+            const legend = document.getElementById('legend');
+            gltf.scene.children.forEach((obj) => {{
+                const {{ color, label }} = obj.userData;
+                const item = document.createElement('div');
+                item.className = 'legend-item';
+                item.innerHTML = `<div class="color-box" style="background: #${{color.toString(16).padStart(6,'0')}}"></div> ${{label}}`;
+                legend.appendChild(item);
+            }});
+        }});
+
+        function animate() {{
+            requestAnimationFrame(animate);
+            controls.update();
+            renderer.render(scene, camera);
+        }}
+        animate();
+
+        window.onresize = () => {{
+            camera.aspect = window.innerWidth / window.innerHeight;
+            camera.updateProjectionMatrix();
+            renderer.setSize(window.innerWidth, window.innerHeight);
+        }};
+    </script>
+</body>
+</html>'''
+    return html
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="Generate the interactive systems layout viewer.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_OUTPUT,
+        help="Path to output HTML file.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("glb", "stl"),
+        default="glb",
+        help="Mesh payload: one indexed GLB (default) or legacy inline STLs.",
+    )
+    parser.add_argument(
+        "--sidecar",
+        action="store_true",
+        help="Write the GLB next to the HTML instead of embedding it "
+             "(serve the folder over HTTP; browsers block fetch() from file://).",
+    )
+    parser.add_argument(
+        "--no-lod",
+        action="store_true",
+        help="Only embed the finest mesh level (no camera-distance LOD switching).",
+    )
+    args = parser.parse_args()
+    lod_levels = DEFAULT_LODS[:1] if args.no_lod or args.format == "stl" else DEFAULT_LODS
+
     print("Generating Habitat Systems Visualization...")
-    import cadquery as cq # Verify import
 
     # 1. Load Shell
     print(f"Loading shell from {DEFAULT_STEP}...")
-    shape = importers.importStep(str(DEFAULT_STEP))
-    # Export Shell to STL
-    with tempfile.NamedTemporaryFile(suffix=".stl", delete=False) as f:
-        shell_path = f.name
-    cq.exporters.export(shape, shell_path, exportType="STL")
-    with open(shell_path, "rb") as f:
-        shell_data = f.read()
-    Path(shell_path).unlink()
+    shape = load_shell(DEFAULT_STEP)
+    shell_lods = mesh_lods(shape, lod_levels)
+    print(f"  Shell LODs: {[len(mesh.triangles) for _, mesh in shell_lods]} triangles")
 
     # 2. Generate Components
     print("Generating system components...")
-    comps = generate_systems_geometry()
+    comps = generate_systems_geometry(lod_levels)
 
     # 3. Create HTML
     print("Building viewer...")
-    html = create_multi_model_html(shell_data, comps)
-    
-    DEFAULT_OUTPUT.parent.mkdir(parents=True, exist_ok=True)
-    DEFAULT_OUTPUT.write_text(html, encoding="utf-8")
-    
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    if args.format == "stl":
+        html = create_multi_model_html(shell_lods[0][1].to_stl_bytes(), comps)
+    else:
+        glb = build_systems_glb(shell_lods, comps)
+        if args.sidecar:
+            glb_path = args.output.with_suffix(".glb")
+            glb_path.write_bytes(glb)
+            print(f"  GLB: {glb_path} ({len(glb)} bytes)")
+            model_url = glb_path.name
+        else:
+            model_url = "data:model/gltf-binary;base64," + base64.b64encode(glb).decode("ascii")
+        html = create_glb_html(model_url)
+
+    args.output.write_text(html, encoding="utf-8")
+
     print(f"Success! Viewer saved to:")
-    print(f"file://{DEFAULT_OUTPUT}")
+    print(f"file://{args.output}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Thin client for the resident geometry daemon (geometry_daemon.py).
+
+Only the standard library is imported here, so asking the daemon a question
+costs an interpreter start and one localhost round-trip -- no cadquery/OCP
+import and no STEP parse.  Other scripts use ``try_request()`` to forward to
+the daemon when it is running and fall back to local work when it is not.
+
+Examples:
+    python scripts/geometry_client.py ping
+    python scripts/geometry_client.py opening WIN-05
+    python scripts/geometry_client.py containment --box 500 1000 500 --center 840 250 3000
+    python scripts/geometry_client.py interference --box 420 310 500 --center -840 443 5400 --against shell
+    python scripts/geometry_client.py export --module kitchen --path kitchen.step
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from typing import Optional
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+ADDRESS_ENV = "GIMLI2_GEOMETRY_DAEMON"
+
+
+def daemon_address() -> tuple:
+    """(host, port) of the daemon, overridable via ``GIMLI2_GEOMETRY_DAEMON``."""
+    value = os.environ.get(ADDRESS_ENV)
+    if not value:
+        return DEFAULT_HOST, DEFAULT_PORT
+    host, _, port = value.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered with an error."""
+
+
+def request(op: str, payload: Optional[dict] = None, timeout: float = 30.0) -> dict:
+    """POST ``payload`` to the daemon's ``/<op>`` endpoint and return the reply.
+
+    Raises ``ConnectionError`` if nothing is listening and ``DaemonError``
+    if the daemon rejected the request.
+    """
+    host, port = daemon_address()
+    body = json.dumps(payload or {}).encode("utf-8")
+    req = urllib.request.Request(
+        f"http://{host}:{port}/{op}",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            reply = json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as exc:
+        reply = json.loads(exc.read().decode("utf-8") or "{}")
+        raise DaemonError(reply.get("error", str(exc))) from None
+    except (urllib.error.URLError, OSError) as exc:
+        raise ConnectionError(f"geometry daemon not reachable at {host}:{port}") from exc
+    return reply
+
+
+def try_request(op: str, payload: Optional[dict] = None, timeout: float = 30.0) -> Optional[dict]:
+    """Like ``request()`` but return None when the daemon is down or declines."""
+    try:
+        return request(op, payload, timeout=timeout)
+    except (ConnectionError, DaemonError):
+        return None
+
+
+def daemon_available(timeout: float = 0.5) -> bool:
+    return try_request("ping", timeout=timeout) is not None
+
+
+def _target_from_args(args) -> object:
+    if getattr(args, "module", None):
+        params = json.loads(args.params) if args.params else {}
+        return {"module": args.module, "params": params}
+    if getattr(args, "box", None):
+        return {"box": args.box, "center": args.center or [0.0, 0.0, 0.0]}
+    return "shell"
+
+
+def _add_target_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--module", help="Registered module name (cad.modules.MODULES).")
+    parser.add_argument("--params", help="Module params as a JSON object.")
+    parser.add_argument("--box", type=float, nargs=3, metavar=("X", "Y", "Z"),
+                        help="Axis-aligned box size in mm.")
+    parser.add_argument("--center", type=float, nargs=3, metavar=("X", "Y", "Z"),
+                        help="Box center in mm (STEP frame).")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the resident geometry daemon.")
+    sub = parser.add_subparsers(dest="op", required=True)
+
+    sub.add_parser("ping", help="Check that the daemon is up.")
+    sub.add_parser("shutdown", help="Stop the daemon.")
+
+    opening = sub.add_parser("opening", help="Look up an opening by id.")
+    opening.add_argument("id", help="Opening id, e.g. WIN-01.")
+
+    containment = sub.add_parser("containment", help="Check a target against the interior bounds.")
+    _add_target_args(containment)
+
+    interference = sub.add_parser("interference", help="Overlap volume between two targets.")
+    _add_target_args(interference)
+    interference.add_argument("--against", default="shell",
+                              help='"shell" or a JSON target, e.g. \'{"module": "garage"}\'.')
+
+    export = sub.add_parser("export", help="Export a target to STEP or STL.")
+    _add_target_args(export)
+    export.add_argument("--path", required=True,
+                        help="Output file, relative to the daemon's --export-dir (written by the daemon).")
+    export.add_argument("--format", choices=("step", "stl"), default=None)
+
+    args = parser.parse_args()
+
+    payload: dict = {}
+    if args.op == "opening":
+        payload = {"id": args.id}
+    elif args.op in ("containment", "export"):
+        payload = {"target": _target_from_args(args)}
+        if args.op == "export":
+            payload["path"] = args.path
+            payload["format"] = args.format
+    elif args.op == "interference":
+        against = args.against if args.against == "shell" else json.loads(args.against)
+        payload = {"a": _target_from_args(args), "b": against}
+
+    try:
+        reply = request(args.op, payload)
+    except (ConnectionError, DaemonError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
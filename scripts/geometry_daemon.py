@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Long-lived geometry server that keeps the habitat shell resident.
+
+Starting Python, importing cadquery/OCP and loading the shell costs seconds
+per script run.  This daemon pays that once, then answers JSON requests over
+localhost HTTP:
+
+    POST /ping          -> shell summary
+    POST /opening       {"id": "WIN-01"}
+    POST /openings      {"step": ..., "tolerance": 3.0, "openings": [...]}
+    POST /solids        {"step": ...}
+    POST /containment   {"target": TARGET}
+    POST /interference  {"a": TARGET, "b": TARGET}
+    POST /export        {"target": TARGET, "path": "kitchen.step", "format": "step"}
+    POST /shutdown
+
+TARGET is ``"shell"``, ``{"module": "kitchen", "params": {...}}`` (a
+``cad.modules`` registry entry, generated once and kept in memory) or
+``{"box": [x, y, z], "center": [x, y, z]}``.  Coordinates are in the STEP
+frame used by ``cad/modules/common.py`` (X width, Y up, Z length).
+
+``export`` only writes inside ``--export-dir`` (``tmp/daemon_exports/`` by
+default); relative paths are taken from there and anything resolving
+outside it is refused.
+
+Use ``geometry_client.py`` to talk to it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_STEP = REPO_ROOT / "reference" / "Osterath_Habitat_1225 AF.step"
+DEFAULT_HABITAT = REPO_ROOT / "habitat.yml"
+DEFAULT_EXPORT_DIR = REPO_ROOT / "tmp" / "daemon_exports"
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from geometry_client import DEFAULT_HOST, DEFAULT_PORT  # noqa: E402
+
+
+class RequestError(ValueError):
+    """Bad request payload; reported to the client as HTTP 400."""
+
+
+class GeometryState:
+    """Shell, face list and generated module geometry kept in memory."""
+
+    def __init__(self, step_path: Path, habitat_path: Path, tolerance: float, export_dir: Path = DEFAULT_EXPORT_DIR):
+        import cadquery as cq  # noqa: PLC0415
+        from shell_cache import load_shell  # noqa: PLC0415
+
+        self.cq = cq
+        self.step_path = step_path.resolve()
+        self.habitat_path = habitat_path
+        self.tolerance = tolerance
+        self.export_dir = export_dir.resolve()
+        self.shell = load_shell(self.step_path)
+        self.shell_solids = self.shell.Solids()
+        self.shell_bboxes = [solid.BoundingBox() for solid in self.shell_solids]
+        self.faces = self.shell.Faces()
+        self.face_table = None
+        self.modules: dict = {}
+        self._opening_matches = None
+        self._solid_rows = None
+        # OCCT is not guaranteed thread-safe; serialize geometry work.
+        self.lock = threading.Lock()
+
+    # -- targets ---------------------------------------------------------
+
+    def resolve(self, target):
+        """Turn a TARGET description into a cadquery Shape."""
+        if target == "shell":
+            return self.shell
+        if not isinstance(target, dict):
+            raise RequestError(f"Invalid target: {target!r}")
+        if "module" in target:
+            return self.module_shape(target["module"], target.get("params") or {})
+        if "box" in target:
+            size = target["box"]
+            center = target.get("center") or [0.0, 0.0, 0.0]
+            if len(size) != 3 or len(center) != 3:
+                raise RequestError("box and center need three values each")
+            return self.cq.Solid.makeBox(
+                *size,
+                pnt=self.cq.Vector(*(c - s / 2 for c, s in zip(center, size))),
+            )
+        raise RequestError(f"Invalid target: {target!r}")
+
+    def module_shape(self, name: str, params: dict):
+        from cad.modules import get_module  # noqa: PLC0415
+
+        key = (name, json.dumps(params, sort_keys=True))
+        if key not in self.modules:
+            try:
+                module_cls = get_module(name)
+            except (ValueError, ImportError) as exc:
+                raise RequestError(f"Module {name!r} unavailable: {exc}") from None
+            geometry = module_cls(params).geometry
+            shapes = geometry.vals()
+            self.modules[key] = (
+                shapes[0] if len(shapes) == 1 else self.cq.Compound.makeCompound(shapes)
+            )
+        return self.modules[key]
+
+    def faces_table(self):
+        import extract_step_openings as xso  # noqa: PLC0415
+
+        if self.face_table is None:
+            self.face_table = xso.build_face_table(self.faces)
+        return self.face_table
+
+    # -- operations ------------------------------------------------------
+
+    def ping(self, _payload: dict) -> dict:
+        return {
+            "ok": True,
+            "step": str(self.step_path),
+            "shell_solids": len(self.shell_solids),
+            "shell_faces": len(self.faces),
+            "modules_cached": len(self.modules),
+        }
+
+    def opening(self, payload: dict) -> dict:
+        from cad.modules.common import OPENINGS  # noqa: PLC0415
+
+        opening_id = payload.get("id")
+        if opening_id not in OPENINGS:
+            raise RequestError(f"Unknown opening: {opening_id!r}")
+        if self._opening_matches is None:
+            import extract_step_openings as xso  # noqa: PLC0415
+
+            specs = xso.load_openings(xso.load_yaml(self.habitat_path))
+            matches, _ = xso.match_openings(self.faces_table(), specs, self.tolerance)
+            self._opening_matches = {m.feature_id: asdict(m) for m in matches}
+        return {
+            "opening": asdict(OPENINGS[opening_id]),
+            "step_match": self._opening_matches.get(opening_id),
+        }
+
+    def check_step(self, payload: dict) -> None:
+        step = payload.get("step")
+        if step and Path(step).resolve() != self.step_path:
+            raise RequestError(f"Daemon serves {self.step_path}, not {step}")
+
+    def openings(self, payload: dict) -> dict:
+        import extract_step_openings as xso  # noqa: PLC0415
+
+        self.check_step(payload)
+        specs = [xso.OpeningSpec(**spec) for spec in payload.get("openings", [])]
+        tolerance = float(payload.get("tolerance", self.tolerance))
+        matches, unmatched = xso.match_openings(
+            self.faces_table(),
+            specs,
+            tolerance,
+            claim_faces=bool(payload.get("claim_faces", True)),
+            filter_side=bool(payload.get("filter_side", False)),
+        )
+        return {
+            "matches": [asdict(m) for m in matches],
+            "unmatched": [asdict(o) for o in unmatched],
+        }
+
+    def solids(self, payload: dict) -> dict:
+        from analyze_step_solids import solid_row  # noqa: PLC0415
+
+        self.check_step(payload)
+        if self._solid_rows is None:
+            self._solid_rows = [solid_row(i, solid) for i, solid in enumerate(self.shell_solids)]
+        return {"rows": self._solid_rows}
+
+    def containment(self, payload: dict) -> dict:
+        from cad.modules.common import HABITAT  # noqa: PLC0415
+
+        bb = self.resolve(payload.get("target")).BoundingBox()
+        limits = {
+            "x_min": (bb.xmin, HABITAT.int_x_min, bb.xmin >= HABITAT.int_x_min),
+            "x_max": (bb.xmax, HABITAT.int_x_max, bb.xmax <= HABITAT.int_x_max),
+            "y_min": (bb.ymin, HABITAT.int_y_floor, bb.ymin >= HABITAT.int_y_floor),
+            "y_max": (bb.ymax, HABITAT.int_y_ceiling, bb.ymax <= HABITAT.int_y_ceiling),
+            "z_min": (bb.zmin, HABITAT.int_z_front, bb.zmin >= HABITAT.int_z_front),
+            "z_max": (bb.zmax, HABITAT.int_z_rear, bb.zmax <= HABITAT.int_z_rear),
+        }
+        return {
+            "contained": all(ok for _, _, ok in limits.values()),
+            "violations": {
+                name: {"value": value, "limit": limit}
+                for name, (value, limit, ok) in limits.items()
+                if not ok
+            },
+        }
+
+    def interference(self, payload: dict) -> dict:
+        a = self.resolve(payload.get("a"))
+        b_target = payload.get("b", "shell")
+        if b_target == "shell":
+            # Broad phase on the resident solid bounding boxes.
+            abb = a.BoundingBox()
+            others = [
+                solid
+                for solid, bb in zip(self.shell_solids, self.shell_bboxes)
+                if bb.xmin <= abb.xmax and bb.xmax >= abb.xmin
+                and bb.ymin <= abb.ymax and bb.ymax >= abb.ymin
+                and bb.zmin <= abb.zmax and bb.zmax >= abb.zmin
+            ]
+        else:
+            others = [self.resolve(b_target)]
+        volume = 0.0
+        for other in others:
+            volume += a.intersect(other).Volume()
+        return {
+            "interferes": volume > 1e-6,
+            "overlap_volume_mm3": volume,
+            "candidates": len(others),
+        }
+
+    def export(self, payload: dict) -> dict:
+        shape = self.resolve(payload.get("target"))
+        path = payload.get("path")
+        if not path:
+            raise RequestError("export needs a path")
+        target = (self.export_dir / path).resolve()
+        if not target.is_relative_to(self.export_dir):
+            raise RequestError(f"export path must be inside {self.export_dir}: {path}")
+        export_type = (payload.get("format") or target.suffix.lstrip(".")).upper()
+        if export_type not in ("STEP", "STL"):
+            raise RequestError(f"Unsupported export format: {export_type}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.cq.exporters.export(shape, str(target), exportType=export_type)
+        return {"path": str(target), "format": export_type}
+
+
+def make_handler(state: GeometryState, server_ref: list):
+    operations = {
+        "ping": state.ping,
+        "opening": state.opening,
+        "openings": state.openings,
+        "solids": state.solids,
+        "containment": state.containment,
+        "interference": state.interference,
+        "export": state.export,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self) -> None:  # noqa: N802 (http.server API)
+            op = self.path.strip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as exc:
+                self._reply(400, {"error": f"Invalid JSON: {exc}"})
+                return
+
+            if op == "shutdown":
+                self._reply(200, {"ok": True})
+                threading.Thread(target=server_ref[0].shutdown, daemon=True).start()
+                return
+            if op not in operations:
+                self._reply(404, {"error": f"Unknown operation: {op}"})
+                return
+
+            start = time.perf_counter()
+            try:
+                with state.lock:
+                    body = operations[op](payload)
+            except RequestError as exc:
+                self._reply(400, {"error": str(exc)})
+                return
+            except Exception as exc:  # noqa: BLE001 - keep the daemon alive
+                self._reply(500, {"error": f"{type(exc).__name__}: {exc}"})
+                return
+            body["elapsed_ms"] = (time.perf_counter() - start) * 1000.0
+            self._reply(200, body)
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Serve habitat geometry queries from a resident process.",
+    )
+    parser.add_argument("--step", type=Path, default=DEFAULT_STEP, help="Path to the STEP file.")
+    parser.add_argument("--habitat", type=Path, default=DEFAULT_HABITAT, help="Path to habitat.yml.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address (localhost only by default).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=3.0,
+        help="Default tolerance in mm for opening size matching.",
+    )
+    parser.add_argument(
+        "--export-dir",
+        type=Path,
+        default=DEFAULT_EXPORT_DIR,
+        help="Directory that export requests are confined to.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    print(f"Loading shell from {args.step}...")
+    state = GeometryState(args.step, args.habitat, args.tolerance, args.export_dir)
+    print(
+        f"  {len(state.shell_solids)} solids, {len(state.faces)} faces "
+        f"in {time.perf_counter() - start:.2f}s",
+    )
+
+    server_ref: list = []
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state, server_ref))
+    server_ref.append(server)
+    print(f"Geometry daemon listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
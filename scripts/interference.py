@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Interference and clearance checks between placed systems and the shell.
+
+``habitat.yml`` only asks for bounding-box containment, and conflicts such as
+Alde vs inverter in ``electrical_placement.py`` are worked out by hand.  This
+checks every placed body against every other body and every shell solid:
+
+* broad phase -- an AABB bounding-volume hierarchy (median split on the
+  longest axis) traversed against itself; only pairs whose boxes are closer
+  than the required clearance survive, so the cost grows with the number of
+  near pairs rather than n^2
+* narrow phase -- OCCT on the surviving pairs only: ``BRepAlgoAPI_Common``
+  volume where the boxes overlap, ``BRepExtrema_DistShapeShape`` for the
+  exact minimum distance otherwise
+
+Shell solids are never tested against each other.  The required clearance
+defaults to ``wall_clearance_min`` from habitat.yml.
+
+Bodies are built in the STEP frame of ``cad/modules/common.py`` (X width,
+driver negative; Y up; Z length, front wall interior at 900, rear at 5680).
+The default layout is the best balance_optimizer assignment, with items
+lined up along each location exactly as its length budget assumes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+Dims = Tuple[float, float, float]
+
+# Solver frame -> STEP frame (cad/modules/common.py HABITAT).
+STEP_FLOOR_Y = 288.0
+STEP_REAR_Z = 5680.0
+LEAF_SIZE = 4
+STATIC_GROUPS = ("shell", "keepout")
+# Common volumes below this are numerical noise from touching faces.
+VOLUME_TOLERANCE = 1.0  # mm^3
+
+
+@dataclass
+class Body:
+    name: str
+    shape: Any  # cadquery Shape
+    group: str = "system"  # "shell" and "keepout" bodies are not tested against each other
+    bounds: Tuple[np.ndarray, np.ndarray] = None  # (min, max) AABB
+    owner: str = ""  # body this one belongs to (a keep-out's component); never tested against it
+
+    def __post_init__(self) -> None:
+        if self.bounds is None:
+            bb = self.shape.BoundingBox()
+            self.bounds = (np.array([bb.xmin, bb.ymin, bb.zmin]), np.array([bb.xmax, bb.ymax, bb.zmax]))
+
+
+@dataclass(frozen=True)
+class Contact:
+    a: str
+    b: str
+    overlap_volume: float  # mm^3, 0 when the bodies do not intersect
+    clearance: float  # mm, 0 when they intersect
+
+
+@dataclass
+class InterferenceReport:
+    bodies: int
+    candidate_pairs: int
+    exact_checks: int
+    contacts: List[Contact] = field(default_factory=list)  # overlaps and clearance violations
+    broad_ms: float = 0.0
+    narrow_ms: float = 0.0
+
+    @property
+    def overlaps(self) -> List[Contact]:
+        return [c for c in self.contacts if c.overlap_volume > 0]
+
+
+# =============================================================================
+# BROAD PHASE
+# =============================================================================
+
+class AABBTree:
+    """Static bounding-volume hierarchy over axis-aligned boxes."""
+
+    def __init__(self, mins: np.ndarray, maxs: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self.mins = np.asarray(mins, dtype=float)
+        self.maxs = np.asarray(maxs, dtype=float)
+        self.leaf_size = leaf_size
+        self.order = np.arange(len(self.mins))
+        # Per node: box, children (-1 for leaves) and the slice of ``order``.
+        self.node_min: List[np.ndarray] = []
+        self.node_max: List[np.ndarray] = []
+        self.children: List[Tuple[int, int]] = []
+        self.span: List[Tuple[int, int]] = []
+        if len(self.mins):
+            self._build(0, len(self.mins))
+
+    def _build(self, start: int, stop: int) -> int:
+        index = self.order[start:stop]
+        node = len(self.span)
+        self.node_min.append(self.mins[index].min(axis=0))
+        self.node_max.append(self.maxs[index].max(axis=0))
+        self.span.append((start, stop))
+        self.children.append((-1, -1))
+        if stop - start > self.leaf_size:
+            centres = (self.mins[index] + self.maxs[index]) / 2
+            axis = int(np.argmax(centres.max(axis=0) - centres.min(axis=0)))
+            self.order[start:stop] = index[np.argsort(centres[:, axis], kind="stable")]
+            mid = (start + stop) // 2
+            left = self._build(start, mid)
+            right = self._build(mid, stop)
+            self.children[node] = (left, right)
+        return node
+
+    def _gap(self, a: int, b: int) -> float:
+        gap = np.maximum(self.node_min[a] - self.node_max[b], self.node_min[b] - self.node_max[a])
+        return float(np.linalg.norm(np.maximum(gap, 0.0)))
+
+    def self_pairs(self, margin: float = 0.0) -> List[Tuple[int, int]]:
+        """Index pairs (i < j) whose boxes are within ``margin`` of each other."""
+        if not self.span:
+            return []
+        pairs = []
+        stack = [(0, 0)]
+        while stack:
+            a, b = stack.pop()
+            if a != b and self._gap(a, b) > margin:
+                continue
+            left_a, right_a = self.children[a]
+            left_b, right_b = self.children[b]
+            if left_a < 0 and left_b < 0:
+                ia = self.order[slice(*self.span[a])]
+                ib = self.order[slice(*self.span[b])]
+                lo = np.maximum(self.mins[ia][:, None], self.mins[ib][None, :] - margin)
+                hi = np.minimum(self.maxs[ia][:, None], self.maxs[ib][None, :] + margin)
+                near = np.all(lo <= hi, axis=2)
+                for i, j in zip(*np.nonzero(near)):
+                    p, q = int(ia[i]), int(ib[j])
+                    if p < q or (a != b and p > q):
+                        pairs.append((min(p, q), max(p, q)))
+            elif a == b:
+                stack += [(left_a, left_a), (right_a, right_a), (left_a, right_a)]
+            elif left_b < 0 or (left_a >= 0 and self._extent(a) >= self._extent(b)):
+                stack += [(left_a, b), (right_a, b)]
+            else:
+                stack += [(a, left_b), (a, right_b)]
+        return pairs
+
+    def _extent(self, node: int) -> float:
+        return float(np.prod(self.node_max[node] - self.node_min[node]))
+
+
+# =============================================================================
+# NARROW PHASE
+# =============================================================================
+
+def _overlap_volume(a, b) -> float:
+    from OCP.BRepAlgoAPI import BRepAlgoAPI_Common  # noqa: PLC0415
+    from OCP.BRepGProp import BRepGProp  # noqa: PLC0415
+    from OCP.GProp import GProp_GProps  # noqa: PLC0415
+
+    common = BRepAlgoAPI_Common(a.wrapped, b.wrapped)
+    if not common.IsDone():
+        return 0.0
+    props = GProp_GProps()
+    BRepGProp.VolumeProperties_s(common.Shape(), props)
+    return max(props.Mass(), 0.0)
+
+
+def _distance(a, b) -> float:
+    from OCP.BRepExtrema import BRepExtrema_DistShapeShape  # noqa: PLC0415
+
+    dist = BRepExtrema_DistShapeShape(a.wrapped, b.wrapped)
+    return float(dist.Value()) if dist.IsDone() else float("nan")
+
+
+def _exempt(a: Body, b: Body) -> bool:
+    """Pairs that are never tested: fixed geometry, and a keep-out with its owner."""
+    if a.group in STATIC_GROUPS and b.group in STATIC_GROUPS:
+        return True
+    return (a.owner and a.owner == b.name) or (b.owner and b.owner == a.name)
+
+
+def check(bodies: Sequence[Body], clearance: float = 0.0) -> InterferenceReport:
+    """Overlaps and clearance violations among ``bodies``."""
+    start = time.perf_counter()
+    mins = np.array([b.bounds[0] for b in bodies]).reshape(-1, 3)
+    maxs = np.array([b.bounds[1] for b in bodies]).reshape(-1, 3)
+    pairs = [(i, j) for i, j in AABBTree(mins, maxs).self_pairs(clearance) if not _exempt(bodies[i], bodies[j])]
+    report = InterferenceReport(len(bodies), len(pairs), 0)
+    report.broad_ms = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    for i, j in pairs:
+        a, b = bodies[i], bodies[j]
+        report.exact_checks += 1
+        boxes_overlap = np.all(np.maximum(mins[i], mins[j]) < np.minimum(maxs[i], maxs[j]))
+        volume = _overlap_volume(a.shape, b.shape) if boxes_overlap else 0.0
+        if volume > VOLUME_TOLERANCE:
+            report.contacts.append(Contact(a.name, b.name, volume, 0.0))
+            continue
+        if "keepout" in (a.group, b.group):
+            continue  # keep-outs may be approached, only entered
+        gap = _distance(a.shape, b.shape)
+        if gap < clearance:
+            report.contacts.append(Contact(a.name, b.name, 0.0, gap))
+    report.narrow_ms = (time.perf_counter() - start) * 1000.0
+    report.contacts.sort(key=lambda c: (-c.overlap_volume, c.clearance))
+    return report
+
+
+# =============================================================================
+# BODIES
+# =============================================================================
+
+def solver_box(name: str, dims: Sequence[float], centre: Sequence[float], group: str = "system") -> Body:
+    """Box of ``dims`` (along x, across y, up z) centred at a solver-frame point."""
+    import cadquery as cq  # noqa: PLC0415
+
+    length, width, height = dims
+    x, y, z = centre
+    origin = cq.Vector(y - width / 2, STEP_FLOOR_Y + z - height / 2, STEP_REAR_Z - x - length / 2)
+    return Body(name, cq.Solid.makeBox(width, height, length, origin), group)
+
+
+def layout_boxes(assignment=None, catalogue=None) -> List[Tuple[str, Any, Dims, Dims]]:
+    """``(name, item, dims, centre)`` solver-frame boxes for an assignment.
+
+    The default is the best balance_optimizer assignment.  Items sit on the
+    location floor, centred across it, lined up along its axis from the
+    rear/driver end with ``clearance`` on both sides of each.
+    """
+    from balance_optimizer import default_catalogue, item_length, optimize  # noqa: PLC0415
+
+    catalogue = catalogue or default_catalogue()
+    assignment = assignment or optimize(catalogue)[0]
+    items = {item.name: item for item in catalogue.items}
+    locations = {loc.name: loc for loc in catalogue.locations}
+
+    boxes = []
+    cursor = {name: -loc.length / 2 for name, loc in locations.items()}
+    for item_name, location_name in assignment.placement:
+        item, loc = items[item_name], locations[location_name]
+        need = item_length(item, loc)
+        c = item.clearance
+        l, w, h = item.dims
+        along, across = (l, w) if l + 2 * c == need and w + 2 * c <= loc.width else (w, l)
+        offset = cursor[location_name] + need / 2
+        cursor[location_name] += need
+        if loc.axis == "y":
+            centre = (loc.x, loc.y + offset, c + h / 2)
+            dims = (across, along, h)
+        else:
+            centre = (loc.x + offset, loc.y, c + h / 2)
+            dims = (along, across, h)
+        boxes.append((f"{item_name}@{location_name}", item, dims, centre))
+    return boxes
+
+
+def layout_bodies(assignment=None, catalogue=None) -> List[Body]:
+    """``layout_boxes()`` as solids."""
+    return [solver_box(name, dims, centre) for name, _, dims, centre in layout_boxes(assignment, catalogue)]
+
+
+def shell_bodies(step_path: Optional[Path] = None) -> List[Body]:
+    from shell_cache import DEFAULT_STEP, load_shell  # noqa: PLC0415
+
+    shell = load_shell(step_path or DEFAULT_STEP)
+    return [Body(f"shell[{i}]", solid, "shell") for i, solid in enumerate(shell.Solids())]
+
+
+def random_bodies(count: int, seed: int = 0) -> List[Body]:
+    """``count`` cabinet-sized boxes scattered over the interior (benchmarking)."""
+    from constraints import load_model  # noqa: PLC0415
+
+    habitat = load_model().habitat
+    rng = np.random.default_rng(seed)
+    dims = rng.uniform(150.0, 600.0, (count, 3))
+    lo = dims / 2 + habitat.wall_clearance
+    hi = np.array([habitat.length, habitat.width, habitat.height]) - dims / 2 - habitat.wall_clearance
+    centres = rng.uniform(lo, hi)
+    centres[:, 1] -= habitat.half_width
+    return [solver_box(f"cabinet-{k:04d}", dims[k], centres[k]) for k in range(count)]
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    from constraints import load_model  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(description="Check placed systems for overlaps and clearances.")
+    parser.add_argument("--clearance", type=float, default=None,
+                        help="Required gap in mm (default: habitat.yml wall_clearance_min).")
+    parser.add_argument("--no-shell", action="store_true", help="Only check systems against each other.")
+    parser.add_argument("--keepouts", action="store_true",
+                        help="Also check the layout against keepout.py volumes (doors, hatches, service).")
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="Check N random cabinet boxes instead of the optimizer layout.")
+    parser.add_argument("--limit", type=int, default=20, help="Contacts to list.")
+    args = parser.parse_args()
+
+    clearance = args.clearance
+    if clearance is None:
+        clearance = load_model().habitat.wall_clearance
+    bodies = random_bodies(args.random) if args.random else layout_bodies()
+    systems = len(bodies)
+    if args.keepouts:
+        from keepout import build_keepouts  # noqa: PLC0415
+
+        bodies += build_keepouts(None if not args.random else []).bodies()
+    if not args.no_shell:
+        bodies += shell_bodies()
+
+    report = check(bodies, clearance)
+    all_pairs = len(bodies) * (len(bodies) - 1) // 2
+    print(f"{systems} systems + {len(bodies) - systems} shell solids and keep-outs, "
+          f"required clearance {clearance:g} mm")
+    print(f"Broad phase: {report.candidate_pairs} of {all_pairs} pairs in {report.broad_ms:.1f} ms")
+    print(f"Narrow phase: {report.exact_checks} exact checks in {report.narrow_ms:.0f} ms")
+    print(f"{len(report.overlaps)} overlaps, "
+          f"{len(report.contacts) - len(report.overlaps)} clearance violations")
+    for contact in report.contacts[:args.limit]:
+        if contact.overlap_volume > 0:
+            print(f"  OVERLAP  {contact.a} / {contact.b}: {contact.overlap_volume / 1e6:.3f} L")
+        else:
+            print(f"  GAP      {contact.a} / {contact.b}: {contact.clearance:.1f} mm")
+    return 1 if report.contacts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
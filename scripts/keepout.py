@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Keep-out volumes for openings and component service clearances.
+
+``door_swing_zones`` in habitat.yml, ``SERVICE_BAY_*`` in
+``alde_placement_solver.py`` and ``INV_CLEARANCE`` in
+``electrical_placement.py`` only exist as numbers.  This turns them into
+volumes that placements must stay out of:
+
+* openings (``OPENINGS`` in ``cad/modules/common.py``) -- an access prism
+  extruded inward from every door and hatch, a shallow reveal for windows
+  (blinds, handles), and a quarter-cylinder swing arc for doors listed in
+  ``DOOR_HINGES``
+* components of a layout -- an airflow envelope around the inverter and the
+  battery bank, and the Alde service bay in front of the unit's aisle face
+
+Everything is in the solver frame (x from the rear wall, y lateral, driver
+negative, z up from the floor).  ``Opening`` sizes follow common.py: ``width``
+runs along the first STEP axis in the opening plane and ``height`` along the
+second (X, Y, Z order).
+
+``KeepOutSet`` keeps the volumes as AABB arrays, so testing n candidate boxes
+is one (n, m) broadcast plus an exact box/quarter-disc test for the swing
+arcs.  ``bodies()`` gives the same volumes as solids for ``interference.py``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+Vec = Tuple[float, float, float]
+
+# Solver frame <-> STEP frame (cad/modules/common.py HABITAT).
+STEP_FLOOR_Y = 288.0
+STEP_REAR_Z = 5680.0
+
+DOOR_ACCESS_DEPTH = 700.0  # mm, standing room inside the entry door
+HATCH_ACCESS_DEPTH = 600.0  # mm, arm's reach through a service hatch
+WINDOW_REVEAL_DEPTH = 80.0  # mm, blind cassette and handles
+# Doors with an inward leaf (fly screen) and the edge it hinges on: "front"
+# (toward the cab) or "rear" in a side wall, "passenger" or "driver" in an end
+# wall.  Doors not listed only get the access prism.
+DOOR_HINGES: Dict[str, str] = {"DOOR-01": "front"}
+BULK_CHUNK = 100_000  # boxes per broadcast block
+
+
+@dataclass(frozen=True)
+class KeepOut:
+    name: str
+    kind: str  # "access", "reveal", "swing", "airflow" or "service"
+    source: str  # opening id or layout item
+    lo: Vec  # AABB, solver frame
+    hi: Vec
+    owner: str = ""  # layout item the volume belongs to; never tested against it
+    hinge: Optional[Tuple[float, float]] = None  # swing arcs: hinge (x, y) in plan
+
+    @property
+    def volume(self) -> float:
+        box = float(np.prod(np.subtract(self.hi, self.lo)))
+        return box * np.pi / 4 if self.hinge is not None else box
+
+
+# =============================================================================
+# GENERATORS
+# =============================================================================
+
+def _to_solver(point: Sequence[float]) -> np.ndarray:
+    x, y, z = point
+    return np.array([STEP_REAR_Z - z, x, y - STEP_FLOOR_Y])
+
+
+def _box(centre: np.ndarray, dims: np.ndarray) -> Tuple[Vec, Vec]:
+    return tuple(map(float, centre - dims / 2)), tuple(map(float, centre + dims / 2))
+
+
+def opening_keepouts(openings=None) -> List[KeepOut]:
+    """Access prisms, reveals and swing arcs for the common.py openings."""
+    if openings is None:
+        from cad.modules.common import OPENINGS as openings  # noqa: PLC0415
+
+    # STEP axis k maps to solver axis step_to_solver[k] (X->y, Y->z, Z->x).
+    step_to_solver = (1, 2, 0)
+    keepouts = []
+    for opening in openings.values():
+        kind = opening.id.split("-")[0].lower()
+        depth = {"door": DOOR_ACCESS_DEPTH, "hatch": HATCH_ACCESS_DEPTH}.get(kind, WINDOW_REVEAL_DEPTH)
+        normal_axis = int(np.argmax(np.abs(opening.normal)))
+        # The normal points outward; keep-outs grow the other way.
+        inward = -float(np.sign(opening.normal[normal_axis]))
+        dims = np.zeros(3)
+        in_plane = [k for k in range(3) if k != normal_axis]
+        dims[step_to_solver[in_plane[0]]] = opening.width
+        dims[step_to_solver[in_plane[1]]] = opening.height
+        axis = step_to_solver[normal_axis]
+        inward *= -1 if axis == 0 else 1  # STEP Z runs opposite to solver x
+        dims[axis] = depth
+        centre = _to_solver(opening.center)
+        centre[axis] += inward * depth / 2
+        lo, hi = _box(centre, dims)
+        label = "access" if kind in ("door", "hatch") else "reveal"
+        keepouts.append(KeepOut(f"{opening.id}:{label}", label, opening.id, lo, hi))
+
+        hinge_edge = DOOR_HINGES.get(opening.id)
+        if kind == "door" and hinge_edge and axis in (0, 1):
+            # Leaf sweeps a quarter disc in plan around a vertical hinge.
+            along = 1 - axis
+            leaf = dims[along]
+            plane = _to_solver(opening.center)
+            hinge = plane.copy()
+            side = 1.0 if hinge_edge in ("front", "passenger") else -1.0
+            hinge[along] += side * leaf / 2
+            corner = hinge.copy()
+            corner[along] -= side * leaf
+            corner[axis] += inward * leaf
+            lo = np.minimum(hinge, corner)
+            hi = np.maximum(hinge, corner)
+            lo[2], hi[2] = centre[2] - dims[2] / 2, centre[2] + dims[2] / 2
+            keepouts.append(KeepOut(
+                f"{opening.id}:swing", "swing", opening.id,
+                tuple(map(float, lo)), tuple(map(float, hi)),
+                hinge=(float(hinge[0]), float(hinge[1])),
+            ))
+    return keepouts
+
+
+def service_rules() -> Dict[str, Tuple[str, object]]:
+    """Per-item service requirement from the narrative solvers."""
+    from alde_placement_solver import SERVICE_BAY_H, SERVICE_BAY_L, SERVICE_BAY_W  # noqa: PLC0415
+    from battery_layout_solver import CLEARANCE as BATTERY_CLEARANCE  # noqa: PLC0415
+    from electrical_placement import INV_CLEARANCE  # noqa: PLC0415
+
+    return {
+        "inverter": ("airflow", INV_CLEARANCE),
+        "battery_bank": ("airflow", BATTERY_CLEARANCE),
+        "alde": ("service", (SERVICE_BAY_L, SERVICE_BAY_W, SERVICE_BAY_H)),
+    }
+
+
+def service_keepouts(boxes=None, rules=None) -> List[KeepOut]:
+    """Airflow envelopes and service bays for ``interference.layout_boxes()``."""
+    if boxes is None:
+        from interference import layout_boxes  # noqa: PLC0415
+
+        boxes = layout_boxes()
+    rules = service_rules() if rules is None else rules
+    keepouts = []
+    for name, item, dims, centre in boxes:
+        rule = rules.get(getattr(item, "name", name))
+        if rule is None:
+            continue
+        kind, spec = rule
+        centre, dims = np.asarray(centre, dtype=float), np.asarray(dims, dtype=float)
+        if kind == "airflow":
+            lo, hi = _box(centre, dims + 2 * float(spec))
+        else:
+            # Bay in front of the face toward the aisle, from the unit's base up.
+            length, depth, height = spec
+            toward = -np.sign(centre[1]) or 1.0
+            face = centre[1] + toward * dims[1] / 2
+            bay = np.array([centre[0], face + toward * depth / 2, centre[2] - dims[2] / 2 + height / 2])
+            lo, hi = _box(bay, np.array([length, depth, height]))
+        keepouts.append(KeepOut(f"{name}:{kind}", kind, name, lo, hi, owner=name))
+    return keepouts
+
+
+# =============================================================================
+# INDEXED SET
+# =============================================================================
+
+class KeepOutSet:
+    """Keep-outs as arrays for bulk box tests."""
+
+    def __init__(self, keepouts: Sequence[KeepOut]):
+        self.keepouts = list(keepouts)
+        self.lo = np.array([k.lo for k in self.keepouts], dtype=float).reshape(-1, 3)
+        self.hi = np.array([k.hi for k in self.keepouts], dtype=float).reshape(-1, 3)
+        self.owners = np.array([k.owner for k in self.keepouts], dtype=object)
+        self.swing = np.array([k.hinge is not None for k in self.keepouts], dtype=bool)
+        self.hinge = np.array([k.hinge or (0.0, 0.0) for k in self.keepouts], dtype=float).reshape(-1, 2)
+        self.radius = np.where(self.swing, self.hi[:, 0] - self.lo[:, 0], 0.0)
+
+    def __len__(self) -> int:
+        return len(self.keepouts)
+
+    def hits(self, centres: np.ndarray, dims: np.ndarray, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """(n, m) bool: box n intrudes into keep-out m (touching is allowed)."""
+        centres = np.atleast_2d(np.asarray(centres, dtype=float))
+        dims = np.broadcast_to(np.asarray(dims, dtype=float), centres.shape)
+        out = np.empty((len(centres), len(self)), dtype=bool)
+        for first in range(0, len(centres), BULK_CHUNK):
+            rows = slice(first, first + BULK_CHUNK)
+            out[rows] = self._hits(centres[rows] - dims[rows] / 2, centres[rows] + dims[rows] / 2)
+        if names is not None:
+            out &= np.asarray(names, dtype=object)[:, None] != self.owners[None, :]
+        return out
+
+    def _hits(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        low = np.maximum(lo[:, None], self.lo[None])
+        high = np.minimum(hi[:, None], self.hi[None])
+        hit = np.all(low < high, axis=2)
+        if self.swing.any():
+            # Quarter disc: the box clipped to the arc's square must have a
+            # point within the radius of the hinge (closest point per axis).
+            cols = np.nonzero(self.swing)[0]
+            hinge = self.hinge[cols][None]
+            near = np.clip(hinge, low[:, cols, :2], high[:, cols, :2])
+            inside = np.linalg.norm(near - hinge, axis=2) < self.radius[cols][None]
+            hit[:, cols] &= inside
+        return hit
+
+    def blocked(self, centres: np.ndarray, dims: np.ndarray, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """(n,) bool: box n intrudes into any keep-out."""
+        return self.hits(centres, dims, names).any(axis=1)
+
+    def bodies(self):
+        """Keep-outs as ``interference.Body`` solids (STEP frame)."""
+        from interference import Body, solver_box  # noqa: PLC0415
+
+        bodies = []
+        for k in self.keepouts:
+            lo, hi = np.array(k.lo), np.array(k.hi)
+            body = solver_box(k.name, hi - lo, (lo + hi) / 2, group="keepout")
+            if k.hinge is not None:
+                import cadquery as cq  # noqa: PLC0415
+
+                hx, hy = k.hinge
+                axis = cq.Solid.makeCylinder(
+                    hi[0] - lo[0], hi[2] - lo[2],
+                    cq.Vector(hy, STEP_FLOOR_Y + lo[2], STEP_REAR_Z - hx), cq.Vector(0, 1, 0),
+                )
+                body = Body(k.name, body.shape.intersect(axis), "keepout")
+            body.owner = k.owner
+            bodies.append(body)
+        return bodies
+
+
+def build_keepouts(boxes=None) -> KeepOutSet:
+    """Opening keep-outs plus the service keep-outs of a layout."""
+    return KeepOutSet(opening_keepouts() + service_keepouts(boxes))
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    from interference import layout_boxes  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(description="Generate keep-out volumes and test the layout against them.")
+    parser.add_argument("--benchmark", type=int, default=100_000, metavar="N",
+                        help="Time a bulk test of N random boxes (0 to skip).")
+    args = parser.parse_args()
+
+    boxes = layout_boxes()
+    keepouts = build_keepouts(boxes)
+    print(f"{len(keepouts)} keep-outs:")
+    for k in keepouts.keepouts:
+        size = " x ".join(f"{h - l:.0f}" for l, h in zip(k.lo, k.hi))
+        print(f"  {k.name:40s} {k.kind:8s} {size:>20s}  {k.volume / 1e6:7.1f} L")
+
+    names = [b[0] for b in boxes]
+    hits = keepouts.hits(np.array([b[3] for b in boxes]), np.array([b[2] for b in boxes]), names)
+    print("\nLayout:")
+    for name, row in zip(names, hits):
+        blocked = [keepouts.keepouts[m].name for m in np.nonzero(row)[0]]
+        print(f"  {name:40s} {'INTRUDES ' + ', '.join(blocked) if blocked else 'clear'}")
+
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        centres = rng.uniform((0.0, -1140.0, 0.0), (4780.0, 1140.0, 2160.0), (args.benchmark, 3))
+        dims = rng.uniform(150.0, 600.0, (args.benchmark, 3))
+        start = time.perf_counter()
+        blocked = keepouts.blocked(centres, dims)
+        elapsed = time.perf_counter() - start
+        print(f"\n{args.benchmark:,} random boxes in {elapsed * 1000:.0f} ms "
+              f"({elapsed / args.benchmark * 1e6:.2f} us each), {blocked.mean():.0%} blocked")
+    return 1 if hits.any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,23 @@
 
-import cadquery as cq
+from constraints import load_model
+
+MODEL = load_model()
 
 # --- External Masses (Fixed) ---
+# Chassis tanks from habitat.yml (chassis_tanks); X here is lateral.
 # Driver Side (-X)
-DIESEL_MASS = 500.0 * 0.85 # approx 0.85 kg/L + tank weight -> ~450kg? Or user said "500L diesel tank"... assume 450-500kg. Let's use 450kg.
-DIESEL_X = -1000.0 # Arbitrary negative X for Driver Side
+DIESEL = MODEL.chassis_tank("diesel")
+DIESEL_MASS = DIESEL.travel_mass # 500L at 0.85 kg/L -> 425kg. The scenarios below round up to 450kg.
+DIESEL_X = DIESEL.y
 
 # Passenger Side (+X)
-GREY_MASS_EMPTY = 30.0 # Tank weight
-GREY_MASS_FULL = 330.0 # 300L
+GREY = MODEL.chassis_tank("grey")
+GREY_MASS_EMPTY = GREY.tare # Tank weight
+GREY_MASS_FULL = GREY.mass(1.0) # 300L
 # Design condition: User said "mostly empty". Use Empty or Partial?
 # Let's design for "Travel Condition" -> Diesel Full, Grey Empty.
-GREY_TRAVEL_MASS = 30.0 
-GREY_X = 1000.0 # Arbitrary positive X for Passenger Side
+GREY_TRAVEL_MASS = GREY.travel_mass
+GREY_X = GREY.y
 
 # Imbalance to correct:
 # Driver: 450kg
@@ -141,4 +146,5 @@ def calculate_balance():
     
     return "\n".join(results)
 
-print(calculate_balance())
+if __name__ == "__main__":
+    print(calculate_balance())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Content-addressed on-disk cache for tessellated meshes.
+
+The key is a hash of the shape's BREP (geometry and topology only, without
+triangulation or bookkeeping flags) combined with the linear and angular
+tolerances and the OCCT version, so an unchanged shape is never re-meshed and
+a changed one can never hit a stale entry.  Entries are ``.npz`` files holding
+the ``MeshBuffers`` arrays; the directory is trimmed least-recently-used first
+once it grows past a size budget.
+
+Set ``GIMLI2_MESH_CACHE`` to a directory to relocate the cache, or to ``off``
+to disable it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from mesh_export import (
+    DEFAULT_ANGULAR_TOLERANCE,
+    DEFAULT_TOLERANCE,
+    MeshBuffers,
+    _as_shape,
+    tessellate,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = REPO_ROOT / "tmp" / "mesh_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+CACHE_ENV = "GIMLI2_MESH_CACHE"
+CACHE_SUFFIX = ".npz"
+
+# Bump when the stored layout or the tessellate() output changes.
+FORMAT_VERSION = 1
+
+# Per-shape flag lines ("0111000": free/modified/checked/...) flip when a
+# shape is meshed or checked; they are not geometry.
+_FLAG_LINE = re.compile(rb"^[01]{7}$", re.MULTILINE)
+
+
+def shape_digest(shape) -> str:
+    """SHA-256 of the shape's BREP text, excluding triangulation and flags."""
+    from OCP.BRepTools import BRepTools  # noqa: PLC0415
+    from OCP.TopTools import TopTools_FormatVersion  # noqa: PLC0415
+
+    stream = io.BytesIO()
+    BRepTools.Write_s(
+        _as_shape(shape).wrapped,
+        stream,
+        False,
+        False,
+        TopTools_FormatVersion.TopTools_FormatVersion_VERSION_1,
+    )
+    return hashlib.sha256(_FLAG_LINE.sub(b"", stream.getvalue())).hexdigest()
+
+
+def mesh_key(digest: str, tolerance: float, angular_tolerance: float) -> str:
+    """Cache key for one shape digest at one pair of tolerances."""
+    from shell_cache import occt_version  # noqa: PLC0415
+
+    params = f"{digest}|{tolerance!r}|{angular_tolerance!r}|{occt_version()}|v{FORMAT_VERSION}"
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()[:32]
+
+
+class MeshCache:
+    """Directory of ``<key>.npz`` meshes with LRU trimming by total size.
+
+    Recency is the file mtime, refreshed on every hit.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def entries(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        return list(self.directory.glob(f"*{CACHE_SUFFIX}"))
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.entries())
+
+    def get(self, key: str) -> Optional[MeshBuffers]:
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                mesh = MeshBuffers(data["vertices"], data["triangles"])
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+        return mesh
+
+    def put(self, key: str, mesh: MeshBuffers) -> None:
+        """Store ``mesh``; an unwritable directory only disables caching."""
+        path = self.path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            with tmp.open("wb") as handle:
+                np.savez(handle, vertices=mesh.vertices, triangles=mesh.triangles)
+            tmp.replace(path)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self) -> List[Path]:
+        """Delete least recently used entries until the budget is met."""
+        stats = []
+        for path in self.entries():
+            try:
+                stats.append((path, path.stat()))
+            except OSError:
+                continue
+        total = sum(st.st_size for _, st in stats)
+        removed = []
+        for path, st in sorted(stats, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= st.st_size
+            removed.append(path)
+        return removed
+
+    def clear(self) -> int:
+        count = 0
+        for path in self.entries():
+            path.unlink()
+            count += 1
+        return count
+
+    def tessellate(
+        self,
+        shape,
+        tolerance: float = DEFAULT_TOLERANCE,
+        angular_tolerance: float = DEFAULT_ANGULAR_TOLERANCE,
+    ) -> MeshBuffers:
+        """``mesh_export.tessellate()`` with a cache lookup in front."""
+        key = mesh_key(shape_digest(shape), tolerance, angular_tolerance)
+        mesh = self.get(key)
+        if mesh is not None:
+            self.hits += 1
+            return mesh
+        self.misses += 1
+        mesh = tessellate(shape, tolerance, angular_tolerance)
+        self.put(key, mesh)
+        return mesh
+
+
+_default_cache: Optional[MeshCache] = None
+
+
+def default_cache() -> Optional[MeshCache]:
+    """Process-wide cache honouring ``GIMLI2_MESH_CACHE``; None when disabled."""
+    global _default_cache
+    setting = os.environ.get(CACHE_ENV, "")
+    if setting.lower() in ("off", "0", "false", "no"):
+        return None
+    directory = Path(setting) if setting else DEFAULT_CACHE_DIR
+    if _default_cache is None or _default_cache.directory != directory:
+        _default_cache = MeshCache(directory)
+    return _default_cache
+
+
+def cached_tessellate(
+    shape,
+    tolerance: float = DEFAULT_TOLERANCE,
+    angular_tolerance: float = DEFAULT_ANGULAR_TOLERANCE,
+) -> MeshBuffers:
+    """Tessellate through the default cache (or directly if it is disabled)."""
+    cache = default_cache()
+    if cache is None:
+        return tessellate(shape, tolerance, angular_tolerance)
+    return cache.tessellate(shape, tolerance, angular_tolerance)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect or trim the tessellation cache.")
+    parser.add_argument("--dir", type=Path, default=None, help="Cache directory.")
+    parser.add_argument("--max-mb", type=float, default=None, help="Trim to this size (MiB).")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached mesh.")
+    parser.add_argument("--warm", type=Path, metavar="STEP",
+                        help="Mesh the shell of STEP at every DEFAULT_LODS level into the cache.")
+    args = parser.parse_args()
+
+    cache = MeshCache(args.dir) if args.dir else default_cache()
+    if cache is None:
+        print(f"Mesh cache disabled via {CACHE_ENV}")
+        return 0
+    if args.clear:
+        print(f"Removed {cache.clear()} entries from {cache.directory}")
+        return 0
+    if args.warm:
+        from mesh_export import DEFAULT_LODS  # noqa: PLC0415
+        from shell_cache import load_shell  # noqa: PLC0415
+
+        shell = load_shell(args.warm)
+        for tolerance, angular_tolerance, _ in DEFAULT_LODS:
+            cache.tessellate(shell, tolerance, angular_tolerance)
+        print(f"Warmed {len(DEFAULT_LODS)} levels ({cache.hits} already cached)")
+    if args.max_mb is not None:
+        cache.max_bytes = int(args.max_mb * 1024 * 1024)
+        print(f"Evicted {len(cache.evict())} entries")
+    entries = cache.entries()
+    print(f"Cache: {cache.directory}")
+    print(f"  {len(entries)} meshes, {cache.size_bytes() / 1e6:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""Tessellate shapes straight into in-memory mesh buffers.
+
+The viewers used to export every shape to a temporary STL file and read the
+bytes back.  ``tessellate()`` instead meshes a shape with OCCT's VTK bridge
+and returns NumPy vertex/index arrays, which the viewers and the STL writer
+consume directly without touching the disk.
+
+``build_glb()`` packs several meshes into one binary glTF (GLB) with indexed,
+de-duplicated vertices and one named node per component, for the three.js
+viewers' GLTFLoader.  ``tessellate_lods()`` meshes a shape at several
+tolerances; nodes carrying those levels are written as a group the viewers
+turn into a ``THREE.LOD``.  Nodes with ``instances`` store their mesh once
+plus one transform per copy (``EXT_mesh_gpu_instancing``), which
+GLTFLoader turns into a ``THREE.InstancedMesh``.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Same defaults as cq.exporters.export(..., exportType="STL").
+DEFAULT_TOLERANCE = 0.1  # mm, maximal chordal deviation
+DEFAULT_ANGULAR_TOLERANCE = 0.1  # rad
+
+# Level-of-detail ladder, fine to coarse: (linear tolerance mm, angular
+# tolerance rad, camera distance in mm from which the level is shown).
+DEFAULT_LODS = (
+    (DEFAULT_TOLERANCE, DEFAULT_ANGULAR_TOLERANCE, 0.0),
+    (1.0, 0.3, 4000.0),
+    (10.0, 0.8, 12000.0),
+)
+
+# A coarser level is only kept if it drops at least this share of triangles.
+_LOD_MIN_REDUCTION = 0.25
+
+_STL_RECORD = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2"),
+])
+
+
+@dataclass(frozen=True)
+class MeshBuffers:
+    """Triangle mesh as flat NumPy buffers.
+
+    ``vertices`` is (n, 3) float32 in mm; ``triangles`` is (m, 3) uint32
+    indices into ``vertices`` with counter-clockwise (outward) winding.
+    """
+
+    vertices: np.ndarray
+    triangles: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.vertices.nbytes + self.triangles.nbytes
+
+    def face_normals(self) -> np.ndarray:
+        """Unit normal per triangle, (m, 3) float32."""
+        tri = self.vertices[self.triangles]
+        normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, lengths, out=normals, where=lengths > 0)
+        return normals.astype(np.float32, copy=False)
+
+    def to_stl_bytes(self) -> bytes:
+        """Serialize as binary STL."""
+        records = np.zeros(len(self.triangles), dtype=_STL_RECORD)
+        records["normal"] = self.face_normals()
+        records["vertices"] = self.vertices[self.triangles]
+        header = b"gimli2-habitat mesh_export".ljust(80, b"\0")
+        count = np.array([len(records)], dtype="<u4").tobytes()
+        return header + count + records.tobytes()
+
+    def write_stl(self, path: Path) -> None:
+        Path(path).write_bytes(self.to_stl_bytes())
+
+    def transformed(self, matrix) -> "MeshBuffers":
+        """Copy with vertices mapped through a 4x4 row-major ``matrix``."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        vertices = self.vertices @ matrix[:3, :3].T + matrix[:3, 3]
+        return MeshBuffers(vertices.astype(np.float32), self.triangles)
+
+    def deduplicated(self) -> "MeshBuffers":
+        """Merge bit-identical vertices and re-index the triangles."""
+        if len(self.vertices) == 0:
+            return self
+        unique, inverse = np.unique(self.vertices, axis=0, return_inverse=True)
+        triangles = inverse.reshape(-1)[self.triangles].astype(np.uint32)
+        return MeshBuffers(unique.astype(np.float32, copy=False), triangles)
+
+
+def bake_instances(mesh: MeshBuffers, matrices: Sequence) -> MeshBuffers:
+    """One mesh holding a copy of ``mesh`` per matrix (for STL and other
+    formats without instancing)."""
+    if not len(matrices):
+        return mesh
+    copies = [mesh.transformed(matrix) for matrix in matrices]
+    offsets = np.arange(len(copies), dtype=np.uint32) * np.uint32(len(mesh.vertices))
+    return MeshBuffers(
+        np.concatenate([c.vertices for c in copies]),
+        np.concatenate([mesh.triangles + offset for offset in offsets]),
+    )
+
+
+def _as_shape(shape):
+    """Accept a cq.Shape or cq.Workplane and return a single cq.Shape."""
+    import cadquery as cq  # noqa: PLC0415
+
+    if isinstance(shape, cq.Workplane):
+        shapes = [v for v in shape.vals() if isinstance(v, cq.Shape)]
+        if len(shapes) == 1:
+            return shapes[0]
+        return cq.Compound.makeCompound(shapes)
+    return shape
+
+
+def tessellate(
+    shape,
+    tolerance: float = DEFAULT_TOLERANCE,
+    angular_tolerance: float = DEFAULT_ANGULAR_TOLERANCE,
+) -> MeshBuffers:
+    """Mesh ``shape`` (cq.Shape or cq.Workplane) into ``MeshBuffers``.
+
+    Uses OCCT's IVtk mesher so triangles are copied out in bulk through VTK's
+    array interface rather than node by node from Python.
+    """
+    from OCP.Aspect import Aspect_TOD_ABSOLUTE  # noqa: PLC0415
+    from OCP.IVtkOCC import IVtkOCC_Shape, IVtkOCC_ShapeMesher  # noqa: PLC0415
+    from OCP.IVtkVTK import IVtkVTK_ShapeData  # noqa: PLC0415
+    from vtkmodules.util.numpy_support import vtk_to_numpy  # noqa: PLC0415
+    from vtkmodules.vtkFiltersCore import vtkTriangleFilter  # noqa: PLC0415
+
+    vtk_shape = IVtkOCC_Shape(_as_shape(shape).wrapped)
+    drawer = vtk_shape.Attributes()
+    drawer.SetTypeOfDeflection(Aspect_TOD_ABSOLUTE)
+    drawer.SetMaximalChordialDeviation(tolerance)
+    drawer.SetDeviationAngle(angular_tolerance)
+    shape_data = IVtkVTK_ShapeData()
+    IVtkOCC_ShapeMesher().Build(vtk_shape, shape_data)
+    poly_data = shape_data.getVtkPolyData()
+
+    polys = poly_data.GetPolys()
+    offsets = vtk_to_numpy(polys.GetOffsetsArray())
+    if len(offsets) > 1 and not np.all(np.diff(offsets) == 3):
+        tri_filter = vtkTriangleFilter()
+        tri_filter.SetInputData(poly_data)
+        tri_filter.PassLinesOff()
+        tri_filter.PassVertsOff()
+        tri_filter.Update()
+        poly_data = tri_filter.GetOutput()
+        polys = poly_data.GetPolys()
+
+    points = poly_data.GetPoints()
+    if points is None or polys.GetNumberOfCells() == 0:
+        return MeshBuffers(
+            np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.uint32)
+        )
+    vertices = vtk_to_numpy(points.GetData()).astype(np.float32)
+    triangles = vtk_to_numpy(polys.GetConnectivityArray()).astype(np.uint32).reshape(-1, 3)
+    return MeshBuffers(vertices, triangles)
+
+
+def tessellate_lods(
+    shape,
+    levels: Sequence[Tuple[float, float, float]] = DEFAULT_LODS,
+    mesher: Callable[..., MeshBuffers] = tessellate,
+) -> List[Tuple[float, MeshBuffers]]:
+    """Mesh ``shape`` once per level and return ``[(distance, mesh), ...]``.
+
+    Levels that barely reduce the triangle count (e.g. every level of a box)
+    are dropped, so simple shapes come back as a single level.  ``mesher``
+    lets callers route through ``mesh_cache.cached_tessellate``.
+    """
+    lods: List[Tuple[float, MeshBuffers]] = []
+    for tolerance, angular_tolerance, distance in levels:
+        mesh = mesher(shape, tolerance, angular_tolerance)
+        if lods:
+            previous = len(lods[-1][1].triangles)
+            if len(mesh.triangles) > previous * (1.0 - _LOD_MIN_REDUCTION):
+                continue
+        lods.append((distance, mesh))
+    return lods
+
+
+# =============================================================================
+# BINARY glTF (GLB)
+# =============================================================================
+
+_GLB_MAGIC = 0x46546C67  # "glTF"
+_GLB_JSON = 0x4E4F534A  # "JSON"
+_GLB_BIN = 0x004E4942  # "BIN\0"
+_FLOAT = 5126
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+
+@dataclass
+class GlbNode:
+    """One named, coloured mesh in a GLB scene.
+
+    ``lods`` optionally lists coarser ``(distance, mesh)`` levels shown from
+    that camera distance on; ``mesh`` is the finest level.  ``instances``
+    optionally lists 4x4 row-major placements of ``mesh`` (rigid or scaled);
+    instanced nodes keep only the finest level.
+    """
+
+    name: str
+    mesh: MeshBuffers
+    color: int = 0xCCCCCC  # 0xRRGGBB
+    opacity: float = 1.0
+    extras: dict = field(default_factory=dict)
+    lods: Sequence[Tuple[float, MeshBuffers]] = ()
+    instances: Sequence = ()
+
+    @classmethod
+    def from_lods(cls, name: str, lods: Sequence[Tuple[float, MeshBuffers]], *args, **kwargs) -> "GlbNode":
+        """Build a node from ``tessellate_lods()`` output."""
+        return cls(name, lods[0][1], *args, lods=tuple(lods[1:]), **kwargs)
+
+
+# Viewer-side counterpart of the LOD groups written by build_glb(): swaps each
+# group for a THREE.LOD centred on its finest mesh so distances are measured
+# to the component, not the model origin.  Embed in a module <script>.
+THREE_LOD_JS = """function buildLods(root) {
+            for (const group of [...root.children]) {
+                const levels = group.children.filter((c) => c.userData.lod_distance !== undefined);
+                if (!levels.length) continue;
+                const lod = new THREE.LOD();
+                lod.name = group.name;
+                lod.userData = group.userData;
+                levels[0].geometry.computeBoundingBox();
+                const center = levels[0].geometry.boundingBox.getCenter(new THREE.Vector3());
+                lod.position.copy(center);
+                for (const level of levels) {
+                    level.position.sub(center);
+                    lod.addLevel(level, level.userData.lod_distance);
+                }
+                root.remove(group);
+                root.add(lod);
+            }
+        }"""
+
+
+def _srgb_to_linear(channel: float) -> float:
+    # glTF base colors are linear; three.js converts them back for display.
+    if channel <= 0.04045:
+        return channel / 12.92
+    return ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _instance_trs(matrices: Sequence) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Translation, rotation quaternion (x, y, z, w) and scale per matrix."""
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    translation = m[:, :3, 3]
+    scale = np.linalg.norm(m[:, :3, :3], axis=1)
+    r = m[:, :3, :3] / np.where(scale > 0, scale, 1.0)[:, None, :]
+    # Shepperd's method, branch-free: pick the largest of 4w^2, 4x^2, 4y^2, 4z^2.
+    trace = np.trace(r, axis1=1, axis2=2)
+    candidates = np.stack([
+        np.stack([r[:, 2, 1] - r[:, 1, 2], r[:, 0, 2] - r[:, 2, 0], r[:, 1, 0] - r[:, 0, 1], 1 + trace], 1),
+        np.stack([1 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2], r[:, 0, 1] + r[:, 1, 0],
+                  r[:, 0, 2] + r[:, 2, 0], r[:, 2, 1] - r[:, 1, 2]], 1),
+        np.stack([r[:, 0, 1] + r[:, 1, 0], 1 - r[:, 0, 0] + r[:, 1, 1] - r[:, 2, 2],
+                  r[:, 1, 2] + r[:, 2, 1], r[:, 0, 2] - r[:, 2, 0]], 1),
+        np.stack([r[:, 0, 2] + r[:, 2, 0], r[:, 1, 2] + r[:, 2, 1],
+                  1 - r[:, 0, 0] - r[:, 1, 1] + r[:, 2, 2], r[:, 1, 0] - r[:, 0, 1]], 1),
+    ], 1)
+    pivots = np.stack([trace, r[:, 0, 0], r[:, 1, 1], r[:, 2, 2]], 1).argmax(axis=1)
+    rotation = candidates[np.arange(len(m)), pivots]
+    rotation /= np.linalg.norm(rotation, axis=1, keepdims=True)
+    return translation, rotation, scale
+
+
+def _pad4(data: bytes, fill: bytes = b"\0") -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def build_glb(nodes: Iterable[GlbNode], deduplicate: bool = True) -> bytes:
+    """Serialize meshes as a single GLB blob, one scene node per entry.
+
+    A node with LOD levels becomes a mesh-less group whose children carry
+    ``extras.lod_distance``; the viewers rebuild those as ``THREE.LOD``.
+    """
+    gltf: dict = {
+        "asset": {"version": "2.0", "generator": "gimli2-habitat mesh_export"},
+        "scene": 0,
+        "scenes": [{"nodes": []}],
+        "nodes": [],
+        "meshes": [],
+        "materials": [],
+        "accessors": [],
+        "bufferViews": [],
+        "buffers": [],
+    }
+    chunks: List[bytes] = []
+    offset = 0
+
+    def add_view(data: bytes, target: Optional[int] = None) -> int:
+        nonlocal offset
+        view = {"buffer": 0, "byteOffset": offset, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        gltf["bufferViews"].append(view)
+        padded = _pad4(data)
+        chunks.append(padded)
+        offset += len(padded)
+        return len(gltf["bufferViews"]) - 1
+
+    def add_mesh(name: str, mesh: MeshBuffers, material: int) -> int:
+        vertices = np.ascontiguousarray(mesh.vertices, dtype="<f4")
+        indices = np.ascontiguousarray(mesh.triangles, dtype="<u4").reshape(-1)
+
+        gltf["accessors"].append({
+            "bufferView": add_view(vertices.tobytes(), _ARRAY_BUFFER),
+            "componentType": _FLOAT,
+            "count": len(vertices),
+            "type": "VEC3",
+            "min": vertices.min(axis=0).tolist(),
+            "max": vertices.max(axis=0).tolist(),
+        })
+        position = len(gltf["accessors"]) - 1
+        gltf["accessors"].append({
+            "bufferView": add_view(indices.tobytes(), _ELEMENT_ARRAY_BUFFER),
+            "componentType": _UNSIGNED_INT,
+            "count": len(indices),
+            "type": "SCALAR",
+        })
+        gltf["meshes"].append({
+            "name": name,
+            "primitives": [{
+                "attributes": {"POSITION": position},
+                "indices": len(gltf["accessors"]) - 1,
+                "material": material,
+            }],
+        })
+        return len(gltf["meshes"]) - 1
+
+    def add_instances(matrices: Sequence) -> dict:
+        attributes = {}
+        for name, values in zip(("TRANSLATION", "ROTATION", "SCALE"), _instance_trs(matrices)):
+            data = np.ascontiguousarray(values, dtype="<f4")
+            gltf["accessors"].append({
+                "bufferView": add_view(data.tobytes()),
+                "componentType": _FLOAT,
+                "count": len(data),
+                "type": "VEC4" if data.shape[1] == 4 else "VEC3",
+            })
+            attributes[name] = len(gltf["accessors"]) - 1
+        return {"EXT_mesh_gpu_instancing": {"attributes": attributes}}
+
+    for node in nodes:
+        levels = [(0.0, node.mesh)] + ([] if len(node.instances) else list(node.lods))
+        levels = [
+            (distance, mesh.deduplicated() if deduplicate else mesh)
+            for distance, mesh in levels
+            if len(mesh.triangles)
+        ]
+        if not levels:
+            continue
+
+        rgb = [((node.color >> shift) & 0xFF) / 255.0 for shift in (16, 8, 0)]
+        material = {
+            "name": node.name,
+            "pbrMetallicRoughness": {
+                "baseColorFactor": [_srgb_to_linear(c) for c in rgb] + [node.opacity],
+                "metallicFactor": 0.0,
+                "roughnessFactor": 0.8,
+            },
+            "doubleSided": True,
+        }
+        if node.opacity < 1.0:
+            material["alphaMode"] = "BLEND"
+        gltf["materials"].append(material)
+        material_index = len(gltf["materials"]) - 1
+
+        extras = {"color": node.color, "opacity": node.opacity, **node.extras}
+        if len(levels) == 1:
+            gltf["nodes"].append({
+                "name": node.name,
+                "mesh": add_mesh(node.name, levels[0][1], material_index),
+                "extras": extras,
+            })
+            if len(node.instances):
+                gltf["nodes"][-1]["extensions"] = add_instances(node.instances)
+                gltf.setdefault("extensionsUsed", ["EXT_mesh_gpu_instancing"])
+        else:
+            children = []
+            for level, (distance, mesh) in enumerate(levels):
+                level_name = f"{node.name} LOD{level}"
+                gltf["nodes"].append({
+                    "name": level_name,
+                    "mesh": add_mesh(level_name, mesh, material_index),
+                    "extras": {"lod_distance": distance},
+                })
+                children.append(len(gltf["nodes"]) - 1)
+            gltf["nodes"].append({"name": node.name, "children": children, "extras": extras})
+        gltf["scenes"][0]["nodes"].append(len(gltf["nodes"]) - 1)
+
+    binary = b"".join(chunks)
+    if binary:
+        gltf["buffers"].append({"byteLength": len(binary)})
+    for key in ("nodes", "meshes", "materials", "accessors", "bufferViews", "buffers"):
+        if not gltf[key]:
+            del gltf[key]
+
+    json_chunk = _pad4(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    total = 12 + 8 + len(json_chunk) + (8 + len(binary) if binary else 0)
+    parts = [
+        struct.pack("<III", _GLB_MAGIC, 2, total),
+        struct.pack("<II", len(json_chunk), _GLB_JSON),
+        json_chunk,
+    ]
+    if binary:
+        parts += [struct.pack("<II", len(binary), _GLB_BIN), binary]
+    return b"".join(parts)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Orthogonal 3D packing of identical boxes into zone cavities.
+
+Answers "how many of this module fit in that space, and how?" for cuboid
+items (batteries, tanks) with a clearance gap and a set of allowed
+rotations.  Two complementary searches:
+
+* ``grid_arrangements()`` enumerates every uniform nx x ny x nz block of a
+  single orientation that holds ``count`` items and fits, with no redundant
+  row/column/layer.
+* ``max_items()`` is an exact guillotine dynamic program over the normal
+  patterns (sums of item sizes) of each axis, memoized on the cavity size and
+  pruned by the volume bound and the requested target.  It finds mixed-
+  orientation layouts a single grid cannot.
+
+Clearance ``c`` is the gap between neighbouring items and between items and
+cavity walls, so ``n`` items need ``n * d + (n + 1) * c`` along an axis.
+Internally every item is inflated by ``c`` and every cavity shrunk by ``c``,
+which turns the gap rule into plain tiling.
+
+Axes are (length along the vehicle, width across it, height); rotations keep
+height vertical unless ``rotations="any"``.  Containers are the storage
+cavities of the shared constraint model (see ``constraints.py``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+Dims = Tuple[float, float, float]
+
+ROTATIONS = {
+    "fixed": ((0, 1, 2),),
+    "upright": ((0, 1, 2), (1, 0, 2)),
+    "any": tuple(itertools.permutations(range(3))),
+}
+
+
+@dataclass(frozen=True)
+class Item:
+    """A cuboid module to place: size, gap to keep around it, allowed turns."""
+    name: str
+    dims: Dims  # (length, width, height) in mm
+    clearance: float = 0.0
+    rotations: str = "upright"
+
+    def orientations(self) -> List[Dims]:
+        """Distinct (x, y, z) sizes the item can take."""
+        seen: List[Dims] = []
+        for perm in ROTATIONS[self.rotations]:
+            dims = tuple(self.dims[i] for i in perm)
+            if dims not in seen:
+                seen.append(dims)
+        return seen
+
+
+@dataclass(frozen=True)
+class Container:
+    """An empty cuboid cavity; ``origin`` is its min corner in the zone frame."""
+    name: str
+    dims: Dims  # (length, width, height) in mm
+    source: str = ""
+    origin: Dims = (0.0, 0.0, 0.0)
+
+
+@dataclass(frozen=True)
+class Placement:
+    """One placed item: min corner and size, in container coordinates."""
+    position: Dims
+    dims: Dims
+
+
+@dataclass(frozen=True)
+class GridArrangement:
+    """A uniform block of ``counts`` items in one orientation."""
+    orientation: Dims
+    counts: Tuple[int, int, int]
+    extents: Dims  # block size including clearances
+
+    @property
+    def capacity(self) -> int:
+        return self.counts[0] * self.counts[1] * self.counts[2]
+
+
+@dataclass(frozen=True)
+class PackingResult:
+    item: Item
+    container: Container
+    count: int
+    placements: Tuple[Placement, ...]
+    elapsed_ms: float
+
+    @property
+    def fits(self) -> bool:
+        return len(self.placements) >= self.count
+
+
+# =============================================================================
+# CONTAINERS FROM THE CONSTRAINT MODEL
+# =============================================================================
+
+def load_containers(model=None) -> Dict[str, Container]:
+    """Storage cavities of the constraint model, keyed by short name."""
+    if model is None:
+        from constraints import load_model  # noqa: PLC0415
+
+        model = load_model()
+    return {
+        cavity.name: Container(cavity.name, cavity.dims, cavity.source)
+        for cavity in model.cavities
+    }
+
+
+# =============================================================================
+# UNIFORM GRID ENUMERATION
+# =============================================================================
+
+def grid_arrangements(item: Item, container: Container, count: int) -> List[GridArrangement]:
+    """Every single-orientation grid holding ``count`` items inside ``container``.
+
+    Grids are minimal: removing any row, column or layer would drop below
+    ``count``.  Sorted by footprint, then height.
+    """
+    c = item.clearance
+    space = [d - c for d in container.dims]
+    found: List[GridArrangement] = []
+    for orientation in item.orientations():
+        pitch = [d + c for d in orientation]
+        limits = [int(s // p) for s, p in zip(space, pitch)]
+        if min(limits) == 0:
+            continue
+        for nx in range(1, min(limits[0], count) + 1):
+            for ny in range(1, min(limits[1], math.ceil(count / nx)) + 1):
+                nz = math.ceil(count / (nx * ny))
+                if nz > limits[2]:
+                    continue
+                counts = (nx, ny, nz)
+                # Minimal: dropping one slice on any axis must lose capacity.
+                if any(
+                    (nx * ny * nz) // counts[axis] * (counts[axis] - 1) >= count
+                    for axis in range(3)
+                ):
+                    continue
+                extents = tuple(n * p + c for n, p in zip(counts, pitch))
+                found.append(GridArrangement(orientation, counts, extents))
+    found.sort(key=lambda g: (g.extents[0] * g.extents[1], g.extents[2]))
+    return found
+
+
+# =============================================================================
+# GUILLOTINE DYNAMIC PROGRAM
+# =============================================================================
+
+def _normal_patterns(limit: int, sizes: Tuple[int, ...]) -> Tuple[int, ...]:
+    """All sums of ``sizes`` up to ``limit`` (the only useful cut positions)."""
+    reachable = bytearray(limit + 1)
+    reachable[0] = 1
+    for size in sizes:
+        for value in range(size, limit + 1):
+            if reachable[value - size]:
+                reachable[value] = 1
+    return tuple(v for v in range(limit + 1) if reachable[v])
+
+
+def _floor_to(patterns: Tuple[int, ...], value: int) -> int:
+    # Largest normal pattern <= value (patterns is sorted and starts at 0).
+    lo, hi = 0, len(patterns) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if patterns[mid] <= value:
+            lo = mid
+        else:
+            hi = mid - 1
+    return patterns[lo]
+
+
+def max_items(item: Item, container: Container, target: Optional[int] = None) -> List[Placement]:
+    """Placements for as many items as fit (stopping early at ``target``).
+
+    Exact over guillotine layouts: every layout reachable by recursively
+    slicing the cavity with axis-aligned planes, each piece holding a grid.
+    Sizes are rounded to whole mm in the conservative direction.
+    """
+    c = item.clearance
+    orientations = [tuple(math.ceil(d + c) for d in o) for o in item.orientations()]
+    space = tuple(max(0, int(math.floor(d - c))) for d in container.dims)
+    item_volume = min(o[0] * o[1] * o[2] for o in orientations)
+    cap = target if target is not None else sys.maxsize
+    patterns = tuple(
+        _normal_patterns(space[axis], tuple(sorted({o[axis] for o in orientations})))
+        for axis in range(3)
+    )
+
+    @lru_cache(maxsize=None)
+    def solve(x: int, y: int, z: int) -> Tuple[int, tuple]:
+        bound = min(cap, (x * y * z) // item_volume)
+        best: Tuple[int, tuple] = (0, ("empty",))
+        for index, (ox, oy, oz) in enumerate(orientations):
+            n = (x // ox) * (y // oy) * (z // oz)
+            if n > best[0]:
+                best = (min(n, cap), ("grid", index))
+        if best[0] >= bound:
+            return best
+        for axis, size in enumerate((x, y, z)):
+            for cut in patterns[axis]:
+                if cut == 0:
+                    continue
+                if cut > size // 2:
+                    break
+                rest = _floor_to(patterns[axis], size - cut)
+                a = [x, y, z]
+                b = [x, y, z]
+                a[axis] = cut
+                b[axis] = rest
+                total = solve(*a)[0] + solve(*b)[0]
+                if total > best[0]:
+                    best = (min(total, cap), ("cut", axis, cut, rest))
+                    if best[0] >= bound:
+                        return best
+        return best
+
+    def build(x: int, y: int, z: int, offset: Tuple[int, int, int], out: List[Placement]) -> None:
+        count, plan = solve(x, y, z)
+        if count == 0:
+            return
+        if plan[0] == "grid":
+            ox, oy, oz = orientations[plan[1]]
+            real = item.orientations()[plan[1]]
+            for i, j, k in itertools.product(range(x // ox), range(y // oy), range(z // oz)):
+                if target is not None and len(out) >= target:
+                    return
+                out.append(Placement(
+                    (offset[0] + i * ox + c, offset[1] + j * oy + c, offset[2] + k * oz + c),
+                    real,
+                ))
+            return
+        _, axis, cut, rest = plan
+        a = [x, y, z]
+        b = [x, y, z]
+        a[axis] = cut
+        b[axis] = rest
+        build(*a, offset, out)
+        shifted = list(offset)
+        shifted[axis] += cut
+        build(*b, tuple(shifted), out)
+
+    placements: List[Placement] = []
+    top = tuple(_floor_to(patterns[axis], space[axis]) for axis in range(3))
+    build(*top, (0, 0, 0), placements)
+    return placements
+
+
+def pack(item: Item, container: Container, count: int) -> PackingResult:
+    """Try to place ``count`` items; ``fits`` tells whether all of them went in."""
+    start = time.perf_counter()
+    placements = max_items(item, container, target=count)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    return PackingResult(item, container, count, tuple(placements), elapsed)
+
+
+def capacity(item: Item, container: Container) -> int:
+    """Largest number of items that fit (guillotine layouts)."""
+    return len(max_items(item, container))
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check how many cuboid modules fit in each zone cavity.",
+    )
+    parser.add_argument("--item", type=float, nargs=3, default=(540.0, 250.0, 220.0),
+                        metavar=("L", "W", "H"), help="Item size in mm.")
+    parser.add_argument("--count", type=int, default=6, help="Number of items to place.")
+    parser.add_argument("--clearance", type=float, default=25.0, help="Gap between items and walls in mm.")
+    parser.add_argument("--rotations", choices=sorted(ROTATIONS), default="upright",
+                        help="Allowed rotations (upright keeps height vertical).")
+    parser.add_argument("--container", action="append",
+                        help="Container name (repeatable); default is every zone cavity.")
+    parser.add_argument("--box", type=float, nargs=3, metavar=("L", "W", "H"),
+                        help="Check an ad-hoc cavity instead of the zone files.")
+    args = parser.parse_args()
+
+    item = Item("item", tuple(args.item), args.clearance, args.rotations)
+    if args.box:
+        containers = {"box": Container("box", tuple(args.box), "command line")}
+    else:
+        containers = load_containers()
+        if args.container:
+            unknown = [name for name in args.container if name not in containers]
+            if unknown:
+                print(f"Unknown container(s): {', '.join(unknown)}; known: {', '.join(containers)}")
+                return 1
+            containers = {name: containers[name] for name in args.container}
+
+    print(f"Item {item.dims[0]:g} x {item.dims[1]:g} x {item.dims[2]:g} mm, "
+          f"clearance {item.clearance:g} mm, rotations={item.rotations}, count={args.count}")
+    for container in containers.values():
+        result = pack(item, container, args.count)
+        total = capacity(item, container)
+        grids = grid_arrangements(item, container, args.count)
+        status = "FITS" if result.fits else "FAIL"
+        dims = " x ".join(f"{d:g}" for d in container.dims)
+        print(f"\n{container.name} ({dims} mm) [{container.source}]")
+        print(f"  {status}: {len(result.placements)}/{args.count} placed, "
+              f"max {total} ({result.elapsed_ms:.1f} ms)")
+        for grid in grids:
+            o = " x ".join(f"{d:g}" for d in grid.orientation)
+            e = " x ".join(f"{d:g}" for d in grid.extents)
+            print(f"  grid {grid.counts[0]}x{grid.counts[1]}x{grid.counts[2]} of [{o}] -> {e} mm")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Monte Carlo payload loading on top of the mass-balance model.
+
+The balance solvers only see the installed systems.  Real trips add gear in
+the garage shell, food in the kitchen, clothing and (when parked) people.
+Each zone YAML can carry a ``payload:`` list describing that load::
+
+    payload:
+      - name: food_and_drinks
+        mass: {distribution: triangular, min: 10, mode: 25, max: 60}
+        x: [1280, 3580]      # mm from rear wall, uniform over the range
+        y: [540, 1140]       # mm lateral, driver negative
+        probability: 1.0     # chance the load is aboard at all
+        modes: [travel, camp]
+
+Distributions are ``fixed`` (value), ``uniform`` (min, max), ``triangular``
+(min, mode, max) and ``normal`` (mean, sd, optional min/max clip).
+
+Samples are drawn in batches across a process pool and reduced to three
+columns per sample (payload mass, lateral and longitudinal moment).  Payload
+does not depend on where the systems sit, so one sample set is shared by
+every candidate layout: comparing layouts is a vector add per layout.
+Reported per layout are percentiles of
+
+* roll moment (lateral moment about the centreline, kg*m)
+* with ``--wheelbase``, front and rear axle load added by the systems plus
+  payload (kg); the chassis and habitat box tare are not modelled
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from constraints import PAYLOAD_MODES as MODES
+from constraints import ConstraintModel, PayloadSource, load_model
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_SAMPLES = 200_000
+BATCH_SIZE = 50_000
+PERCENTILES = (1, 5, 50, 95, 99)
+
+
+@dataclass(frozen=True)
+class Layout:
+    """A candidate placement reduced to its base mass and moments."""
+    name: str
+    mass: float  # kg
+    lateral: float  # kg*m
+    longitudinal: float  # kg*m about the rear axle
+
+
+@dataclass
+class PayloadSamples:
+    mass: np.ndarray  # kg
+    lateral: np.ndarray  # kg*m
+    longitudinal: np.ndarray  # kg*m about the rear axle
+    elapsed_s: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return self.mass.size
+
+
+@dataclass
+class LayoutStats:
+    layout: Layout
+    roll: Dict[int, float] = field(default_factory=dict)
+    front_axle: Dict[int, float] = field(default_factory=dict)
+    rear_axle: Dict[int, float] = field(default_factory=dict)
+    worst_roll: float = 0.0
+
+
+# =============================================================================
+# SAMPLING
+# =============================================================================
+
+def load_payload(mode: str = "travel", model: Optional[ConstraintModel] = None) -> List[PayloadSource]:
+    """Zone payload entries of the constraint model that apply in ``mode``."""
+    model = model or load_model()
+    return [source for source in model.payload if mode == "all" or mode in source.modes]
+
+
+def _draw_mass(source: PayloadSource, rng: np.random.Generator, n: int) -> np.ndarray:
+    p = source.param
+    if source.distribution == "fixed":
+        mass = np.full(n, p("value", p("mean", 0.0)))
+    elif source.distribution == "uniform":
+        mass = rng.uniform(p("min"), p("max"), n)
+    elif source.distribution == "triangular":
+        mass = rng.triangular(p("min"), p("mode"), p("max"), n)
+    else:
+        mass = rng.normal(p("mean"), p("sd"), n)
+        lo, hi = p("min", 0.0), p("max")
+        np.clip(mass, lo, hi if hi is not None else np.inf, out=mass)
+    if source.probability < 1.0:
+        mass *= rng.random(n) < source.probability
+    return mass
+
+
+def _sample_batch(job: Tuple[Sequence[PayloadSource], int, float, np.random.SeedSequence]) -> np.ndarray:
+    """(3, n) array of payload mass, lateral and longitudinal moment."""
+    sources, n, axle_x, seed = job
+    rng = np.random.default_rng(seed)
+    out = np.zeros((3, n))
+    for source in sources:
+        mass = _draw_mass(source, rng, n)
+        x = rng.uniform(source.x[0], source.x[1], n)
+        y = rng.uniform(source.y[0], source.y[1], n)
+        out[0] += mass
+        out[1] += mass * y
+        out[2] += mass * (x - axle_x)
+    out[1:] /= 1000.0
+    return out
+
+
+def simulate(
+    sources: Sequence[PayloadSource],
+    axle_x: float,
+    samples: int = DEFAULT_SAMPLES,
+    workers: Optional[int] = None,
+    seed: int = 0,
+) -> PayloadSamples:
+    """Draw ``samples`` payload states in batches across ``workers`` processes."""
+    start = time.perf_counter()
+    sizes = [BATCH_SIZE] * (samples // BATCH_SIZE)
+    if samples % BATCH_SIZE:
+        sizes.append(samples % BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(tuple(sources), n, axle_x, s) for n, s in zip(sizes, seeds)]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    if workers == 1:
+        parts = [_sample_batch(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_sample_batch, jobs))
+    data = np.concatenate(parts, axis=1)
+    return PayloadSamples(data[0], data[1], data[2], time.perf_counter() - start)
+
+
+# =============================================================================
+# LAYOUTS
+# =============================================================================
+
+def optimizer_layouts(catalogue_path: Optional[Path] = None) -> Tuple[List[Layout], float]:
+    """Every Pareto-front assignment from balance_optimizer, plus the axle x."""
+    from balance_optimizer import default_catalogue, load_catalogue, optimize  # noqa: PLC0415
+
+    catalogue = load_catalogue(catalogue_path) if catalogue_path else default_catalogue()
+    base_mass = sum(f.mass for f in catalogue.fixed) + sum(i.mass for i in catalogue.items)
+    layouts = [
+        Layout(f"front-{number}", base_mass, a.lateral_moment, a.longitudinal_moment)
+        for number, a in enumerate(optimize(catalogue), 1)
+    ]
+    return layouts, catalogue.axle_x
+
+
+def layout_stats(layout: Layout, payload: PayloadSamples, wheelbase: Optional[float] = None) -> LayoutStats:
+    """Percentiles for ``layout``; the axle split is left empty without a wheelbase."""
+    roll = layout.lateral + payload.lateral
+    columns = [("roll", roll)]
+    if wheelbase:
+        front = (layout.longitudinal + payload.longitudinal) * 1000.0 / wheelbase
+        rear = layout.mass + payload.mass - front
+        columns += [("front_axle", front), ("rear_axle", rear)]
+    stats = LayoutStats(layout, worst_roll=float(np.abs(roll).max()))
+    for name, values in columns:
+        getattr(stats, name).update(zip(PERCENTILES, np.percentile(values, PERCENTILES)))
+    return stats
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo payload loading per candidate layout.",
+    )
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Payload states to draw.")
+    parser.add_argument("--mode", choices=MODES + ("all",), default="travel",
+                        help="Which payload entries apply (occupants are camp-only).")
+    parser.add_argument("--catalogue", type=Path,
+                        help="balance_optimizer catalogue YAML (default: solver constants).")
+    parser.add_argument("--wheelbase", type=float, default=None,
+                        help="Wheelbase in mm, to report the front/rear axle split.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    sources = load_payload(args.mode)
+    if not sources:
+        print(f"No payload entries for mode '{args.mode}' in the zone files")
+        return 1
+    layouts, axle_x = optimizer_layouts(args.catalogue)
+
+    print(f"{len(sources)} payload sources ({args.mode}):")
+    for source in sources:
+        print(f"  {source.zone:9s} {source.name:20s} {source.distribution:10s} p={source.probability:.2f}")
+
+    payload = simulate(sources, axle_x, args.samples, args.workers, args.seed)
+    rate = payload.count / payload.elapsed_s / 1e6 if payload.elapsed_s else float("inf")
+    print(f"\n{payload.count:,} samples in {payload.elapsed_s * 1000:.0f} ms ({rate:.1f} M/s); "
+          f"payload p50 {np.percentile(payload.mass, 50):.0f} kg, "
+          f"p99 {np.percentile(payload.mass, 99):.0f} kg")
+
+    header = "  ".join(f"{f'p{p}':>7s}" for p in PERCENTILES)
+    for layout in layouts:
+        stats = layout_stats(layout, payload, args.wheelbase)
+        print(f"\n{layout.name}: base {layout.mass:.0f} kg, lateral {layout.lateral:+.1f} kg*m, "
+              f"longitudinal {layout.longitudinal:+.1f} kg*m")
+        print(f"  {'':16s}{header}")
+        for label, values in (("roll kg*m", stats.roll),
+                              ("front axle kg", stats.front_axle),
+                              ("rear axle kg", stats.rear_axle)):
+            if not values:
+                continue
+            print(f"  {label:16s}" + "  ".join(f"{values[p]:+7.1f}" for p in PERCENTILES))
+        print(f"  worst |roll| {stats.worst_roll:.1f} kg*m")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Evaluate every placement check for every design variant in one table.
+
+The solver scripts (water_tank_solver, battery_layout_solver,
+electrical_placement, alde_placement_solver, mass_balance_solver) each answer
+one question for one hand-picked design.  This runner reads a YAML file of
+variants (see ``scenarios/example.yml``), builds each variant's storage
+cavities from the constraint model, and applies the same rules to all of
+them:
+
+* fit       -- every system fits its cavity's cross-section and the items
+               sharing a cavity fit its length (balance_optimizer's rule)
+* electrical-- inverter height plus airflow clearance (electrical_placement)
+* alde      -- coolant run from the front wall (alde_placement_solver)
+* balance   -- lateral and longitudinal moments in travel mode, diesel full
+               and grey empty (mass_balance_solver / balance_optimizer)
+
+No geometry is built, so nothing imports cadquery.  Variants are split into
+chunks across a process pool and the rows are written to one CSV.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SCENARIOS = REPO_ROOT / "scenarios" / "example.yml"
+DEFAULT_OUTPUT = REPO_ROOT / "tmp" / "scenario_results.csv"
+
+# Below this many variants a pool costs more than it saves.
+MIN_PARALLEL_VARIANTS = 2000
+PARAMETERS = (
+    "shell_depth",
+    "tank_option",
+    "tank_locations",
+    "battery_location",
+    "inverter_location",
+    "alde_location",
+)
+
+
+@dataclass(frozen=True)
+class Variant:
+    name: str
+    shell_depth: float
+    tank_option: str
+    tank_locations: Tuple[str, ...]
+    battery_location: str
+    inverter_location: str
+    alde_location: str
+
+
+# =============================================================================
+# VARIANT FILE
+# =============================================================================
+
+def _variant(name: str, params: Dict[str, Any]) -> Variant:
+    missing = [key for key in PARAMETERS if key not in params]
+    if missing:
+        raise ValueError(f"variant {name}: missing {', '.join(missing)}")
+    return Variant(
+        name=name,
+        shell_depth=float(params["shell_depth"]),
+        tank_option=str(params["tank_option"]),
+        tank_locations=tuple(params["tank_locations"]),
+        battery_location=str(params["battery_location"]),
+        inverter_location=str(params["inverter_location"]),
+        alde_location=str(params["alde_location"]),
+    )
+
+
+def load_variants(path: Path) -> List[Variant]:
+    """``base`` + cartesian ``sweep`` + named ``variants`` from a YAML file."""
+    import yaml  # noqa: PLC0415
+
+    with path.open("r", encoding="utf-8") as handle:
+        data = yaml.safe_load(handle) or {}
+    base = data.get("base") or {}
+    unknown = set(base) | set(data.get("sweep") or {})
+    unknown -= set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"{path.name}: unknown parameters {', '.join(sorted(unknown))}")
+
+    variants = []
+    sweep = data.get("sweep") or {}
+    if sweep:
+        keys = list(sweep)
+        for number, values in enumerate(itertools.product(*(sweep[k] for k in keys)), 1):
+            variants.append(_variant(f"sweep-{number:05d}", {**base, **dict(zip(keys, values))}))
+    elif base:
+        variants.append(_variant("base", base))
+    for entry in data.get("variants") or []:
+        params = dict(entry)
+        variants.append(_variant(str(params.pop("name")), {**base, **params}))
+    return variants
+
+
+# =============================================================================
+# CHECKS
+# =============================================================================
+
+class _Context:
+    """Per-process inputs shared by every variant: model, catalogue, solver constants."""
+
+    def __init__(self) -> None:
+        from alde_placement_solver import ENGINE_COOLANT_MAX_LEN  # noqa: PLC0415
+        from balance_optimizer import MovableItem, default_catalogue  # noqa: PLC0415
+        from constraints import load_model  # noqa: PLC0415
+        from electrical_placement import INV_CLEARANCE, INV_H, INV_L, INV_MASS, INV_W  # noqa: PLC0415
+        from water_tank_solver import (  # noqa: PLC0415
+            CLEARANCE,
+            OPT_A_H,
+            OPT_A_L,
+            OPT_A_MASS,
+            OPT_A_W,
+            OPT_B_H,
+            OPT_B_L,
+            OPT_B_MASS,
+            OPT_B_W,
+        )
+
+        self.model = load_model()
+        catalogue = default_catalogue()
+        items = {item.name: item for item in catalogue.items}
+        self.fixed = catalogue.fixed
+        self.axle_x = catalogue.axle_x
+        self.battery = items["battery_bank"]
+        self.alde = items["alde"]
+        self.inverter = MovableItem("inverter", INV_MASS, (INV_L, INV_W, INV_H), INV_CLEARANCE)
+        standard = MovableItem("water_tank", OPT_B_MASS, (OPT_B_L, OPT_B_W, OPT_B_H), CLEARANCE)
+        self.tank_options = {
+            "A": (MovableItem("water_tank", OPT_A_MASS, (OPT_A_L, OPT_A_W, OPT_A_H), CLEARANCE),),
+            "B": (standard, replace(standard, name="water_tank_2")),
+            "B_low": (standard, items["water_tank_2"]),
+        }
+        self.coolant_max = ENGINE_COOLANT_MAX_LEN
+        self._locations: Dict[float, Dict[str, Any]] = {}
+
+    def locations(self, shell_depth: float) -> Dict[str, Any]:
+        """balance_optimizer Locations for a garage shell of ``shell_depth``."""
+        if shell_depth not in self._locations:
+            from balance_optimizer import Location, cavity_locations  # noqa: PLC0415
+
+            model = self.model
+            half = model.habitat.half_width
+            inner = shell_depth - 2 * model.garage_wall_thickness
+            cavities = []
+            for cavity in model.cavities:
+                if cavity.name in ("garage_driver_arm", "garage_passenger_arm"):
+                    sign = -1.0 if cavity.y < 0 else 1.0
+                    cavity = replace(
+                        cavity, dims=(inner, inner, cavity.dims[2]),
+                        x=shell_depth / 2, y=sign * (half - shell_depth / 2),
+                    )
+                elif cavity.name == "garage_center":
+                    cavity = replace(cavity, dims=(cavity.dims[0], model.habitat.width - 2 * shell_depth, cavity.dims[2]))
+                elif "_side_bench" in cavity.name:
+                    cavity = replace(cavity, x=shell_depth + cavity.dims[0] / 2)
+                cavities.append(cavity)
+            names = [cavity.name for cavity in cavities]
+            locations = {loc.name: loc for loc in cavity_locations(cavities, names)}
+
+            # Driver-side front corner under the bathroom vanity, sized as
+            # alde_placement_solver's service bay.
+            from alde_placement_solver import SERVICE_BAY_H, SERVICE_BAY_L, SERVICE_BAY_W  # noqa: PLC0415
+
+            bath = model.zone("ZONE-001").box
+            locations["bathroom_vanity"] = Location(
+                "bathroom_vanity", bath.x_max - SERVICE_BAY_W / 2, -half + SERVICE_BAY_L / 2,
+                SERVICE_BAY_W, SERVICE_BAY_L, SERVICE_BAY_H,
+            )
+            self._locations[shell_depth] = locations
+        return self._locations[shell_depth]
+
+
+_CONTEXT: Optional[_Context] = None
+
+
+def _context() -> _Context:
+    global _CONTEXT
+    if _CONTEXT is None:
+        _CONTEXT = _Context()
+    return _CONTEXT
+
+
+def evaluate(variant: Variant) -> Dict[str, Any]:
+    """One results row for ``variant``."""
+    from balance_optimizer import item_length  # noqa: PLC0415
+
+    ctx = _context()
+    locations = ctx.locations(variant.shell_depth)
+    failures: List[str] = []
+
+    tanks = ctx.tank_options.get(variant.tank_option)
+    if tanks is None:
+        raise ValueError(f"variant {variant.name}: unknown tank_option {variant.tank_option!r}")
+    if len(variant.tank_locations) < len(tanks):
+        raise ValueError(f"variant {variant.name}: {len(tanks)} tanks need {len(tanks)} tank_locations")
+    placement = list(zip(tanks, variant.tank_locations))
+    placement += [
+        (ctx.battery, variant.battery_location),
+        (ctx.inverter, variant.inverter_location),
+        (ctx.alde, variant.alde_location),
+    ]
+
+    # Fit: cross-section per item, summed length per location.
+    used: Dict[str, float] = {}
+    lateral = sum(f.mass * f.y for f in ctx.fixed) / 1000.0
+    longitudinal = sum(f.mass * (f.x - ctx.axle_x) for f in ctx.fixed) / 1000.0
+    for item, name in placement:
+        location = locations.get(name)
+        if location is None:
+            raise ValueError(f"variant {variant.name}: unknown location {name!r}")
+        need = item_length(item, location)
+        if need is None:
+            failures.append(f"{item.name} does not fit {name}")
+        else:
+            used[name] = used.get(name, 0.0) + need
+        lateral += item.mass * location.y / 1000.0
+        longitudinal += item.mass * (location.x - ctx.axle_x) / 1000.0
+    for name, length in used.items():
+        if length > locations[name].length:
+            failures.append(f"{name} over length by {length - locations[name].length:.0f} mm")
+
+    # Alde: coolant run from the front wall to the front of its location.
+    alde_loc = locations[variant.alde_location]
+    coolant = ctx.model.habitat.length - (alde_loc.x + alde_loc.length / 2)
+    if coolant > ctx.coolant_max:
+        failures.append(f"alde coolant run {coolant:.0f} mm > {ctx.coolant_max:.0f} mm")
+
+    return {
+        "variant": variant.name,
+        "shell_depth": variant.shell_depth,
+        "tank_option": variant.tank_option,
+        "tank_locations": "+".join(variant.tank_locations[:len(tanks)]),
+        "battery_location": variant.battery_location,
+        "inverter_location": variant.inverter_location,
+        "alde_location": variant.alde_location,
+        "fits": not failures,
+        "water_kg": sum(tank.mass for tank in tanks),
+        "lateral_kgm": round(lateral, 1),
+        "longitudinal_kgm": round(longitudinal, 1),
+        "alde_coolant_mm": round(coolant),
+        "failures": "; ".join(failures),
+    }
+
+
+def _evaluate_chunk(variants: Sequence[Variant]) -> List[Dict[str, Any]]:
+    return [evaluate(variant) for variant in variants]
+
+
+def run(variants: Sequence[Variant], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Rows for every variant, in input order."""
+    if workers is None:
+        workers = os.cpu_count() or 1 if len(variants) >= MIN_PARALLEL_VARIANTS else 1
+    workers = max(1, min(workers, len(variants)))
+    if workers == 1:
+        return _evaluate_chunk(variants)
+    # Contiguous chunks keep the output order without a sort.
+    size = -(-len(variants) // workers)
+    chunks = [variants[start:start + size] for start in range(0, len(variants), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [row for part in pool.map(_evaluate_chunk, chunks) for row in part]
+
+
+def write_results(rows: Sequence[Dict[str, Any]], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run every placement check over a file of design variants.")
+    parser.add_argument("scenarios", type=Path, nargs="?", default=DEFAULT_SCENARIOS, help="Variants YAML.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Results CSV.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Worker processes (default: CPU count from {MIN_PARALLEL_VARIANTS} variants).")
+    parser.add_argument("--top", type=int, default=10, help="Fitting variants to list, best balance first.")
+    args = parser.parse_args()
+
+    try:
+        variants = load_variants(args.scenarios)
+        start = time.perf_counter()
+        rows = run(variants, args.workers)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 1
+    elapsed = time.perf_counter() - start
+    if not rows:
+        print(f"No variants in {args.scenarios}")
+        return 1
+    write_results(rows, args.output)
+
+    fitting = [row for row in rows if row["fits"]]
+    print(f"{len(rows)} variants in {elapsed * 1000:.0f} ms: {len(fitting)} fit")
+    print(f"Results: {args.output}")
+    fitting.sort(key=lambda row: (abs(row["lateral_kgm"]), abs(row["longitudinal_kgm"])))
+    for row in fitting[:args.top]:
+        print(f"  {row['variant']:22s} shell {row['shell_depth']:4.0f} tanks {row['tank_option']:5s} "
+              f"{row['tank_locations']:40s} batt {row['battery_location']:18s} "
+              f"lat {row['lateral_kgm']:+7.1f} lon {row['longitudinal_kgm']:+7.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
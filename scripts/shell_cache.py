@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Load the reference habitat shell through a persistent BREP cache.
+
+Parsing the STEP file dominates the runtime of every script that needs the
+shell.  The first load writes a native OCCT BREP file next to the STEP file;
+later loads read that instead.  The cache file name carries the STEP content
+hash and the OCCT version, so editing the STEP file or upgrading OCP makes the
+old cache invisible and it is rebuilt (and the stale file removed).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.metadata
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_STEP = REPO_ROOT / "reference" / "Osterath_Habitat_1225 AF.step"
+
+CACHE_SUFFIX = ".brep"
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def occt_version() -> str:
+    """Return the OCP/OCCT version string used to write BREP files."""
+    try:
+        import OCP  # noqa: PLC0415
+    except ImportError:
+        return "unknown"
+    version = getattr(OCP, "__version__", None)
+    if version:
+        return str(version)
+    for dist in ("cadquery-ocp", "ocp"):
+        try:
+            return importlib.metadata.version(dist)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return "unknown"
+
+
+def cache_key(step_path: Path) -> str:
+    """Cache key combining the STEP content hash and the OCCT version."""
+    version = occt_version().replace(".", "_")
+    return f"{file_digest(step_path)[:16]}-occt{version}"
+
+
+def cache_path(step_path: Path, key: Optional[str] = None) -> Path:
+    """Path of the BREP cache file that sits next to ``step_path``."""
+    key = key or cache_key(step_path)
+    return step_path.with_name(f"{step_path.stem}.{key}{CACHE_SUFFIX}")
+
+
+def _stale_caches(step_path: Path, current: Path) -> list:
+    pattern = f"{step_path.stem}.*{CACHE_SUFFIX}"
+    return [p for p in step_path.parent.glob(pattern) if p != current]
+
+
+def import_step_shape(step_path: Path):
+    """Parse a STEP file and return a single shape (compound if needed)."""
+    import cadquery as cq  # noqa: PLC0415
+    from cadquery import importers  # noqa: PLC0415
+
+    model = importers.importStep(str(step_path))
+    shapes = model.vals() if isinstance(model, cq.Workplane) else [model]
+    if len(shapes) == 1:
+        return shapes[0]
+    return cq.Compound.makeCompound(shapes)
+
+
+def load_shell(step_path: Path = DEFAULT_STEP, use_cache: bool = True):
+    """Load the habitat shell as a ``cadquery.Shape``, using the BREP cache.
+
+    A missing or unwritable cache (e.g. a read-only mount) only costs the
+    STEP parse; it never fails the load.
+    """
+    import cadquery as cq  # noqa: PLC0415
+
+    step_path = Path(step_path)
+    if not use_cache:
+        return import_step_shape(step_path)
+
+    brep = cache_path(step_path)
+    if brep.exists():
+        try:
+            return cq.Shape.importBrep(str(brep))
+        except Exception:  # noqa: BLE001 - corrupt cache, rebuild below
+            pass
+
+    shape = import_step_shape(step_path)
+    try:
+        tmp = brep.with_name(brep.name + ".tmp")
+        shape.exportBrep(str(tmp))
+        tmp.replace(brep)
+        for stale in _stale_caches(step_path, brep):
+            stale.unlink()
+    except OSError:
+        pass
+    return shape
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Build or inspect the BREP cache for the habitat STEP file.",
+    )
+    parser.add_argument(
+        "--step",
+        type=Path,
+        default=DEFAULT_STEP,
+        help="Path to the STEP file.",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Delete the current cache file before loading.",
+    )
+    args = parser.parse_args()
+    import cadquery  # noqa: F401, PLC0415 (keep OCP import out of the timing)
+
+    brep = cache_path(args.step)
+    if args.rebuild and brep.exists():
+        brep.unlink()
+
+    start = time.perf_counter()
+    shape = load_shell(args.step)
+    elapsed = time.perf_counter() - start
+    print(f"Cache file: {brep}")
+    print(f"Loaded {shape.ShapeType()} with {len(shape.Solids())} solids in {elapsed:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Cold and warm import time of every entry point.
+
+Each script under ``scripts/`` with a ``__main__`` block, plus
+``cad.modules.common``, is imported in a fresh interpreter:
+
+* cold -- the first import in that process, dependencies included (the best
+  of ``--repeat`` processes, so bytecode compilation is not counted)
+* warm -- the same module imported again in that process after dropping it
+  from ``sys.modules``, i.e. its own body with every dependency loaded
+
+The heavy dependencies a module pulled in (OCP, scipy, ...) are listed so
+regressions such as a top-level ``import cadquery`` show up.  Results are
+written to ``tmp/startup_benchmark.csv``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+DEFAULT_OUTPUT = REPO_ROOT / "tmp" / "startup_benchmark.csv"
+EXTRA_MODULES = ("cad.modules.common",)
+HEAVY_MODULES = ("OCP", "cadquery", "scipy", "vtkmodules", "yaml", "numpy")
+TIMEOUT = 120  # seconds per process
+
+_PROBE = """
+import importlib, json, sys, time
+sys.path[:0] = [{scripts!r}, {root!r}]
+name = {name!r}
+start = time.perf_counter()
+importlib.import_module(name)
+cold = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+del sys.modules[name]
+start = time.perf_counter()
+importlib.import_module(name)
+warm = time.perf_counter() - start
+print(json.dumps({{"cold": cold, "warm": warm, "heavy": heavy}}))
+"""
+
+
+@dataclass(frozen=True)
+class StartupTime:
+    module: str
+    cold_ms: float
+    warm_ms: float
+    heavy: tuple  # heavy dependencies loaded by the import
+    error: str = ""
+
+
+def entry_points() -> List[str]:
+    """Module names of the scripts with a ``__main__`` block, plus EXTRA_MODULES."""
+    names = [
+        path.stem for path in sorted(SCRIPTS_DIR.glob("*.py"))
+        if path.stem != Path(__file__).stem and "__main__" in path.read_text(encoding="utf-8")
+    ]
+    return names + list(EXTRA_MODULES)
+
+
+def measure(module: str, repeat: int = 3) -> StartupTime:
+    """Best cold and warm import time of ``module`` over ``repeat`` processes."""
+    probe = _PROBE.format(scripts=str(SCRIPTS_DIR), root=str(REPO_ROOT), name=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(max(repeat, 1)):
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-c", probe], cwd=REPO_ROOT, capture_output=True, text=True, timeout=TIMEOUT,
+            )
+        except subprocess.TimeoutExpired:
+            return StartupTime(module, float("nan"), float("nan"), (), f"timeout after {TIMEOUT}s")
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return StartupTime(module, float("nan"), float("nan"), (), lines[-1] if lines else "failed")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return StartupTime(
+        module,
+        min(r["cold"] for r in runs) * 1000.0,
+        min(r["warm"] for r in runs) * 1000.0,
+        tuple(runs[-1]["heavy"]),
+    )
+
+
+def write_csv(results: Sequence[StartupTime], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["module", "cold_ms", "warm_ms", "heavy", "error"])
+        for r in results:
+            writer.writerow([r.module, f"{r.cold_ms:.1f}", f"{r.warm_ms:.1f}", " ".join(r.heavy), r.error])
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record cold and warm import time of every entry point.")
+    parser.add_argument("modules", nargs="*", help="Modules to measure (default: every entry point).")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per module.")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="CSV to write.")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or entry_points()
+    print(f"{'module':28s} {'cold ms':>9s} {'warm ms':>9s}  heavy imports")
+    results = []
+    for module in modules:
+        result = measure(module, args.repeat)
+        results.append(result)
+        if result.error:
+            print(f"{module:28s} {'-':>9s} {'-':>9s}  ERROR {result.error}")
+        else:
+            heavy = " ".join(m for m in result.heavy if m not in ("numpy", "yaml"))
+            print(f"{module:28s} {result.cold_ms:9.1f} {result.warm_ms:9.2f}  {heavy}")
+    write_csv(results, args.output)
+    print(f"\nWrote {args.output}")
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
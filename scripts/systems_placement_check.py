@@ -1,9 +1,10 @@
+from constraints import load_model
 
-import cadquery as cq
+MODEL = load_model()
 
 # --- Parameters ---
-AXLE_X = 2380.0
-AXLE_TOLERANCE = 300.0  # Range: 2080 - 2680
+AXLE_X = MODEL.habitat.rear_axle_x
+AXLE_TOLERANCE = MODEL.habitat.axle_tolerance  # Target zone: AXLE_X +/- AXLE_TOLERANCE
 
 # Systems
 # Water Option B (Split)
@@ -12,95 +13,116 @@ TANK_W = 500.0
 TANK_H = 560.0
 TANK_MASS = 250.0 # Each
 
+# Custom low-profile tank for the driver bench (Solution B below)
+LOW_TANK_VOLUME_L = 250.0
+LOW_TANK_W = 500.0
+LOW_TANK_H = 400.0
+
 # Batteries (6x modules)
 BAT_L = 540.0
 BAT_W = 250.0
 BAT_H = 220.0
 BAT_MASS = 50.0
 TOTAL_BAT_MASS = 300.0
+BAT_CLEARANCE = 50.0  # Above the modules
 
-# Furniture / Zones geometry (Approximate X ranges from Rear Wall = 0)
-# Length = 4780
-# Rear Wall = 0
-# Front Wall = 4780
+# Furniture / Zones geometry (X ranges from Rear Wall = 0, Front Wall = habitat length)
+# All spans below come from the constraint model, see scripts/constraints.py.
 
-# ZONE-003 Garage Shell (High Bench, H=860)
-# Location: Rear. Depth 600mm.
-GARAGE_X_START = 0
-GARAGE_X_END = 600
-GARAGE_H = 860
-# Valid for tanks/batteries height-wise (H > 560).
-# Invalid for location (600 < 2080).
+# ZONE-003 Garage Shell (High Bench)
+# Location: Rear. Valid for tanks/batteries height-wise, but ends well
+# before the axle zone.
+GARAGE_X_START = MODEL.zone("ZONE-003").box.x_min
+GARAGE_X_END = MODEL.zone("ZONE-003").box.x_max
+GARAGE_H = MODEL.zone("ZONE-003").box.z_max
 
 # ZONE-005 Living/Dinette (Driver Side)
-# Location: Forward of Garage. X = 600 to ??
-# Seats: H = 450 mm.
-# Tank H (560) > Seat H (450).
-# BAT H (220) < Seat H (450). -> BATTERIES FIT UNDER SEATS!
+# Bench cavity under the seat; its height is the seat height.
+BENCH = MODEL.cavity("driver_side_bench")
 
 # ZONE-002 Kitchen (Passenger Side)
-# Location: Forward of Garage? Or does it start later?
-# "Behind bathroom". Bath is at Front (4780, depth 800) -> Ends at 3980.
-# Kitchen starts at 3980? Runs rearward?
-# Zone-002 file: "from_front: 1200". Front=4780. So starts at 3580?
-# Depth 2300. 3580 - 2300 = 1280.
-# So Kitchen spans X = 1280 to 3580.
-# Overlaps Axle (2380)? YES.
-# Height: 900 (Countertop).
-# Tank H (560) < Counter H (900). -> TANKS FIT IN KITCHEN!
-# Batteries H (220) < Counter H (900). -> BATTERIES FIT IN KITCHEN!
+# Base cabinets under the counter.
+KITCHEN = MODEL.cavity("kitchen_base")
+
+
+def cavity_span(cavity):
+    """(x_start, x_end) of a cavity along the length."""
+    return cavity.x - cavity.dims[0] / 2, cavity.x + cavity.dims[0] / 2
+
+
+def axle_position(cavity, length):
+    """Centre X of a part of ``length`` slid as close to the axle as the cavity allows.
+
+    Returns None when the part is longer than the cavity.
+    """
+    start, end = cavity_span(cavity)
+    lo, hi = start + length / 2, end - length / 2
+    if lo > hi:
+        return None
+    return min(max(AXLE_X, lo), hi)
+
+
+def describe_position(cavity, length):
+    """One report line on where a part of ``length`` sits relative to the axle zone."""
+    start, end = cavity_span(cavity)
+    centre = axle_position(cavity, length)
+    if centre is None:
+        return f" - Location: Does NOT fit longitudinally ({length:g}mm > cavity {end - start:g}mm)."
+    offset = centre - AXLE_X
+    if abs(offset) <= AXLE_TOLERANCE:
+        return f" - Location: Centered at X={centre:g} (axle {offset:+g}mm, inside zone)."
+    return (f" - Location: Best X={centre:g} (axle {offset:+g}mm, OUTSIDE zone; "
+            f"cavity spans X={start:g} to {end:g}).")
+
 
 def check_placement():
     results = []
     results.append(f"TARGET AXLE ZONE: X = {AXLE_X} +/- {AXLE_TOLERANCE} ({AXLE_X - AXLE_TOLERANCE} to {AXLE_X + AXLE_TOLERANCE})")
 
     # 1. WATER TANKS (2x)
-    # Tank 1: Passenger Side (Kitchen)
-    # Kitchen spans 1280 - 3580.
-    # Axle is 2380.
-    # PERFECT FIT.
-    results.append("WATER TANK 1 (Passenger): Fits in Kitchen Base Cabinet.")
-    results.append(" - Location: Centered at X=2380.")
-    results.append(" - Height Clearance: 560mm < 900mm.")
-    
-    # Tank 2: Driver Side (Dinette)
-    # Dinette Bench spans X = 600 to 2600 (length 2000).
-    # Axle (2380) is under the Dinette Bench.
-    # Height Constraint: Seat Height = 450mm.
-    # Tank Height = 560mm.
-    # CONFLICT: Tank is taller than the seat.
+    # Tank 1: Passenger Side (Kitchen base cabinets)
+    kitchen_h = KITCHEN.dims[2]
+    kitchen_ok = axle_position(KITCHEN, TANK_L) is not None and TANK_H < kitchen_h
+    results.append(f"WATER TANK 1 (Passenger): {'Fits' if kitchen_ok else 'CONFLICT'} in Kitchen Base Cabinet.")
+    results.append(describe_position(KITCHEN, TANK_L))
+    results.append(f" - Height Clearance: {TANK_H:g}mm {'<' if TANK_H < kitchen_h else '>='} {kitchen_h:g}mm.")
+
+    # Tank 2: Driver Side (Dinette bench)
+    seat_h = BENCH.dims[2]
+    bench_start, bench_end = cavity_span(BENCH)
     results.append("WATER TANK 2 (Driver): CONFLICT.")
-    results.append(" - Location: Fits longitudinally (X=2380 is under bench).")
-    results.append(" - Height Conflict: Tank (560mm) > Seat (450mm).")
+    results.append(describe_position(BENCH, TANK_L))
+    if bench_end < AXLE_X - AXLE_TOLERANCE:
+        results.append(f" - Bench ends at X={bench_end:g}, {AXLE_X - AXLE_TOLERANCE - bench_end:g}mm short of the axle zone.")
+    if TANK_H > seat_h:
+        results.append(f" - Height Conflict: Tank ({TANK_H:g}mm) > Seat ({seat_h:g}mm).")
     results.append(" - Solution A: Raise bench to 600mm? (Uncomfortable).")
     results.append(" - Solution B: Custom Tank (Lower/Wider)?")
-    results.append("   - If H=400, Vol=250L -> Area = 0.25 / 0.4 = 0.625 m2.")
-    results.append("   - If W=500mm, Length = 1250mm. (Fits length-wise).")
+    area = LOW_TANK_VOLUME_L / 1000.0 / (LOW_TANK_H / 1000.0)
+    low_l = area / (LOW_TANK_W / 1000.0) * 1000.0
+    results.append(f"   - If H={LOW_TANK_H:g}, Vol={LOW_TANK_VOLUME_L:g}L -> Area = {area:.3f} m2.")
+    fits = "Fits" if low_l <= BENCH.dims[0] else f"Does NOT fit the {BENCH.dims[0]:g}mm bench"
+    results.append(f"   - If W={LOW_TANK_W:g}mm, Length = {low_l:g}mm. ({fits} length-wise).")
+    results.append("   - See scripts/tank_explorer.py for the full L x W x H search.")
     results.append(" - Solution C: Place both tanks on Passenger Side? (Heavy imbalance).")
-    results.append(" - Solution D: Tank in Garage Shell (Rear)? (Violates Axle pref).")
+    results.append(f" - Solution D: Tank in Garage Shell (X={GARAGE_X_START:g} to {GARAGE_X_END:g})? (Violates Axle pref).")
 
     # 2. BATTERIES (6x)
-    # Total Mass 300kg.
-    # Option: Driver Side (balance Kitchen).
-    # Fits under Dinette Seat (H=450)?
-    # Battery H = 220 + Clearance = 270mm.
-    # 270 < 450. FITS!
-    results.append("\nBATTERIES (Driver Side): Fits under Dinette Bench.")
-    results.append(" - Height: 270mm < 450mm.")
-    results.append(" - Mass: 300kg helps balance Kitchen side.")
-    results.append(" - Location: Can center near Axle (2380).")
-    
+    # Option: Driver Side (balance Kitchen), under the dinette seat.
+    bat_h = BAT_H + BAT_CLEARANCE
+    bat_fit = bat_h < seat_h
+    results.append(f"\nBATTERIES (Driver Side): {'Fits' if bat_fit else 'Does NOT fit'} under Dinette Bench.")
+    results.append(f" - Height: {bat_h:g}mm {'<' if bat_fit else '>='} {seat_h:g}mm.")
+    results.append(f" - Mass: {TOTAL_BAT_MASS:g}kg helps balance Kitchen side.")
+    results.append(describe_position(BENCH, BAT_L))
+
     # 3. SUMMARY
-    # Passenger Side: 1x Water Tank (250kg) + Kitchen Mass.
-    # Driver Side: Batteries (300kg) + 1x Water Tank (250kg)?
-    #   - If we solve the Tank Height issue.
-    #   - If we use a custom "Low Profile" tank for Driver side: 1250L x 500W x 400H.
-    #     - Fits under 450mm seat!
-    
     results.append("\nRECOMMENDATION:")
     results.append("- Passenger Side: Standard shape tank (Option B) in Kitchen.")
-    results.append("- Driver Side: Custom LOW PROFILE tank + Batteries under Dinette Bench.")
-    
+    results.append("- Driver Side: Batteries under Dinette Bench; the bench cannot reach the axle zone,")
+    results.append("  so a driver-side tank needs a longer bench or a different cavity.")
+
     return "\n".join(results)
 
-print(check_placement())
+if __name__ == "__main__":
+    print(check_placement())
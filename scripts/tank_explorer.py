@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Enumerate rectangular tank shapes for a target volume in one cavity.
+
+``detailed_fitment_model.py`` derives the 1200x550x400 driver tank by hand
+from a 250 L target and the bench limits.  This explores the whole grid of
+L x W x H (length along the vehicle, width across it, height) for a cavity
+of the constraint model and keeps the shapes that pass, in order:
+
+1. envelope  -- each side plus clearance fits the cavity, and the height
+                stays under the floor-height cap (per axis, before any 3-D
+                grid is built)
+2. centroid  -- the tank, slid along the cavity as close to the rear axle as
+                it can go, has its centroid within the axle tolerance (per
+                length)
+3. volume    -- interior volume (walls subtracted) between the target and
+                target * (1 + overshoot), evaluated on the broadcast grid
+
+Survivors are ranked by distance to the axle, then height (lower CoG), then
+surface area (material).  Everything is NumPy filtering; no solid is built.
+Defaults come from water_tank_solver.py (clearance, floor-height cap) and
+the constraint model (axle tolerance, habitat.yml ``axle_zone``).
+
+When nothing survives, the largest tank that passed the last non-empty stage
+is reported as the near miss, with the checks it fails.  With the model as it
+stands that is the default run: the driver bench ends at x=1800, short of the
+axle zone (2140 +/- 300), and even ``--width 550 --axle-tolerance 1000``
+tops out near 230 L once the 20 mm clearance and 5 mm walls come off the
+hand-derived 1200x550x400 tank.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_TARGET_L = 250.0
+DEFAULT_STEP = 5.0  # mm
+DEFAULT_OVERSHOOT = 0.05
+DEFAULT_WALL = 5.0  # mm, tank wall thickness
+DEFAULT_MIN_SIDE = 150.0  # mm
+WATER_DENSITY = 1.0  # kg/L
+# Cells of the broadcast W x H grid evaluated per block of lengths.
+BLOCK_CELLS = 4_000_000
+
+
+@dataclass(frozen=True)
+class TankCandidate:
+    length: float
+    width: float
+    height: float
+    volume_l: float
+    fill_mass: float  # kg
+    centroid: tuple  # (x, y, z) mm, solver frame
+    axle_offset: float  # mm, centroid x minus axle
+    area_m2: float
+
+
+@dataclass
+class ExploreResult:
+    cavity: str
+    candidates: int  # full grid size
+    remaining: Dict[str, int] = field(default_factory=dict)  # after each stage
+    feasible: int = 0
+    ranked: List[TankCandidate] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    # Only without feasible tanks: the closest one and the checks it fails.
+    near_miss: Optional[TankCandidate] = None
+    near_miss_fails: Tuple[str, ...] = ()
+
+
+def _candidate(length, width, height, centroid_x, axle_x, cavity_y, clearance, wall, density) -> TankCandidate:
+    volume_l = (length - 2 * wall) * (width - 2 * wall) * (height - 2 * wall) / 1e6
+    return TankCandidate(
+        float(length), float(width), float(height),
+        round(float(volume_l), 1), round(float(volume_l * density), 1),
+        (float(centroid_x), float(cavity_y), float(clearance + height / 2)),
+        float(centroid_x - axle_x), round(float(2 * (length * width + length * height + width * height) / 1e6), 3),
+    )
+
+
+def explore(
+    cavity,
+    axle_x: float,
+    target_l: float = DEFAULT_TARGET_L,
+    step: float = DEFAULT_STEP,
+    clearance: float = 20.0,
+    max_height: Optional[float] = None,
+    axle_tolerance: Optional[float] = None,
+    overshoot: float = DEFAULT_OVERSHOOT,
+    wall: float = DEFAULT_WALL,
+    min_side: float = DEFAULT_MIN_SIDE,
+    density: float = WATER_DENSITY,
+    top: int = 20,
+    width: Optional[float] = None,
+) -> ExploreResult:
+    """Feasible tanks for ``cavity`` (a constraints.Cavity), best first.
+
+    ``width`` overrides the cavity width (e.g. a widened bench base).
+    ``axle_tolerance`` defaults to the constraint model's axle zone.
+    """
+    if axle_tolerance is None:
+        from constraints import load_model  # noqa: PLC0415
+
+        axle_tolerance = load_model().habitat.axle_tolerance
+    start = time.perf_counter()
+    cav_l, cav_w, cav_h = cavity.dims
+    if width is not None:
+        cav_w = width
+    if max_height is not None:
+        cav_h = min(cav_h, max_height + 2 * clearance)
+
+    # Full grid, one axis at a time.
+    axes = [np.arange(min_side, limit + step / 2, step) for limit in (cav_l, cav_w, cav_h)]
+    total = int(np.prod([max(len(a), 0) for a in axes]))
+    result = ExploreResult(cavity.name, total)
+
+    # 1. Envelope: each side with clearance on both ends.
+    lengths, widths, heights = (
+        a[a + 2 * clearance <= limit] for a, limit in zip(axes, (cav_l, cav_w, cav_h))
+    )
+    result.remaining["envelope"] = len(lengths) * len(widths) * len(heights)
+
+    # 2. Centroid: slide each length toward the axle within the cavity.
+    x_lo = cavity.x - cav_l / 2 + clearance + lengths / 2
+    x_hi = cavity.x + cav_l / 2 - clearance - lengths / 2
+    centroid_x = np.clip(axle_x, x_lo, x_hi)
+    keep = np.abs(centroid_x - axle_x) <= axle_tolerance
+    envelope_lengths, envelope_x = lengths, centroid_x
+    lengths, centroid_x = lengths[keep], centroid_x[keep]
+    result.remaining["centroid"] = len(lengths) * len(widths) * len(heights)
+
+    # 3. Volume on the broadcast grid, in blocks of lengths.
+    inner_w = np.maximum(widths - 2 * wall, 0.0)[:, None]
+    inner_h = np.maximum(heights - 2 * wall, 0.0)[None, :]
+    cross = inner_w * inner_h  # mm^2, (W, H)
+    lo, hi = target_l * 1e6, target_l * (1 + overshoot) * 1e6
+    block = max(1, BLOCK_CELLS // max(cross.size, 1))
+    hits = []  # (length index, width index, height index)
+    for first in range(0, len(lengths), block):
+        inner_l = np.maximum(lengths[first:first + block] - 2 * wall, 0.0)
+        volume = inner_l[:, None, None] * cross[None, :, :]
+        li, wi, hi_ = np.nonzero((volume >= lo) & (volume <= hi))
+        hits.append(np.stack([li + first, wi, hi_], axis=1))
+    hits = np.concatenate(hits) if hits else np.empty((0, 3), dtype=int)
+    result.remaining["volume"] = result.feasible = len(hits)
+
+    if len(hits):
+        L, W, H = lengths[hits[:, 0]], widths[hits[:, 1]], heights[hits[:, 2]]
+        offset = centroid_x[hits[:, 0]] - axle_x
+        area = 2 * (L * W + L * H + W * H) / 1e6
+        order = np.lexsort((area, H, np.abs(offset)))[:top]
+        for k in order:
+            result.ranked.append(_candidate(
+                L[k], W[k], H[k], centroid_x[hits[k, 0]], axle_x, cavity.y, clearance, wall, density,
+            ))
+    elif len(envelope_lengths) and len(widths) and len(heights):
+        # Near miss: the biggest tank (longest, widest, tallest) of the last
+        # stage that kept any.
+        passed = len(lengths) > 0
+        length, x = (lengths[-1], centroid_x[-1]) if passed else (envelope_lengths[-1], envelope_x[-1])
+        miss = _candidate(length, widths[-1], heights[-1], x, axle_x, cavity.y, clearance, wall, density)
+        fails = [] if passed else ["centroid"]
+        if not lo <= (length - 2 * wall) * inner_w[-1, 0] * inner_h[0, -1] <= hi:
+            fails.append("volume")
+        result.near_miss, result.near_miss_fails = miss, tuple(fails)
+    result.elapsed_ms = (time.perf_counter() - start) * 1000.0
+    return result
+
+
+def write_csv(result: ExploreResult, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["length", "width", "height", "volume_l", "fill_mass_kg",
+                         "centroid_x", "centroid_y", "centroid_z", "axle_offset", "area_m2"])
+        for c in result.ranked:
+            writer.writerow([c.length, c.width, c.height, c.volume_l, c.fill_mass,
+                             *c.centroid, c.axle_offset, c.area_m2])
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main() -> int:
+    from constraints import load_model  # noqa: PLC0415
+    from water_tank_solver import CLEARANCE, Z_MAX_FROM_FLOOR  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(description="Explore tank L x W x H for a target volume in one cavity.")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_L, help="Target volume in litres.")
+    parser.add_argument("--cavity", default="driver_side_bench", help="Constraint-model cavity name.")
+    parser.add_argument("--width", type=float, default=None,
+                        help="Override the cavity width (e.g. 550 for the widened bench base).")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP, help="Grid step in mm.")
+    parser.add_argument("--clearance", type=float, default=CLEARANCE, help="Gap on every side, mm.")
+    parser.add_argument("--max-height", type=float, default=Z_MAX_FROM_FLOOR, help="Tank height cap, mm.")
+    parser.add_argument("--axle-tolerance", type=float, default=None,
+                        help="Allowed centroid distance from the rear axle, mm (default: habitat.yml axle_zone).")
+    parser.add_argument("--overshoot", type=float, default=DEFAULT_OVERSHOOT,
+                        help="Accept volumes up to target * (1 + overshoot).")
+    parser.add_argument("--wall", type=float, default=DEFAULT_WALL, help="Tank wall thickness, mm.")
+    parser.add_argument("--top", type=int, default=20, help="Ranked tanks to report.")
+    parser.add_argument("--csv", type=Path, default=None, help="Write the ranked tanks to CSV.")
+    args = parser.parse_args()
+
+    model = load_model()
+    if args.axle_tolerance is None:
+        args.axle_tolerance = model.habitat.axle_tolerance
+    try:
+        cavity = model.cavity(args.cavity)
+    except KeyError:
+        names = ", ".join(c.name for c in model.cavities)
+        print(f"Error: unknown cavity {args.cavity!r} (choose from {names})")
+        return 1
+
+    result = explore(
+        cavity, model.habitat.rear_axle_x, args.target, args.step, args.clearance,
+        args.max_height, args.axle_tolerance, args.overshoot, args.wall, top=args.top, width=args.width,
+    )
+    l, w, h = cavity.dims
+    print(f"{cavity.name}: {l:g} x {args.width or w:g} x {h:g} mm at x={cavity.x:g}, "
+          f"axle x={model.habitat.rear_axle_x:g} +/- {args.axle_tolerance:g}")
+    print(f"{result.candidates:,} candidates on a {args.step:g} mm grid, {result.elapsed_ms:.0f} ms")
+    for stage, count in result.remaining.items():
+        print(f"  after {stage:9s} {count:>12,}")
+    if not result.ranked:
+        print("No feasible tank.")
+        miss = result.near_miss
+        if miss:
+            print(f"Closest: {miss.length:g} x {miss.width:g} x {miss.height:g} mm, {miss.volume_l:g} L "
+                  f"(target {args.target:g}), centroid x={miss.centroid[0]:g} "
+                  f"(axle {miss.axle_offset:+g}, tolerance {args.axle_tolerance:g}); "
+                  f"fails {', '.join(result.near_miss_fails)}")
+        return 1
+    print(f"\n{'L':>6} {'W':>5} {'H':>5} {'litres':>7} {'kg':>6} {'x':>7} {'y':>6} {'z':>5} {'dx':>6} {'m2':>6}")
+    for c in result.ranked:
+        x, y, z = c.centroid
+        print(f"{c.length:6.0f} {c.width:5.0f} {c.height:5.0f} {c.volume_l:7.1f} {c.fill_mass:6.1f} "
+              f"{x:7.0f} {y:+6.0f} {z:5.0f} {c.axle_offset:+6.0f} {c.area_m2:6.3f}")
+    if args.csv:
+        write_csv(result, args.csv)
+        print(f"\nRanked tanks: {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,115 +7,149 @@ Generates an HTML file with an interactive 3D viewer using three.js.
 from __future__ import annotations
 
 import argparse
+import base64
 import json
 import sys
 from pathlib import Path
+from typing import Optional
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_STEP = REPO_ROOT / "reference" / "Osterath_Habitat_1225 AF.step"
 DEFAULT_OUTPUT = REPO_ROOT / "renders" / "habitat_viewer.html"
 
 
-def create_box(width, depth, height, x, y, z):
-    """Create a box at specific center coordinates."""
-    import cadquery as cq
-    # Habitat coords: X=Width, Y=Length (Forward), Z=Height
-    # CadQuery standard: X, Y, Z. 
-    # But in our viewer (three.js STL loader), the orientation depends on the export.
-    # The STEP file dictates the shell orientation.
-    # Our previous experiment showed we need to match that.
-    # We will assume the coordinate system logic from generate_systems_cad.py is correct.
-    box = cq.Workplane("XY").box(width, depth, height)
-    return box.translate((x, y, z))
-
-def generate_systems_geometry(step_path: Path) -> dict:
-    """Generate STL data for all systems and zones."""
-    import cadquery as cq
-    from cadquery import importers
-    import tempfile
-
-    components = {}
-
-    def export_stl(shape):
-        with tempfile.NamedTemporaryFile(suffix=".stl", delete=False) as f:
-            path = f.name
-        cq.exporters.export(shape, path, exportType="STL")
-        with open(path, "rb") as f:
-            data = f.read()
-        Path(path).unlink()
-        return data
-
-    # COLORS (Hex)
-    COLOR_ALDE = 0xff4444      # Red
-    COLOR_WATER = 0x4444ff     # Blue
-    COLOR_BATTERY = 0xffaa00   # Orange/Yellow
-    COLOR_ELEC = 0xaa44ff      # Purple
-    COLOR_ZONE = 0x44aa44      # Green (Translucent)
-    COLOR_DIESEL = 0x555555    # Grey
-
-    # 1. ALDE HEATER (Driver Side Rear Garage Arm)
-    alde = create_box(420, 500, 300, -840, -2090, 150)
-    components['alde'] = {
-        'data': export_stl(alde), 'color': COLOR_ALDE, 'name': 'Alde Heater', 'opacity': 1.0
-    }
-
-    # 2. ELECTRICAL CORE (Passenger Side Rear Garage Arm)
-    elec = create_box(200, 400, 500, 840, -2090, 400)
-    components['electrical'] = {
-        'data': export_stl(elec), 'color': COLOR_ELEC, 'name': 'Electrical Core', 'opacity': 1.0
-    }
-
-    # 3. WATER TANK 1 (Passenger Kitchen Base)
-    tank1 = create_box(500, 1000, 500, 840, -1000, 250)
-    components['tank1'] = {
-        'data': export_stl(tank1), 'color': COLOR_WATER, 'name': 'Water Tank 1 (Standard)', 'opacity': 1.0
-    }
-
-    # 4. WATER TANK 2 (Driver Dinette Base - Low Profile)
-    tank2 = create_box(500, 1250, 400, -840, -1000, 200)
-    components['tank2'] = {
-        'data': export_stl(tank2), 'color': COLOR_WATER, 'name': 'Water Tank 2 (Low Profile)', 'opacity': 1.0
-    }
-
-    # 5. BATTERIES (Passenger Kitchen Base)
-    batteries = create_box(400, 600, 400, 840, 0, 200)
-    components['batteries'] = {
-        'data': export_stl(batteries), 'color': COLOR_BATTERY, 'name': 'Battery Bank (300kg)', 'opacity': 1.0
-    }
-
-    # 6. DIESEL TANK (External Reference)
-    diesel = create_box(500, 1500, 600, -1140, -500, -300)
-    components['diesel'] = {
-        'data': export_stl(diesel), 'color': COLOR_DIESEL, 'name': 'Diesel Tank (Ref)', 'opacity': 1.0
-    }
-
-    # 7. ZONES (Transparent)
-    
-    # Garage Zone
-    garage_zone = create_box(2280, 600, 2160, 0, -2090, 1080)
-    components['zone_garage'] = {
-        'data': export_stl(garage_zone), 'color': COLOR_ZONE, 'name': 'Zone: Garage', 'opacity': 0.15
-    }
-
-    # Kitchen Zone
-    kitchen_zone = create_box(600, 2300, 2160, 840, 40, 1080)
-    components['zone_kitchen'] = {
-        'data': export_stl(kitchen_zone), 'color': COLOR_ZONE, 'name': 'Zone: Kitchen', 'opacity': 0.15
-    }
-
-    # Bathroom Zone
-    bathroom_zone = create_box(900, 1200, 2160, -690, 1790, 1080)
-    components['zone_bathroom'] = {
-        'data': export_stl(bathroom_zone), 'color': COLOR_ZONE, 'name': 'Zone: Bathroom', 'opacity': 0.15
-    }
-
-    # Dinette Zone
-    dinette_zone = create_box(1000, 2300, 2160, -640, 40, 1080)
-    components['zone_dinette'] = {
-        'data': export_stl(dinette_zone), 'color': COLOR_ZONE, 'name': 'Zone: Dinette', 'opacity': 0.15
-    }
-
-    return components
+def load_step_to_stl(step_path: Path) -> bytes:
+    """Load the habitat shell (via the BREP cache) and convert it to STL bytes."""
+    from mesh_cache import cached_tessellate
+    from shell_cache import load_shell
+
+    return cached_tessellate(load_shell(step_path)).to_stl_bytes()
+
+def load_step_to_glb(step_path: Path, lod: bool = True) -> bytes:
+    """Load the habitat shell (via the BREP cache) and pack it as indexed GLB.
+
+    With ``lod`` the shell is meshed at every ``DEFAULT_LODS`` level so the
+    viewer can show coarse geometry from afar and full detail up close.
+    """
+    from mesh_cache import cached_tessellate
+    from mesh_export import DEFAULT_LODS, GlbNode, build_glb, tessellate_lods
+    from shell_cache import load_shell
+
+    levels = DEFAULT_LODS if lod else DEFAULT_LODS[:1]
+    lods = tessellate_lods(load_shell(step_path), levels, mesher=cached_tessellate)
+    return build_glb([GlbNode.from_lods("Habitat Shell", lods, 0x8899AA, 0.4)])
+
+def create_html_viewer(stl_data: Optional[bytes], openings: list, glb_url: Optional[str] = None) -> str:
+    """Create a standalone three.js viewer for the shell with opening markers.
+
+    Pass either inline ``stl_data`` or ``glb_url`` (a sidecar path relative to
+    the HTML, or a ``data:model/gltf-binary;base64,...`` URL).
+    """
+    if glb_url is not None:
+        from mesh_export import THREE_LOD_JS
+
+        model_import = "import { GLTFLoader } from 'three/addons/loaders/GLTFLoader.js';"
+        model_js = f'''const buffer = await (await fetch("{glb_url}")).arrayBuffer();
+        {THREE_LOD_JS}
+        new GLTFLoader().parse(buffer, '', (gltf) => {{
+            buildLods(gltf.scene);
+            scene.add(gltf.scene);
+        }});'''
+    else:
+        shell_b64 = base64.b64encode(stl_data).decode("utf-8")
+        model_import = "import { STLLoader } from 'three/addons/loaders/STLLoader.js';"
+        model_js = f'''const bin = atob("{shell_b64}");
+        const buf = new Uint8Array(bin.length);
+        for (let i=0; i<bin.length; i++) buf[i] = bin.charCodeAt(i);
+        const geo = new STLLoader().parse(buf.buffer);
+        const mat = new THREE.MeshPhongMaterial({{ color: 0x8899aa, transparent: true, opacity: 0.4, side: THREE.DoubleSide }});
+        scene.add(new THREE.Mesh(geo, mat));'''
+
+    html = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Gimli2 Habitat Shell</title>
+    <style>
+        body {{ margin: 0; overflow: hidden; background: #1a1a2e; color: white; font-family: sans-serif; }}
+        #info {{ position: absolute; top: 10px; left: 10px; background: rgba(0,0,0,0.8); padding: 15px; border-radius: 8px; max-width: 320px; }}
+        .opening {{ margin: 3px 0; font-size: 13px; }}
+    </style>
+    <script type="importmap">
+    {{
+        "imports": {{
+            "three": "https://unpkg.com/three@0.160.0/build/three.module.js",
+            "three/addons/": "https://unpkg.com/three@0.160.0/examples/jsm/"
+        }}
+    }}
+    </script>
+</head>
+<body>
+    <div id="info">
+        <h3>Habitat Shell</h3>
+        <div id="openings"></div>
+        <p><small>Left-Click: Rotate | Right-Click: Pan | Scroll: Zoom</small></p>
+    </div>
+    <script type="module">
+        import * as THREE from 'three';
+        import {{ OrbitControls }} from 'three/addons/controls/OrbitControls.js';
+        {model_import}
+
+        const scene = new THREE.Scene();
+        scene.background = new THREE.Color(0x1a1a2e);
+
+        // STEP frame: X = width, Y = up, Z = length
+        const camera = new THREE.PerspectiveCamera(50, window.innerWidth / window.innerHeight, 1, 100000);
+        camera.position.set(8000, 5000, 8000);
+
+        const renderer = new THREE.WebGLRenderer({{ antialias: true }});
+        renderer.setSize(window.innerWidth, window.innerHeight);
+        document.body.appendChild(renderer.domElement);
+
+        const controls = new OrbitControls(camera, renderer.domElement);
+        controls.enableDamping = true;
+        controls.target.set(0, 1200, 3300);
+
+        scene.add(new THREE.AmbientLight(0xffffff, 0.4));
+        const sun = new THREE.DirectionalLight(0xffffff, 1);
+        sun.position.set(5000, 8000, 2000);
+        scene.add(sun);
+
+        {model_js}
+
+        // Openings (markers only where habitat.yml records a center)
+        const openings = {json.dumps(openings)};
+        const list = document.getElementById('openings');
+        openings.forEach(o => {{
+            const item = document.createElement('div');
+            item.className = 'opening';
+            item.textContent = `${{o.id}} (${{o.kind}}, ${{o.location}})`;
+            list.appendChild(item);
+            if (!o.center_mm) return;
+            const marker = new THREE.Mesh(
+                new THREE.SphereGeometry(60),
+                new THREE.MeshBasicMaterial({{ color: 0xffcc00 }})
+            );
+            marker.position.set(...o.center_mm);
+            scene.add(marker);
+        }});
+
+        function animate() {{
+            requestAnimationFrame(animate);
+            controls.update();
+            renderer.render(scene, camera);
+        }}
+        animate();
+
+        window.onresize = () => {{
+            camera.aspect = window.innerWidth / window.innerHeight;
+            camera.updateProjectionMatrix();
+            renderer.setSize(window.innerWidth, window.innerHeight);
+        }};
+    </script>
+</body>
+</html>'''
+    return html
 
 def load_openings_from_yaml(yaml_path: Path) -> list:
     """Load openings from habitat.yml."""
@@ -155,43 +189,6 @@ def load_openings_from_yaml(yaml_path: Path) -> list:
         })
 
     return openings
-    """Load openings from habitat.yml."""
-    import yaml
-
-    with yaml_path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
-    openings = []
-    features = data.get("features", {})
-
-    for win in features.get("windows", []):
-        openings.append({
-            "id": win.get("id"),
-            "model": win.get("model"),
-            "kind": "window",
-            "location": win.get("location"),
-            "center_mm": win.get("center_mm"),
-        })
-
-    for door in features.get("doors", []):
-        openings.append({
-            "id": door.get("id"),
-            "model": door.get("model"),
-            "kind": "door",
-            "location": door.get("location"),
-            "center_mm": door.get("center_mm"),
-        })
-
-    for hatch in features.get("hatches", []):
-        openings.append({
-            "id": hatch.get("id"),
-            "model": hatch.get("model"),
-            "kind": "hatch",
-            "location": hatch.get("location"),
-            "center_mm": hatch.get("center_mm"),
-        })
-
-    return openings
 
 
 def main() -> int:
@@ -216,20 +213,50 @@ def main() -> int:
         default=REPO_ROOT / "habitat.yml",
         help="Path to habitat.yml.",
     )
+    parser.add_argument(
+        "--format",
+        choices=("glb", "stl"),
+        default="glb",
+        help="Shell mesh payload: indexed GLB (default) or legacy inline STL.",
+    )
+    parser.add_argument(
+        "--sidecar",
+        action="store_true",
+        help="Write the GLB next to the HTML instead of embedding it "
+             "(serve the folder over HTTP; browsers block fetch() from file://).",
+    )
+    parser.add_argument(
+        "--no-lod",
+        action="store_true",
+        help="Only embed the finest shell mesh (no camera-distance LOD switching).",
+    )
     args = parser.parse_args()
 
     print(f"Loading STEP file: {args.step}")
-    stl_data = load_step_to_stl(args.step)
-    print(f"  Converted to STL: {len(stl_data)} bytes")
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    stl_data = None
+    glb_url = None
+    if args.format == "stl":
+        stl_data = load_step_to_stl(args.step)
+        print(f"  Converted to STL: {len(stl_data)} bytes")
+    else:
+        glb = load_step_to_glb(args.step, lod=not args.no_lod)
+        print(f"  Converted to GLB: {len(glb)} bytes")
+        if args.sidecar:
+            glb_path = args.output.with_suffix(".glb")
+            glb_path.write_bytes(glb)
+            print(f"  Saved mesh to: {glb_path}")
+            glb_url = glb_path.name
+        else:
+            glb_url = "data:model/gltf-binary;base64," + base64.b64encode(glb).decode("ascii")
 
     print(f"Loading openings from: {args.habitat}")
     openings = load_openings_from_yaml(args.habitat)
     print(f"  Found {len(openings)} openings")
 
     print(f"Generating HTML viewer...")
-    html = create_html_viewer(stl_data, openings)
+    html = create_html_viewer(stl_data, openings, glb_url)
 
-    args.output.parent.mkdir(parents=True, exist_ok=True)
     args.output.write_text(html, encoding="utf-8")
     print(f"  Saved to: {args.output}")
     print()
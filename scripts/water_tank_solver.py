@@ -1,12 +1,14 @@
 
-import cadquery as cq
+from constraints import load_model
+
+MODEL = load_model()
 
 # --- Parameters ---
 TOTAL_VOLUME_L = 500.0
 # Constraints
-REAR_AXLE_X_FROM_REAR = 2380.0
+REAR_AXLE_X_FROM_REAR = MODEL.habitat.rear_axle_x
 Z_MAX_FROM_FLOOR = 800.0
-X_TOLERANCE_CENTER = 300.0
+X_TOLERANCE_CENTER = MODEL.habitat.axle_tolerance
 CLEARANCE = 20.0
 
 # Tank Specs
@@ -25,10 +27,12 @@ OPT_B_MASS = 250.0 # Each
 # Garage Shell Arm (ZONE-003)
 # Assuming 600mm depth (recommended change) or 509mm (current)?
 # Let's assume 600mm to even see if it fits, otherwise revert to 509mm logic
-SHELL_DEPTH = 600.0 
-SHELL_WALL = 18.0
+SHELL_DEPTH = MODEL.garage_shell_depth
+SHELL_WALL = MODEL.garage_wall_thickness
 INNER_WIDTH_ARM = SHELL_DEPTH - 2 * SHELL_WALL 
 # If shell_depth=600, inner=564mm. If shell_depth=509, inner=473mm.
+ALT_SHELL_DEPTH = 509.0  # the shallower shell the 600mm arms replace
+ALT_INNER_WIDTH_ARM = ALT_SHELL_DEPTH - 2 * SHELL_WALL
 
 REAR_WALL_THICKNESS = 60.0 # usually external minus internal
 # Coordinates: Rear Wall Interior Face is Y=0? 
@@ -43,6 +47,13 @@ REAR_WALL_THICKNESS = 60.0 # usually external minus internal
 # So prompt uses X = Longitudinal?
 # Let's assume Prompt X = Longitudinal Distance from Rear Wall.
 
+def width_verdict(tank_w, space_w):
+    """'FITS (Width a < b)' or 'FAIL (Width a > b)' for a tank across a space."""
+    if tank_w < space_w:
+        return f"FITS (Width {tank_w:g} < {space_w:g})"
+    return f"FAIL (Width {tank_w:g} > {space_w:g})"
+
+
 def analyze_tank_fit():
     results = []
 
@@ -64,13 +75,18 @@ def analyze_tank_fit():
     # If 509mm arms => 1262mm width. Tank L=1200mm fits!
     # If 600mm arms => 1080mm width. Tank L=1200mm FAIL.
     
-    results.append("OPTION A (Single 1200x600x700):")
-    results.append(" - In 509mm Arms: FAIL (Width 600 > 473)")
-    results.append(" - In 600mm Arms: FAIL (Width 600 > 564)")
-    results.append(" - In Center (509mm arms): FITS (Width 1262 > 1200).")
-    results.append("   - Centroid X = tank L/2 = 600mm from rear wall?")
-    results.append("   - Target X = 2380 +/- 300 (2080-2680).")
-    results.append("   - 600mm is WAY too far rear. Bad weight distribution.")
+    center_w = MODEL.habitat.width - 2 * ALT_SHELL_DEPTH
+    center_fits = "FITS (Width {:g} > {:g})" if OPT_A_L < center_w else "FAIL (Width {:g} <= {:g})"
+    results.append(f"OPTION A (Single {OPT_A_L:g}x{OPT_A_W:g}x{OPT_A_H:g}):")
+    results.append(f" - In {ALT_SHELL_DEPTH:g}mm Arms: {width_verdict(OPT_A_W, ALT_INNER_WIDTH_ARM)}")
+    results.append(f" - In {SHELL_DEPTH:g}mm Arms: {width_verdict(OPT_A_W, INNER_WIDTH_ARM)}")
+    results.append(f" - In Center ({ALT_SHELL_DEPTH:g}mm arms): {center_fits.format(center_w, OPT_A_L)}.")
+    results.append(f"   - Centroid X = tank L/2 = {OPT_A_L / 2:g}mm from rear wall?")
+    results.append(
+        f"   - Target X = {REAR_AXLE_X_FROM_REAR:g} +/- {X_TOLERANCE_CENTER:g} "
+        f"({REAR_AXLE_X_FROM_REAR - X_TOLERANCE_CENTER:g}-{REAR_AXLE_X_FROM_REAR + X_TOLERANCE_CENTER:g})."
+    )
+    results.append(f"   - {OPT_A_L / 2:g}mm is WAY too far rear. Bad weight distribution.")
 
     # OPTION B: Split Tanks (2x)
     # Dim: 900(L) x 500(W) x 560(H)
@@ -79,9 +95,9 @@ def analyze_tank_fit():
     # In 509mm Arms (Inner 473mm): FAIL (500 > 473).
     # In 600mm Arms (Inner 564mm): FITS (500 < 564).
     
-    results.append("\nOPTION B (Split 900x500x560):")
-    results.append(" - In 509mm Arms: FAIL (Width 500 > 473)")
-    results.append(" - In 600mm Arms: FITS (Width 500 < 564)")
+    results.append(f"\nOPTION B (Split {OPT_B_L:g}x{OPT_B_W:g}x{OPT_B_H:g}):")
+    results.append(f" - In {ALT_SHELL_DEPTH:g}mm Arms: {width_verdict(OPT_B_W, ALT_INNER_WIDTH_ARM)}")
+    results.append(f" - In {SHELL_DEPTH:g}mm Arms: {width_verdict(OPT_B_W, INNER_WIDTH_ARM)}")
     
     # Check placement for Option B in 600mm Arms
     # Place one in Driver Arm, one in Passenger Arm.
@@ -101,4 +117,5 @@ def analyze_tank_fit():
     
     return "\n".join(results)
 
-print(analyze_tank_fit())
+if __name__ == "__main__":
+    print(analyze_tank_fit())